@@ -3,7 +3,9 @@
 # can be imported as part of the utils package or just as directory imports, so we handle both cases
 try:
     from utils.colors.ansi import AnsiColorsTool
+    from utils.colors.highlight import HighlightRule, LogHighlighter
 except ModuleNotFoundError:
     from .ansi import AnsiColorsTool
+    from .highlight import HighlightRule, LogHighlighter
 
-__all__ = ["AnsiColorsTool"]
+__all__ = ["AnsiColorsTool", "HighlightRule", "LogHighlighter"]
@@ -1,5 +1,11 @@
+import re
 import sys
-from typing import Optional
+import string
+import textwrap
+from array import array
+from bisect import bisect_left, bisect_right
+from types import MappingProxyType
+from typing import Mapping, Optional
 from enum import Enum
 
 """
@@ -34,6 +40,129 @@ Usage:
 
 """
 
+# the palettes are shared, read-only and built once, so constructing a tool allocates nothing big
+_COLORS: Mapping[str, str] = MappingProxyType({
+    "yellow":         "\033[93m",
+    "bright_yellow":  "\033[93;1m",
+    "dark_yellow":    "\033[33m",
+    "green":          "\033[92m",
+    "bright_green":   "\033[92;1m",
+    "dark_green":     "\033[32m",
+    "red":            "\033[91m",
+    "bright_red":     "\033[91;1m",
+    "dark_red":       "\033[31m",
+    "blue":           "\033[94m",
+    "bright_blue":    "\033[94;1m",
+    "dark_blue":      "\033[34m",
+    "cyan":           "\033[96m",
+    "bright_cyan":    "\033[96;1m",
+    "dark_cyan":      "\033[36m",
+    "magenta":        "\033[95m",
+    "bright_magenta": "\033[95;1m",
+    "dark_magenta":   "\033[35m",
+    "white":          "\033[97m",
+    "bold":           "\033[1m",
+    "underline":      "\033[4m",
+    "reverse":        "\033[7m",
+    "hidden":         "\033[8m",
+    "reset":          "\033[0m",
+    "bkg_white":      "\033[47m",
+    "bkg_green":      "\033[42m",
+    "bkg_red":        "\033[41m",
+    "bkg_blue":       "\033[44m"
+})
+_DISABLED_COLORS: Mapping[str, str] = MappingProxyType({key: "" for key in _COLORS})
+_KEY_SYNONYMS: Mapping[str, str] = MappingProxyType({
+    "y": "yellow",
+    "g": "green",
+    "r": "red",
+    "b": "blue",
+    "c": "cyan",
+    "m": "magenta",
+    "w": "white",
+    "bryellow": "bright_yellow",
+    "br_yellow": "bright_yellow",
+    "brblue": "bright_blue",
+    "br_blue": "bright_blue",
+    "brgreen": "bright_green",
+    "br_green": "bright_green",
+    "brred": "bright_red",
+    "br_red": "bright_red",
+    "drkyellow": "dark_yellow",
+    "drk_yellow": "dark_yellow",
+    "drkmagenta": "dark_magenta",
+    "drk_magenta": "dark_magenta",
+    "drkcyan": "dark_cyan",
+    "drk_cyan": "dark_cyan",
+    "drkblue": "dark_blue",
+    "drk_blue": "dark_blue",
+    "bkggreen": "bkg_green",
+    "bkgred": "bkg_red",
+    "bkgblue": "bkg_blue",
+    "bkgwhite": "bkg_white",
+})
+
+_key_indexes: dict[tuple, dict[str, str]] = {}
+
+def _build_key_index(colors: Mapping[str, str], key_synonyms: Mapping[str, str]) -> dict[str, str]:
+    """
+    Map every key that resolves to a color to that color's name, precomputed once
+    per palette so resolution is a single dict lookup.  A key resolves, in order, by:
+    exact color name; prefix of exactly one color name; prefix of exactly one
+    synonym.  Ambiguous prefixes fall through to the next rule, and keys that
+    match nothing (or stay ambiguous) are simply absent.
+    """
+    cache_key = (tuple(colors), tuple(key_synonyms.items()))
+    index = _key_indexes.get(cache_key)
+    if index is not None:
+        return index
+
+    def _unique_prefixes(names) -> dict[str, Optional[str]]:
+        # prefix -> the one name it starts, or None if it starts several
+        prefixes: dict[str, Optional[str]] = {}
+        for name in names:
+            lower = name.lower()
+            for end in range(len(lower) + 1):
+                prefix = lower[:end]
+                prefixes[prefix] = name if prefixes.get(prefix, name) == name else None
+        return prefixes
+
+    index = {}
+    for prefix, synonym in _unique_prefixes(key_synonyms).items():
+        if synonym is not None:
+            index[prefix] = key_synonyms[synonym]
+    for prefix, name in _unique_prefixes(colors).items():
+        if name is not None:
+            index[prefix] = name
+    for name in colors:
+        index[name.lower()] = name
+    _key_indexes[cache_key] = index
+    return index
+
+_NON_SPACE = re.compile(r"\S+")
+_TAB_OR_EOL = re.compile(r"[\t\n\r]")
+_STR_FORMAT_SPEC = re.compile(r"(?:(.)?([<>^]))?([1-9][0-9]*)?(?:\.([0-9]+))?s?", re.DOTALL)
+
+_DEFAULT_KEY_INDEX = _build_key_index(_COLORS, _KEY_SYNONYMS)
+
+# (stream, isatty) for the last sys.stdout we looked at; re-checked only if sys.stdout is replaced
+_isatty_cache: tuple[object, bool] = (None, False)
+
+def _stdout_isatty() -> bool:
+    global _isatty_cache
+    stream = sys.stdout
+    cached_stream, cached = _isatty_cache
+    if cached_stream is stream:
+        return cached
+    try:
+        isatty = bool(stream.isatty())
+    except (AttributeError, ValueError):
+        isatty = False
+    _isatty_cache = (stream, isatty)
+    return isatty
+
+_shared: dict[tuple, "AnsiColorsTool"] = {}
+
 class AnsiColorsTool:
     class EnableState(Enum):
         ENABLED = "enabled"
@@ -44,98 +173,57 @@ class AnsiColorsTool:
         self.enable_state = enable_state
         self.colors = self._get_colors_dict()
         self.key_synonyms = self._get_key_synonyms()
+        if self.colors is _COLORS and self.key_synonyms is _KEY_SYNONYMS:
+            self._key_index = _DEFAULT_KEY_INDEX
+        else:
+            self._key_index = _build_key_index(self.colors, self.key_synonyms)   # subclass palette
+        self._proxies: dict[str, "AnsiColorsTool._ColorProxy"] = {}
 
         if (enable_state==AnsiColorsTool.EnableState.DISABLED 
-            or (enable_state==AnsiColorsTool.EnableState.AUTO and not sys.stdout.isatty())):
-            self.colors = {key: "" for key in self.colors}
-
-    def _get_key_synonyms(self) -> dict[str, str]:
-        return {
-            "y": "yellow",
-            "g": "green",
-            "r": "red",
-            "b": "blue",
-            "c": "cyan",
-            "m": "magenta",
-            "w": "white",
-            "bryellow": "bright_yellow",
-            "br_yellow": "bright_yellow",
-            "brblue": "bright_blue",
-            "br_blue": "bright_blue",
-            "brgreen": "bright_green",
-            "br_green": "bright_green",
-            "brred": "bright_red",
-            "br_red": "bright_red",
-            "drkyellow": "dark_yellow",
-            "drk_yellow": "dark_yellow",
-            "drkmagenta": "dark_magenta",
-            "drk_magenta": "dark_magenta",
-            "drkcyan": "dark_cyan",
-            "drk_cyan": "dark_cyan",
-            "drkblue": "dark_blue",
-            "drk_blue": "dark_blue",
-            "bkggreen": "bkg_green",
-            "bkgred": "bkg_red",
-            "bkgblue": "bkg_blue",
-            "bkgwhite": "bkg_white",
-        }
-
-    def _get_colors_dict(self) -> dict[str, str]:
-        return {
-                "yellow":         "\033[93m",
-                "bright_yellow":  "\033[93;1m",
-                "dark_yellow":    "\033[33m",
-                "green":          "\033[92m",
-                "bright_green":   "\033[92;1m",
-                "dark_green":     "\033[32m",
-                "red":            "\033[91m",
-                "bright_red":     "\033[91;1m",
-                "dark_red":       "\033[31m",
-                "blue":           "\033[94m",
-                "bright_blue":    "\033[94;1m",
-                "dark_blue":      "\033[34m",
-                "cyan":           "\033[96m",
-                "bright_cyan":    "\033[96;1m",
-                "dark_cyan":      "\033[36m",
-                "magenta":        "\033[95m",
-                "bright_magenta": "\033[95;1m",
-                "dark_magenta":   "\033[35m",
-                "white":          "\033[97m",
-                "bold":           "\033[1m",
-                "underline":      "\033[4m",
-                "reverse":        "\033[7m",
-                "hidden":         "\033[8m",
-                "reset":          "\033[0m",
-                "bkg_white":      "\033[47m",
-                "bkg_green":      "\033[42m",
-                "bkg_red":        "\033[41m",
-                "bkg_blue":       "\033[44m"
-            }
+            or (enable_state==AnsiColorsTool.EnableState.AUTO and not _stdout_isatty())):
+            self.colors = _DISABLED_COLORS if self.colors is _COLORS else MappingProxyType({key: "" for key in self.colors})
+
+    @classmethod
+    def shared(cls, enable_state: EnableState = EnableState.AUTO) -> "AnsiColorsTool":
+        """
+        A process-wide instance, safe to share across threads (tools are
+        read-only once built).  AUTO picks the enabled or disabled instance by
+        whether sys.stdout is currently a terminal.
+        """
+        if enable_state == cls.EnableState.AUTO:
+            enable_state = cls.EnableState.ENABLED if _stdout_isatty() else cls.EnableState.DISABLED
+        tool = _shared.get((cls, enable_state))
+        if tool is None:
+            tool = _shared.setdefault((cls, enable_state), cls(enable_state))
+        return tool
+
+    def _get_key_synonyms(self) -> Mapping[str, str]:
+        return _KEY_SYNONYMS
+
+    def _get_colors_dict(self) -> Mapping[str, str]:
+        return _COLORS
 
     def __getitem__(self, key: str):
-        value = self._resolve_color_key(key)
-        return AnsiColorsTool._ColorProxy(self, value)
+        return self._proxy(key)
 
     def __getattr__(self, name: str):
         # Called only if regular attribute lookup fails; return a callable/str proxy
-        value = self._resolve_color_key(name)
-        return AnsiColorsTool._ColorProxy(self, value)
+        if name in ("_proxies", "_key_index"):
+            raise AttributeError(name)   # not set up yet (e.g. during unpickling)
+        return self._proxy(name)
+
+    def _proxy(self, key: str) -> "AnsiColorsTool._ColorProxy":
+        # proxies are immutable, so one per key is shared by every lookup
+        proxy = self._proxies.get(key)
+        if proxy is None:
+            proxy = self._proxies[key] = AnsiColorsTool._ColorProxy(self, self._resolve_color_key(key))
+        return proxy
 
     def _resolve_color_key(self, key: str) -> Optional[str]:
-        # Exact match first
-        lower_key = key.lower()
-        if lower_key in self.colors:
-            return self.colors[lower_key]
-        # Unique prefix match
-        matches = [name for name in self.colors.keys() if name.lower().startswith(lower_key)]
-        if len(matches) == 1:
-            return self.colors[matches[0]]
-        # Synonym match
-        matches = [name for name in self.key_synonyms.keys() if name.lower().startswith(lower_key)]
-        if len(matches) == 1:
-            return self.colors[self.key_synonyms[matches[0]]]
-        # None or ambiguous
-        return None
+        # exact match, else unique prefix of a color name, else unique prefix of a
+        # synonym; None if there is no match or it is ambiguous (see _build_key_index)
+        name = self._key_index.get(key.lower())
+        return None if name is None else self.colors[name]
 
     class _ColorProxy:
         def __init__(self, owner: "AnsiColorsTool", resolved_color: Optional[str] = None):
@@ -143,8 +231,7 @@ class AnsiColorsTool:
             self._resolved_color = resolved_color
 
         def __getattr__(self, name: str):
-            color = self._owner._resolve_color_key(name)
-            return AnsiColorsTool._ColorProxy(self._owner, color)
+            return self._owner._proxy(name)
 
         def __call__(self, string: str, color: Optional[str] = None) -> str:
             chosen = self._resolved_color
@@ -166,32 +253,61 @@ class AnsiColorsTool:
     class ColoredString(str):
         """A string-like object that stores plain text and color spans.
         Color codes are only applied when converting to str/printing.
+
+        Spans are kept sorted by start in parallel arrays (`_starts`, `_ends`,
+        `_codes`), so index and slice lookups are binary searches, and the
+        rendered form is built once and cached (ColoredStrings are immutable).
         """
         def __new__(cls, owner: "AnsiColorsTool", text: str, spans: Optional[list[tuple[int, int, str]]] = None):
+            spans = sorted(spans, key=lambda s: s[0]) if spans else ()
+            return cls._from_arrays(owner, text,
+                                    array("q", [s for s, _, _ in spans]),
+                                    array("q", [e for _, e, _ in spans]),
+                                    tuple(c for _, _, c in spans))
+
+        @classmethod
+        def _from_arrays(cls, owner: "AnsiColorsTool", text: str, starts: array, ends: array,
+                         codes: tuple[str, ...]) -> "AnsiColorsTool.ColoredString":
+            # `starts` must already be sorted; the arrays are taken over, not copied
             obj = str.__new__(cls, text)
             obj._owner = owner
-            obj._spans = spans or []  # list of (start, end, color_code)
+            obj._starts, obj._ends, obj._codes = starts, ends, codes
+            # disjoint spans (the usual case) also have sorted ends, which the lookups rely on
+            obj._disjoint = all(ends[i] <= starts[i + 1] for i in range(len(starts) - 1))
+            obj._rendered = None
             return obj
 
+        @property
+        def _spans(self) -> list[tuple[int, int, str]]:
+            # list of (start, end, color_code), sorted by start
+            return list(zip(self._starts, self._ends, self._codes))
+
         # Internal helper to get the underlying plain string value
         def _plain(self) -> str:
             return str.__str__(self)
 
         def __str__(self) -> str:
+            rendered = self._rendered
+            if rendered is None:
+                rendered = self._rendered = self._render()
+            return rendered
+
+        def _render(self) -> str:
             plain = self._plain()
-            if not self._spans:
+            if not self._codes:
                 return plain
             # Build colored output applying spans with resets
+            reset = self._owner.colors['reset']
             parts: list[str] = []
             pos = 0
-            for (start, end, code) in sorted(self._spans, key=lambda s: s[0]):
+            for start, end, code in zip(self._starts, self._ends, self._codes):
                 # append uncolored gap
                 if pos < start:
                     parts.append(plain[pos:start])
                 # append colored segment
                 segment = plain[start:end]
                 if code:
-                    parts.append(f"{code}{segment}{self._owner.colors['reset']}")
+                    parts.append(f"{code}{segment}{reset}")
                 else:
                     parts.append(segment)
                 pos = end
@@ -200,69 +316,397 @@ class AnsiColorsTool:
                 parts.append(plain[pos:])
             return "".join(parts)
 
+        def _shifted(self, offset: int) -> tuple[array, array]:
+            if not offset:
+                return self._starts, self._ends
+            return array("q", [s + offset for s in self._starts]), array("q", [e + offset for e in self._ends])
+
         def __add__(self, other):
             # Concatenate, preserving this color spans and other's spans (if any)
             if isinstance(other, AnsiColorsTool.ColoredString):
                 left_text = self._plain()
-                right_text = other._plain()
-                new_text = left_text + right_text
-                offset = len(left_text)
-                new_spans = list(self._spans) + [(s+offset, e+offset, c) for (s, e, c) in other._spans]
-                return AnsiColorsTool.ColoredString(self._owner, new_text, new_spans)
+                starts, ends = other._shifted(len(left_text))
+                return AnsiColorsTool.ColoredString._from_arrays(
+                    self._owner, left_text + other._plain(),
+                    self._starts + starts, self._ends + ends, self._codes + other._codes)
             else:
-                right_text = other
-                new_text = self._plain() + right_text
-                new_spans = list(self._spans)
-                return AnsiColorsTool.ColoredString(self._owner, new_text, new_spans)
+                # the arrays are never mutated, so the new string can share them
+                return AnsiColorsTool.ColoredString._from_arrays(
+                    self._owner, self._plain() + other, self._starts, self._ends, self._codes)
 
         def __radd__(self, other):
             # Support str + ColoredString
-            left_text = other
-            new_text = left_text + self._plain()
             # Shift existing spans by length of left text
-            offset = len(left_text)
-            new_spans = [(s+offset, e+offset, c) for (s, e, c) in self._spans]
-            return AnsiColorsTool.ColoredString(self._owner, new_text, new_spans)
+            starts, ends = self._shifted(len(other))
+            return AnsiColorsTool.ColoredString._from_arrays(
+                self._owner, other + self._plain(), starts, ends, self._codes)
+
+        # --- span-preserving versions of the str methods (the inherited ones return plain str) ---
+
+        def _uncolored(self, text: str) -> "AnsiColorsTool.ColoredString":
+            return AnsiColorsTool.ColoredString._from_arrays(self._owner, text, array("q"), array("q"), ())
+
+        def _padded(self, text: str, left: int) -> "AnsiColorsTool.ColoredString":
+            # `text` is this string with `left` fill characters before it (and maybe some after)
+            if len(text) == len(self):
+                return self
+            return AnsiColorsTool.ColoredString._from_arrays(self._owner, text, *self._shifted(left), self._codes)
+
+        def ljust(self, width: int, fillchar: str = " ") -> "AnsiColorsTool.ColoredString":
+            return self._padded(str.ljust(self, width, fillchar), 0)
+
+        def rjust(self, width: int, fillchar: str = " ") -> "AnsiColorsTool.ColoredString":
+            text = str.rjust(self, width, fillchar)
+            return self._padded(text, len(text) - len(self))
+
+        def center(self, width: int, fillchar: str = " ") -> "AnsiColorsTool.ColoredString":
+            text = str.center(self, width, fillchar)
+            margin = len(text) - len(self)
+            return self._padded(text, margin // 2 + (margin & width & 1))   # same split as str.center
+
+        def lstrip(self, chars: Optional[str] = None) -> "AnsiColorsTool.ColoredString":
+            start = len(self) - len(str.lstrip(self, chars))
+            return self[start:] if start else self
+
+        def rstrip(self, chars: Optional[str] = None) -> "AnsiColorsTool.ColoredString":
+            end = len(str.rstrip(self, chars))
+            return self[:end] if end < len(self) else self
+
+        def strip(self, chars: Optional[str] = None) -> "AnsiColorsTool.ColoredString":
+            return self.lstrip(chars).rstrip(chars)
+
+        def split(self, sep: Optional[str] = None, maxsplit: int = -1) -> list["AnsiColorsTool.ColoredString"]:
+            bounds: list[tuple[int, int]] = []
+            if sep is None:
+                for match in _NON_SPACE.finditer(self):
+                    if len(bounds) == maxsplit:
+                        bounds.append((match.start(), len(self)))   # the rest, leading whitespace dropped
+                        break
+                    bounds.append(match.span())
+            else:
+                if not sep:
+                    raise ValueError("empty separator")
+                pos = 0
+                while len(bounds) != maxsplit:
+                    found = str.find(self, sep, pos)
+                    if found < 0:
+                        break
+                    bounds.append((pos, found))
+                    pos = found + len(sep)
+                bounds.append((pos, len(self)))
+            return [self[start:end] for start, end in bounds]
+
+        def rsplit(self, sep: Optional[str] = None, maxsplit: int = -1) -> list["AnsiColorsTool.ColoredString"]:
+            if maxsplit < 0:
+                return self.split(sep)
+            bounds: list[tuple[int, int]] = []
+            if sep is None:
+                for match in reversed(list(_NON_SPACE.finditer(self))):
+                    if len(bounds) == maxsplit:
+                        bounds.append((0, match.end()))
+                        break
+                    bounds.append(match.span())
+            else:
+                if not sep:
+                    raise ValueError("empty separator")
+                end = len(self)
+                while len(bounds) < maxsplit:
+                    found = str.rfind(self, sep, 0, end)
+                    if found < 0:
+                        break
+                    bounds.append((found + len(sep), end))
+                    end = found
+                bounds.append((0, end))
+            return [self[start:end] for start, end in reversed(bounds)]
+
+        def splitlines(self, keepends: bool = False) -> list["AnsiColorsTool.ColoredString"]:
+            lines, pos = [], 0
+            for line, bare in zip(str.splitlines(self, True), str.splitlines(self)):
+                lines.append(self[pos:pos + len(line if keepends else bare)])
+                pos += len(line)
+            return lines
+
+        def partition(self, sep: str) -> tuple["AnsiColorsTool.ColoredString", ...]:
+            if not sep:
+                raise ValueError("empty separator")
+            found = str.find(self, sep)
+            if found < 0:
+                return self, self._uncolored(""), self._uncolored("")
+            return self[:found], self[found:found + len(sep)], self[found + len(sep):]
+
+        def rpartition(self, sep: str) -> tuple["AnsiColorsTool.ColoredString", ...]:
+            if not sep:
+                raise ValueError("empty separator")
+            found = str.rfind(self, sep)
+            if found < 0:
+                return self._uncolored(""), self._uncolored(""), self
+            return self[:found], self[found:found + len(sep)], self[found + len(sep):]
+
+        def replace(self, old: str, new: str, count: int = -1) -> "AnsiColorsTool.ColoredString":
+            """Like str.replace; `new` may be a ColoredString, and the untouched text keeps its colors."""
+            if old:
+                positions, pos = [], 0
+                while len(positions) != count:
+                    found = str.find(self, old, pos)
+                    if found < 0:
+                        break
+                    positions.append(found)
+                    pos = found + len(old)
+            else:
+                positions = list(range(len(self) + 1))[:count if count >= 0 else None]
+            if not positions:
+                return self
+            out = AnsiColorsTool.ColoredStringBuilder(self._owner)
+            pos = 0
+            for found in positions:
+                out.append(self[pos:found]).append(new)
+                pos = found + len(old)
+            return out.append(self[pos:]).build()
+
+        def expandtabs(self, tabsize: int = 8) -> "AnsiColorsTool.ColoredString":
+            """Like str.expandtabs; the spaces take the color of the tab they replace."""
+            if "\t" not in self:
+                return self
+            out = AnsiColorsTool.ColoredStringBuilder(self._owner)
+            pos = column = 0
+            for match in _TAB_OR_EOL.finditer(self):
+                start = match.start()
+                column += start - pos
+                out.append(self[pos:start])
+                if match.group() == "\t":
+                    spaces = tabsize - column % tabsize if tabsize > 0 else 0
+                    tab = self[start]
+                    out.append(AnsiColorsTool.ColoredString._from_arrays(
+                        self._owner, " " * spaces, array("q", [0] * bool(tab._codes)),
+                        array("q", [spaces] * bool(tab._codes)), tab._codes))
+                    column += spaces
+                else:
+                    out.append(self[start:start + 1])
+                    column = 0
+                pos = start + 1
+            return out.append(self[pos:]).build()
+
+        def wrap(self, width: int = 70, **kwargs) -> list["AnsiColorsTool.ColoredString"]:
+            """Like textwrap.wrap (same keyword options), returning colored lines."""
+            wrapper = textwrap.TextWrapper(width=width, **kwargs)
+            text = self.expandtabs(wrapper.tabsize) if wrapper.expand_tabs else self
+            plain = text._plain()
+            if wrapper.replace_whitespace:
+                plain = plain.translate(wrapper.unicode_whitespace_trans)   # one char for one, so offsets hold
+            # TextWrapper only drops whitespace, adds indents and (with max_lines) a
+            # placeholder, so every line is an indent, a piece of the text, and maybe the placeholder
+            wrapper_args = {**kwargs, "expand_tabs": False, "replace_whitespace": False}
+            lines, pos = [], 0
+            for i, line in enumerate(textwrap.wrap(plain, width, **wrapper_args)):
+                indent = wrapper.initial_indent if i == 0 else wrapper.subsequent_indent
+                body, tail = line[len(indent):], ""
+                found = plain.find(body, pos)
+                if found < 0 and wrapper.max_lines is not None and body.endswith(wrapper.placeholder.lstrip()):
+                    placeholder = wrapper.placeholder if body.endswith(wrapper.placeholder) else wrapper.placeholder.lstrip()
+                    body, tail = body[:len(body) - len(placeholder)], placeholder
+                    found = plain.find(body, pos)
+                piece = text[found:found + len(body)]
+                if plain[found:found + len(body)] != piece._plain():
+                    piece = AnsiColorsTool.ColoredString._from_arrays(
+                        self._owner, body, piece._starts, piece._ends, piece._codes)   # whitespace replaced
+                lines.append(indent + piece + tail if indent or tail else piece)
+                pos = found + len(body)
+            return lines
+
+        def fill(self, width: int = 70, **kwargs) -> "AnsiColorsTool.ColoredString":
+            """Like textwrap.fill: the wrapped lines joined with newlines."""
+            return self._uncolored("\n").join(self.wrap(width, **kwargs))
+
+        def _formatted(self, format_spec: str):
+            # apply a string format spec (fill, align, width, precision), keeping the spans;
+            # other specs give format()'s plain result
+            if not format_spec:
+                return self
+            match = _STR_FORMAT_SPEC.fullmatch(format_spec)
+            if match is None:
+                return str.__format__(self._plain(), format_spec)
+            fill, align, width, precision = match.groups()
+            text = self if precision is None else self[:int(precision)]
+            pad = max(0, int(width or 0) - len(text))
+            fill = fill or " "
+            left = {"<": 0, ">": pad, "^": pad // 2}[align or "<"]
+            return text._padded(fill * left + text._plain() + fill * (pad - left), left)
+
+        def __format__(self, format_spec: str) -> str:
+            return str(self._formatted(format_spec))
+
+        def format(self, *args, **kwargs) -> "AnsiColorsTool.ColoredString":
+            """Like str.format.  The literal text keeps this string's colors, and
+            ColoredString arguments keep theirs (including through width/alignment specs)."""
+            formatter = string.Formatter()
+            out = AnsiColorsTool.ColoredStringBuilder(self._owner)
+            auto = [0, False]   # next automatic field number, whether fields were numbered manually
+
+            def value_of(field_name: str):
+                if field_name == "" or field_name[0] in ".[":
+                    if auto[1]:
+                        raise ValueError("cannot switch from manual field specification to automatic field numbering")
+                    field_name = f"{auto[0]}{field_name}"
+                    auto[0] += 1
+                elif auto[0] and field_name[0].isdigit():
+                    raise ValueError("cannot switch from automatic field numbering to manual field specification")
+                else:
+                    auto[1] = auto[1] or field_name[0].isdigit()
+                return formatter.get_field(field_name, args, kwargs)[0]
+
+            def converted(value, conversion: Optional[str]):
+                if conversion == "s" and isinstance(value, AnsiColorsTool.ColoredString):
+                    return value
+                return formatter.convert_field(value, conversion)
+
+            pos = 0
+            for literal, field_name, format_spec, conversion in formatter.parse(self):
+                # parse() ends a literal at an escaped brace, so it is a prefix of the raw
+                # text, which has that brace doubled
+                out.append(self[pos:pos + len(literal)])
+                pos += len(literal) + literal.count("{") + literal.count("}")
+                if field_name is None:
+                    continue
+                depth = 0   # skip to the closing brace of this field (specs may contain fields)
+                while True:
+                    char = str.__getitem__(self, pos)
+                    pos += 1
+                    depth += {"{": 1, "}": -1}.get(char, 0)
+                    if depth == 0:
+                        break
+                value = converted(value_of(field_name), conversion)
+                if "{" in format_spec:
+                    format_spec = "".join(
+                        text + ("" if name is None else format(converted(value_of(name), conv), spec))
+                        for text, name, spec, conv in formatter.parse(format_spec))
+                if isinstance(value, AnsiColorsTool.ColoredString):
+                    out.append(value._formatted(format_spec))
+                else:
+                    out.append(format(value, format_spec))
+            return out.build()
+
+        def join(self, iterable) -> "AnsiColorsTool.ColoredString":
+            """Like str.join, keeping the spans of this separator and of the parts."""
+            return AnsiColorsTool.ColoredStringBuilder(self._owner).join(iterable, self).build()
+
+        def _span_range(self, start: int, stop: int) -> range:
+            # indexes of the spans that may overlap [start, stop)
+            if not self._disjoint:
+                return range(len(self._codes))
+            return range(bisect_right(self._ends, start), bisect_left(self._starts, stop))
 
         def __getitem__(self, key):
-            plain = self._plain()
+            # index through str directly: _plain() would copy the whole text
+            length = len(self)
             if isinstance(key, slice):
-                sliced_text = plain[key]
+                sliced_text = str.__getitem__(self, key)
                 start = key.start or 0
-                stop = key.stop if key.stop is not None else len(plain)
+                stop = key.stop if key.stop is not None else length
                 if start < 0:
-                    start += len(plain)
+                    start += length
                 if stop < 0:
-                    stop += len(plain)
+                    stop += length
                 start = max(0, start)
-                stop = max(start, min(len(plain), stop))
+                stop = max(start, min(length, stop))
                 # Clip spans to slice range and rebase to 0
-                new_spans: list[tuple[int, int, str]] = []
-                for (s, e, c) in self._spans:
-                    cs = max(s, start)
-                    ce = min(e, stop)
+                starts, ends, codes = array("q"), array("q"), []
+                for i in self._span_range(start, stop):
+                    cs = max(self._starts[i], start)
+                    ce = min(self._ends[i], stop)
                     if cs < ce:
-                        new_spans.append((cs - start, ce - start, c))
-                return AnsiColorsTool.ColoredString(self._owner, sliced_text, new_spans)
+                        starts.append(cs - start)
+                        ends.append(ce - start)
+                        codes.append(self._codes[i])
+                return AnsiColorsTool.ColoredString._from_arrays(self._owner, sliced_text, starts, ends, tuple(codes))
             else:
                 # Single char
                 idx = key
                 if idx < 0:
-                    idx += len(plain)
-                ch = plain[idx]
+                    idx += length
+                ch = str.__getitem__(self, idx)
                 # Determine if index lies in any span
                 color_code: Optional[str] = None
-                for (s, e, c) in self._spans:
-                    if s <= idx < e:
-                        color_code = c
+                for i in self._span_range(idx, idx + 1):
+                    if self._starts[i] <= idx < self._ends[i]:
+                        color_code = self._codes[i]
                         break
-                return AnsiColorsTool.ColoredString(self._owner, ch, [(0, 1, color_code)] if color_code is not None else [])
+                if color_code is None:
+                    return AnsiColorsTool.ColoredString._from_arrays(self._owner, ch, array("q"), array("q"), ())
+                return AnsiColorsTool.ColoredString._from_arrays(self._owner, ch, array("q", [0]), array("q", [1]), (color_code,))
+
+    class ColoredStringBuilder:
+        """Accumulates plain and colored text and produces one ColoredString.
+
+        `s = s + part` copies all text and spans so far on every step; appending
+        to a builder and calling `build()` once is linear in the total size.
+
+        Usage:
+
+            out = AnsiColorsTool.ColoredStringBuilder(ansi)
+            for name, ok in results:
+                out.append(f"{name}: ")
+                out.append("ok" if ok else "FAIL", "green" if ok else "red")
+                out.append("\n")
+            report = out.build()
+        """
+        def __init__(self, owner: "AnsiColorsTool"):
+            self._owner = owner
+            self._chunks: list[str] = []
+            self._length = 0
+            self._starts, self._ends = array("q"), array("q")
+            self._codes: list[str] = []
+
+        def __len__(self) -> int:
+            return self._length
+
+        def append(self, part: str, color: Optional[str] = None) -> "AnsiColorsTool.ColoredStringBuilder":
+            """Add `part`, keeping its spans if it is a ColoredString, or colored
+            entirely with `color` (any AnsiColorsTool color name) if given."""
+            if not isinstance(part, str):
+                raise TypeError(f"expected str instance, {type(part).__name__} found")
+            offset = self._length
+            if color is not None:
+                self._chunks.append(str.__str__(part))
+                code = self._owner._resolve_color_key(color)
+                if code is not None and part:
+                    self._starts.append(offset)
+                    self._ends.append(offset + len(part))
+                    self._codes.append(code)
+            elif isinstance(part, AnsiColorsTool.ColoredString):
+                self._chunks.append(part._plain())
+                self._starts.extend([s + offset for s in part._starts])
+                self._ends.extend([e + offset for e in part._ends])
+                self._codes.extend(part._codes)
+            else:
+                self._chunks.append(part)
+            self._length += len(part)
+            return self
+
+        def extend(self, parts) -> "AnsiColorsTool.ColoredStringBuilder":
+            """Append every string in `parts`."""
+            for part in parts:
+                self.append(part)
+            return self
+
+        def join(self, parts, sep: str = "") -> "AnsiColorsTool.ColoredStringBuilder":
+            """Append the strings in `parts` with `sep` (plain or colored) between them."""
+            for i, part in enumerate(parts):
+                if i:
+                    self.append(sep)
+                self.append(part)
+            return self
+
+        def build(self) -> "AnsiColorsTool.ColoredString":
+            """The accumulated text as a ColoredString (the builder can keep growing)."""
+            # spans are appended in text order, so the starts are already sorted
+            return AnsiColorsTool.ColoredString._from_arrays(
+                self._owner, "".join(self._chunks), array("q", self._starts), array("q", self._ends), tuple(self._codes))
 
     def colorize_string(self, string: str, color: str) -> "AnsiColorsTool.ColoredString":
         code = self._resolve_color_key(color)
-        length = len(string)
-        spans = [] if code is None else [(0, length, code)]
-        return AnsiColorsTool.ColoredString(self, string, spans)
+        if code is None:
+            return AnsiColorsTool.ColoredString._from_arrays(self, string, array("q"), array("q"), ())
+        return AnsiColorsTool.ColoredString._from_arrays(self, string, array("q", [0]), array("q", [len(string)]), (code,))
 
     def wrap(self) -> "AnsiColorsTool._ColorProxy":
         # Backward compatibility: still allow ansi.wrap.br_green("text")
@@ -0,0 +1,223 @@
+import re
+import sys
+from dataclasses import dataclass
+from typing import IO, Iterable, Optional
+
+# can be imported as part of the utils package or just as directory imports, so we handle both cases
+try:
+    from utils.colors.ansi import AnsiColorsTool
+except ModuleNotFoundError:
+    from .ansi import AnsiColorsTool
+
+@dataclass(frozen=True)
+class HighlightRule:
+    """
+    One thing to color in a log: matches of `pattern` (a regex, searched in
+    multi-line mode) are shown in `color` (any AnsiColorsTool color name).
+    With `whole_line`, the entire line containing a match is colored instead,
+    overriding any other rule that matched earlier on that line.
+    """
+    pattern: str
+    color: str
+    whole_line: bool = False
+    ignore_case: bool = False
+
+# simulator (UVM, Xcelium) and lint (Verilator) messages
+DEFAULT_RULES: tuple[HighlightRule, ...] = (
+    HighlightRule(r"\bUVM_(?:ERROR|FATAL)\b", "bright_red", whole_line=True),
+    HighlightRule(r"%(?:Error|Fatal)\b", "bright_red", whole_line=True),
+    HighlightRule(r"\*[EF],\w+", "bright_red", whole_line=True),
+    HighlightRule(r"\bassert(?:ion)?\b[^\n]*?\bfail", "red", whole_line=True, ignore_case=True),
+    HighlightRule(r"\bUVM_WARNING\b", "yellow", whole_line=True),
+    HighlightRule(r"%Warning\b", "yellow", whole_line=True),
+    HighlightRule(r"\*W,\w+", "yellow", whole_line=True),
+    HighlightRule(r"\bUVM_INFO\b", "cyan"),
+    HighlightRule(r"\bPASS(?:ED)?\b", "green"),
+)
+
+# a leading literal character (optionally after \b) that isn't quantified
+_LEADING_LITERAL = re.compile(r"(\\b(?=\w))?(\w|[%@#:!<>=~/,;'\"& -]|\\[^\w])(?![*+?{])")
+
+def _has_top_level_branch(pattern: str) -> bool:
+    depth, i, in_class = 0, 0, False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 1
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            i += 2 if pattern[i + 1:i + 3] == "^]" else 1 if pattern[i + 1:i + 2] == "]" else 0
+        elif char in "()":
+            depth += 1 if char == "(" else -1
+        elif char == "|" and depth == 0:
+            return True
+        i += 1
+    return False
+
+def _split_leading_literal(rule: HighlightRule) -> Optional[tuple[list[str], str]]:
+    """
+    Split a rule's pattern into the literal character(s) it must start with
+    (both cases for ignore_case rules) and the rest, or None if it doesn't
+    start with a literal.  A leading \b becomes a lookbehind after the first
+    character, so the rule still starts with a literal.
+    """
+    match = _LEADING_LITERAL.match(rule.pattern)
+    if match is None or _has_top_level_branch(rule.pattern):
+        return None
+    boundary, first = match.groups()
+    rest = ("(?<!\\w.)" if boundary else "") + rule.pattern[match.end():]
+    if not rule.ignore_case:
+        return [first], rest
+    literal = first[-1]
+    return [re.escape(char) for char in dict.fromkeys((literal.lower(), literal.upper()))], f"(?i:{rest})"
+
+def _alternation(rules: list[tuple[int, HighlightRule]]) -> tuple[str, dict[str, int]]:
+    """
+    One regex for all `(index, rule)`, with a named group per rule.  Returns
+    the pattern and group name -> rule index.
+
+    When every rule starts with a literal character, the rules are grouped by
+    that character (`U(?:(?P<_r0>VM_ERROR)|(?P<_r1>VM_INFO))|%(?:...)`): the
+    regex engine can then skip ahead to the next possible first character
+    instead of trying every rule at every position, which is several times
+    faster.  Earlier rules win when several match at the same place.
+    """
+    groups: dict[str, int] = {}
+    split = [(i, rule, _split_leading_literal(rule)) for i, rule in rules]
+    if not all(parts for _, _, parts in split):
+        for i, rule, _ in split:
+            groups[f"_r{i}"] = i
+        return "|".join(f"(?P<_r{i}>(?i:{rule.pattern}))" if rule.ignore_case else f"(?P<_r{i}>{rule.pattern})"
+                        for i, rule in rules), groups
+    by_first: dict[str, list[str]] = {}
+    for i, rule, (firsts, rest) in split:
+        for k, first in enumerate(firsts):
+            name = f"_r{i}_{k}"
+            groups[name] = i
+            by_first.setdefault(first, []).append(f"(?P<{name}>{rest})")
+    return "|".join(f"{first}(?:{'|'.join(alternatives)})" for first, alternatives in by_first.items()), groups
+
+class LogHighlighter:
+    """
+    Colors log text by a list of HighlightRules in a single regex pass.
+
+    All rules are compiled into one alternation with a named group per rule,
+    and text is processed in large blocks (cut at line boundaries) rather than
+    line by line.  Works on str and bytes alike.  When `ansi` has colors
+    disabled (by default: stdout isn't a terminal) everything is passed
+    through untouched without running the regex.
+
+    Usage:
+
+        with open("sim.log", "rb") as log:
+            LogHighlighter().highlight_stream(log, sys.stdout.buffer)
+    """
+
+    def __init__(self, rules: Optional[Iterable[HighlightRule]] = None, ansi: Optional[AnsiColorsTool] = None,
+                 block_size: int = 1024 * 1024):
+        self.rules = tuple(DEFAULT_RULES if rules is None else rules)
+        self.ansi = ansi or AnsiColorsTool.shared()
+        self.block_size = block_size
+        self._reset = self.ansi.colors["reset"]
+        # rules whose color doesn't resolve (or with colors off) are left out
+        codes = {i: str(self.ansi[rule.color]) for i, rule in enumerate(self.rules)}
+        self._pattern, groups = _alternation([(i, rule) for i, rule in enumerate(self.rules) if codes[i]])
+        # group name -> (color code, whole line)
+        self._actions: dict[str, tuple[str, bool]] = {
+            name: (codes[i], self.rules[i].whole_line) for name, i in groups.items()}
+        self._compiled: dict[type, tuple[re.Pattern, dict]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """False when there is nothing to color (colors disabled or no usable rules)."""
+        return bool(self._actions) and bool(self._reset)
+
+    def _regex(self, kind: type) -> tuple[re.Pattern, dict]:
+        # compiled lazily per text type, with the color codes in the same type
+        compiled = self._compiled.get(kind)
+        if compiled is None:
+            if kind is bytes:
+                regex = re.compile(self._pattern.encode(), re.MULTILINE)
+                actions = {name: (code.encode(), whole) for name, (code, whole) in self._actions.items()}
+            else:
+                regex = re.compile(self._pattern, re.MULTILINE)
+                actions = self._actions
+            compiled = self._compiled[kind] = (regex, actions)
+        return compiled
+
+    def highlight(self, text):
+        """
+        Color `text` (str or bytes, any number of lines).
+
+        Returns:
+            The colored text, of the same type; `text` itself when nothing matched or colors are off.
+        """
+        if not self.enabled or not text:
+            return text
+        kind = bytes if isinstance(text, (bytes, bytearray)) else str
+        regex, actions = self._regex(kind)
+        newline, reset = ("\n", self._reset) if kind is str else (b"\n", self._reset.encode())
+
+        spans: list[tuple[int, int, str]] = []
+        search = regex.search
+        pos = 0
+        match = search(text, pos)
+        while match is not None:
+            code, whole_line = actions[match.lastgroup]
+            start, end = match.span()   # the whole match: a rule's group may omit its first character
+            if whole_line:
+                start = text.rfind(newline, 0, start) + 1
+                end = text.find(newline, end)
+                if end < 0:
+                    end = len(text)
+                while spans and spans[-1][0] >= start:
+                    spans.pop()   # earlier matches on this line are overridden
+            if end > start:
+                spans.append((start, end, code))
+                pos = end
+            else:
+                pos = end + 1     # empty match: step over it
+            match = search(text, pos)
+
+        if not spans:
+            return text
+        parts = []
+        pos = 0
+        for start, end, code in spans:
+            parts += (text[pos:start], code, text[start:end], reset)
+            pos = end
+        parts.append(text[pos:])
+        return (b"" if kind is bytes else "").join(parts)
+
+    def highlight_stream(self, src: IO, dst: IO):
+        """
+        Copy `src` to `dst` (both text or both binary), coloring as it goes.
+        Reads `block_size` at a time and colors whole lines only, so matches
+        never straddle blocks.
+        """
+        read, write = src.read, dst.write
+        empty = read(0)    # "" or b"", the end-of-file sentinel
+        if not self.enabled:
+            for block in iter(lambda: read(self.block_size), empty):
+                write(block)
+            return
+        newline = b"\n" if isinstance(empty, bytes) else "\n"
+        carry = empty
+        for block in iter(lambda: read(self.block_size), empty):
+            cut = block.rfind(newline) + 1
+            if not cut:
+                carry += block    # no line end yet (a very long line)
+                continue
+            write(self.highlight(carry + block[:cut]))
+            carry = block[cut:]
+        if carry:
+            write(self.highlight(carry))
+
+    def highlight_file(self, path: str, out: Optional[IO[str]] = None):
+        """Print the log at `path` to `out` (default: stdout), colored."""
+        out = out if out is not None else sys.stdout
+        with open(path, errors="replace") as src:
+            self.highlight_stream(src, out)
+        out.flush()
@@ -3,11 +3,52 @@
 # can be imported as part of the utils package or just as directory imports, so we handle both cases
 try:
     from utils.file_utils.fs_utils import find_path_by_leaf
-    from utils.file_utils.repo_utils import get_git_repo_root
+    from utils.file_utils.repo_utils import (
+        get_git_repo_root,
+        AtomicWriter,
+        write_if_changed,
+        write_files_if_changed,
+        find_git_dir,
+        find_git_work_tree,
+        read_git_index,
+        iter_tracked_files,
+        GitIndexEntry
+    )
     from utils.file_utils.hex_file_utils import read_hex_file, read_hex_file_as_ints
+    from utils.file_utils.fingerprint import hash_file, fingerprint_files, FingerprintMemo
+    from utils.file_utils.artifact_cache import ArtifactCache
 except ModuleNotFoundError:
     from .fs_utils import find_path_by_leaf
-    from .repo_utils import get_git_repo_root
+    from .repo_utils import (
+        get_git_repo_root,
+        AtomicWriter,
+        write_if_changed,
+        write_files_if_changed,
+        find_git_dir,
+        find_git_work_tree,
+        read_git_index,
+        iter_tracked_files,
+        GitIndexEntry
+    )
     from .hex_file_utils import read_hex_file, read_hex_file_as_ints
+    from .fingerprint import hash_file, fingerprint_files, FingerprintMemo
+    from .artifact_cache import ArtifactCache
 
-__all__ = ["find_path_by_leaf", "get_git_repo_root", "read_hex_file", "read_hex_file_as_ints"]
\ No newline at end of file
+__all__ = [
+    "find_path_by_leaf",
+    "get_git_repo_root",
+    "AtomicWriter",
+    "write_if_changed",
+    "write_files_if_changed",
+    "find_git_dir",
+    "find_git_work_tree",
+    "read_git_index",
+    "iter_tracked_files",
+    "GitIndexEntry",
+    "read_hex_file",
+    "read_hex_file_as_ints",
+    "hash_file",
+    "fingerprint_files",
+    "FingerprintMemo",
+    "ArtifactCache"
+]
@@ -0,0 +1,277 @@
+import os
+import json
+import errno
+import stat
+import shutil
+import hashlib
+import tempfile
+import contextlib
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional
+
+try:
+    import fcntl
+except ImportError:  # not on Windows
+    fcntl = None  # type: ignore
+
+# can be imported as part of the utils package or just as directory imports, so we handle both cases
+try:
+    from utils.file_utils.fingerprint import fingerprint_files, hash_file
+except ModuleNotFoundError:
+    from .fingerprint import fingerprint_files, hash_file
+
+_MANIFEST = "manifest.json"
+_FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+
+def _clone_file(src: str, dst: str) -> bool:
+    # copy-on-write clone (btrfs, xfs, ...); False if the filesystem can't do it
+    if fcntl is None or not hasattr(fcntl, "ioctl"):
+        return False
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            pass
+        else:
+            return True
+    os.unlink(dst)
+    return False
+
+class ArtifactCache:
+    """
+    Content-addressed local cache for generated outputs (register maps, memory
+    images, filelists, ...).
+
+    Entries are keyed by a hash of the generator's input files, its version and
+    its parameters, plus the list of outputs (see make_key).  On a hit the
+    outputs are restored and the generator is skipped entirely.  Outputs that
+    already have the cached content are left alone; the rest are restored by
+    reflink or copy with a fresh mtime, so Make sees them as newer than their
+    inputs.
+
+    With `hardlink=True` outputs are hardlinked to the (read-only) cache files
+    instead.  That saves space and time, but restored files keep the mtime from
+    when the entry was stored, and they must be replaced (e.g. with
+    write_if_changed) rather than rewritten in place.  run() unlinks hardlinked
+    outputs before calling the generator on a miss.
+
+    The cache directory can live on a shared/mounted volume: entries are published
+    with an atomic rename, and a lock file serializes publishing and eviction
+    against concurrent restores.  Total size is capped with LRU eviction.
+
+    Usage:
+
+        cache = ArtifactCache("~/.cache/curv/artifacts")
+        hit = cache.run(
+            generator=lambda: gen_regs(cfg, out_dir),
+            inputs=["cfg/regs.toml"],
+            outputs=["generated/regs_pkg.sv", "generated/regs.h"],
+            generator_version="regs-gen 1.4",
+            params={"xlen": 32},
+        )
+    """
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int = 10 * 1024**3, hardlink: bool = False):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.max_bytes = max_bytes
+        self.hardlink = hardlink
+        self._entries_dir = self.cache_dir / "entries"
+        self._tmp_dir = self.cache_dir / "tmp"
+        self._entries_dir.mkdir(parents=True, exist_ok=True)
+        self._tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._lock_path = self.cache_dir / ".lock"
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def make_key(self, inputs: Iterable[str | Path], generator_version: str,
+                 params: Optional[Mapping[str, Any]] = None, base_dir: str | Path = ".",
+                 outputs: Optional[Iterable[str | Path]] = None) -> str:
+        """
+        Compute the cache key for one generator run.
+
+        Args:
+            inputs: the files the generator reads.  Their paths (relative to base_dir)
+                and contents are part of the key; order doesn't matter.
+            generator_version: anything that changes when the generator's output would.
+            params: generator parameters; must be JSON serializable (or str()-able).
+            base_dir: directory the input and output paths are made relative to.
+            outputs: the files the generator writes; their paths are part of the key.
+
+        Returns:
+            A hex digest.
+        """
+        h = hashlib.sha256()
+        h.update(generator_version.encode())
+        h.update(b"\0")
+        h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        for rel in self._rel_paths(outputs or (), base_dir):
+            h.update(b"\0>" + rel.encode())
+        rel_inputs = sorted(os.path.relpath(os.path.join(base_dir, p), base_dir) for p in inputs)
+        digests = fingerprint_files([os.path.join(base_dir, rel) for rel in rel_inputs])
+        for rel in rel_inputs:
+            h.update(b"\0" + rel.encode() + b"\0" + digests[os.path.join(base_dir, rel)].encode())
+        return h.hexdigest()
+
+    @staticmethod
+    def _rel_paths(paths: Iterable[str | Path], base_dir: str | Path) -> list[str]:
+        return sorted(os.path.relpath(os.path.join(base_dir, p), base_dir) for p in paths)
+
+    def _entry_dir(self, key: str) -> Path:
+        return self._entries_dir / key
+
+    def restore(self, key: str, base_dir: str | Path = ".", outputs: Optional[Iterable[str | Path]] = None) -> bool:
+        """
+        Restore the outputs cached under `key` into base_dir.
+
+        Args:
+            outputs: if given, an entry that doesn't hold exactly these files is a miss.
+
+        Returns:
+            True on a cache hit, False if there is no (matching) entry.
+        """
+        entry = self._entry_dir(key)
+        with self._locked(exclusive=False):
+            try:
+                with open(entry / _MANIFEST) as f:
+                    manifest = json.load(f)
+            except FileNotFoundError:
+                return False
+            if outputs is not None and sorted(manifest["files"]) != self._rel_paths(outputs, base_dir):
+                return False
+            for rel in manifest["files"]:
+                dst = os.path.join(base_dir, rel)
+                os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+                self._place(str(entry / "files" / rel), dst)
+            with contextlib.suppress(OSError):
+                os.utime(entry / _MANIFEST)  # LRU timestamp
+        return True
+
+    def _place(self, src: str, dst: str):
+        try:
+            st = os.stat(dst)
+        except FileNotFoundError:
+            st = None
+        if st is not None:
+            if st.st_size == os.stat(src).st_size and hash_file(dst) == hash_file(src):
+                return  # already up to date; keep its mtime
+            os.unlink(dst)
+        if self.hardlink:
+            try:
+                os.link(src, dst)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                    raise
+        if not _clone_file(src, dst):
+            shutil.copyfile(src, dst)
+        # private copies don't need to stay read-only, and must look newer than the inputs
+        os.chmod(dst, stat.S_IMODE(os.stat(src).st_mode) | stat.S_IWUSR)
+        os.utime(dst)
+
+    def store(self, key: str, outputs: Iterable[str | Path], base_dir: str | Path = ".") -> None:
+        """
+        Copy `outputs` (paths relative to base_dir) into the cache under `key`, then
+        evict least recently used entries if the cache grew past max_bytes.
+        """
+        rel_outputs = [os.path.relpath(os.path.join(base_dir, p), base_dir) for p in outputs]
+        staging = Path(tempfile.mkdtemp(dir=self._tmp_dir, prefix=f"{key}."))
+        try:
+            total = 0
+            for rel in rel_outputs:
+                dst = staging / "files" / rel
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(os.path.join(base_dir, rel), dst)
+                os.chmod(dst, 0o444)
+                total += dst.stat().st_size
+            with open(staging / _MANIFEST, "w") as f:
+                json.dump({"files": rel_outputs, "size": total}, f)
+
+            with self._locked(exclusive=True):
+                try:
+                    os.rename(staging, self._entry_dir(key))
+                except OSError as e:
+                    # someone else published the same key first; theirs is just as good
+                    if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                        raise
+                self._evict_locked()
+        finally:
+            if staging.exists():
+                self._remove_tree(staging)
+
+    def run(self, generator: Callable[[], Any], inputs: Iterable[str | Path], outputs: Iterable[str | Path],
+            generator_version: str, params: Optional[Mapping[str, Any]] = None, base_dir: str | Path = ".") -> bool:
+        """
+        Restore `outputs` from the cache, or call `generator()` to produce them and
+        cache the result.
+
+        Returns:
+            True on a cache hit (the generator was not called), False otherwise.
+        """
+        outputs = list(outputs)
+        key = self.make_key(inputs, generator_version, params, base_dir, outputs)
+        if self.restore(key, base_dir, outputs):
+            return True
+        if self.hardlink:
+            # don't let the generator write through a link into a cache entry
+            for p in outputs:
+                path = os.path.join(base_dir, p)
+                with contextlib.suppress(FileNotFoundError):
+                    if os.stat(path).st_nlink > 1:
+                        os.unlink(path)
+        generator()
+        self.store(key, outputs, base_dir)
+        return False
+
+    def evict(self) -> int:
+        """
+        Evict least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            The number of bytes freed.
+        """
+        with self._locked(exclusive=True):
+            return self._evict_locked()
+
+    def _evict_locked(self) -> int:
+        entries: list[tuple[float, int, Path]] = []
+        total = 0
+        for entry in self._entries_dir.iterdir():
+            if entry.name.endswith(".deleting"):
+                # left over from an eviction that was interrupted
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            try:
+                st = (entry / _MANIFEST).stat()
+                with open(entry / _MANIFEST) as f:
+                    size = json.load(f)["size"]
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((st.st_mtime, size, entry))
+            total += size
+
+        freed = 0
+        for _mtime, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total - freed <= self.max_bytes:
+                break
+            self._remove_tree(entry)
+            freed += size
+        return freed
+
+    @staticmethod
+    def _remove_tree(path: Path):
+        # rename out of the way first so readers never see a half-deleted entry
+        doomed = path.with_name(path.name + ".deleting")
+        with contextlib.suppress(OSError):
+            os.rename(path, doomed)
+            path = doomed
+        shutil.rmtree(path, ignore_errors=True)
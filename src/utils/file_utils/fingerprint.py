@@ -0,0 +1,168 @@
+import os
+import json
+import mmap
+import time
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+# can be imported as part of the utils package or just as directory imports, so we handle both cases
+try:
+    from utils.file_utils.repo_utils import write_if_changed
+except ModuleNotFoundError:
+    from .repo_utils import write_if_changed
+try:
+    from utils.system import get_nprocs
+except ModuleNotFoundError:
+    try:
+        from ..system import get_nprocs   # vendored as <pkg>._vendor.utils
+    except ImportError:
+        # file_utils imported on its own, without the sibling system package
+        def get_nprocs() -> int:
+            return os.cpu_count() or 1
+
+_MMAP_THRESHOLD = 1024 * 1024   # files at least this big are hashed straight from an mmap
+_READ_BUFFER = 256 * 1024
+
+# files modified this recently may still change within the filesystem's mtime
+# granularity without their stat key changing (git's "racy" problem); don't memoize them
+_RACY_WINDOW_NS = 2_000_000_000
+
+_buffers = threading.local()
+
+def hash_file(path: str | Path, algorithm: str = "sha256") -> str:
+    """
+    Hash one file.  Big files are hashed from an mmap in a single update, small
+    ones through a reused per-thread read buffer; hashlib releases the GIL for
+    both, so this scales across threads.
+
+    Returns:
+        The hex digest.
+    """
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        else:
+            buf = getattr(_buffers, "buf", None)
+            if buf is None:
+                buf = _buffers.buf = bytearray(_READ_BUFFER)
+            view = memoryview(buf)
+            while n := f.readinto(buf):
+                h.update(view[:n])
+    return h.hexdigest()
+
+def _stat_key(st: os.stat_result) -> str:
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+class FingerprintMemo:
+    """
+    Persistent `(dev, inode, size, mtime_ns) -> digest` table, so files that
+    haven't changed since the last run are never read again.
+
+    The table is kept in a JSON file (written atomically, and only if it changed)
+    and is only valid on the machine that wrote it, since it is keyed by device
+    and inode numbers.  Don't put it on a shared volume.
+
+    Only the entries looked up or added since the memo was loaded are saved, so
+    keys of edited or deleted files drop out instead of piling up.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None, algorithm: str = "sha256"):
+        self.path = None if path is None else str(path)
+        self.algorithm = algorithm
+        self.entries: dict[str, str] = {}
+        self._used: set[str] = set()
+        self._dirty = False
+        if self.path is not None:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("algorithm") == self.algorithm:
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        if self.path is None:
+            return
+        if len(self._used) != len(self.entries):
+            self.entries = {k: v for k, v in self.entries.items() if k in self._used}
+            self._dirty = True
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        write_if_changed(self.path, json.dumps({"algorithm": self.algorithm, "entries": self.entries}))
+        self._dirty = False
+
+    def get(self, st: os.stat_result) -> Optional[str]:
+        key = _stat_key(st)
+        digest = self.entries.get(key)
+        if digest is not None:
+            self._used.add(key)
+        return digest
+
+    def put(self, st: os.stat_result, digest: str):
+        if time.time_ns() - st.st_mtime_ns < _RACY_WINDOW_NS:
+            return
+        key = _stat_key(st)
+        self.entries[key] = digest
+        self._used.add(key)
+        self._dirty = True
+
+    def __enter__(self) -> "FingerprintMemo":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.save()
+
+def fingerprint_files(paths: Iterable[str | Path], algorithm: str = "sha256",
+                      memo: Optional[FingerprintMemo] = None, max_workers: Optional[int] = None) -> dict[str, str]:
+    """
+    Hash many files at once on a thread pool.
+
+    Args:
+        paths: the files to hash.
+        algorithm: any hashlib algorithm name.
+        memo: optional FingerprintMemo; files whose stat key is in it are not read,
+            and new digests are added to it (call memo.save() to persist them).
+        max_workers: thread count (default: system.get_nprocs()).
+
+    Returns:
+        A dict of path (as given, str()'d) -> hex digest.
+    """
+    if memo is not None and memo.algorithm != algorithm:
+        raise ValueError(f"memo is for {memo.algorithm}, not {algorithm}")
+
+    digests: dict[str, str] = {}
+    todo: list[tuple[str, os.stat_result]] = []
+    for p in paths:
+        path = str(p)
+        st = os.stat(path)
+        cached = memo.get(st) if memo is not None else None
+        if cached is not None:
+            digests[path] = cached
+        else:
+            todo.append((path, st))
+
+    if len(todo) == 1:
+        results = [hash_file(todo[0][0], algorithm)]
+    elif todo:
+        workers = min(max_workers or get_nprocs(), len(todo))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda item: hash_file(item[0], algorithm), todo))
+    else:
+        results = []
+
+    for (path, st), digest in zip(todo, results):
+        digests[path] = digest
+        if memo is not None:
+            memo.put(st, digest)
+    return digests
@@ -1,6 +1,12 @@
 import os
 
-def find_path_by_leaf(root_dir: str, leaf_path: str) -> str|None:
+# can be imported as part of the utils package or just as directory imports, so we handle both cases
+try:
+    from utils.file_utils.repo_utils import find_git_work_tree, iter_tracked_files
+except ModuleNotFoundError:
+    from .repo_utils import find_git_work_tree, iter_tracked_files
+
+def find_path_by_leaf(root_dir: str, leaf_path: str, tracked_only: bool = False) -> str|None:
     """
     Recursively traverses through the directory tree from a given
     root directory until it finds a given partial terminal path
@@ -9,6 +15,9 @@ def find_path_by_leaf(root_dir: str, leaf_path: str) -> str|None:
     Args:
         root_dir: the root directory to start the traversal from.
         leaf_path: the partial path to the leaf to find, e.g., `generated/current/.curv.env`.
+        tracked_only: inside a git work tree, only consider files tracked by git.  The
+            candidates come straight from the git index instead of walking the tree,
+            which is much faster on large checkouts.  Falls back to the walk outside git.
     
     Returns:
     The returned path is the full path to the leaf. None if the path is not found.
@@ -24,6 +33,11 @@ def find_path_by_leaf(root_dir: str, leaf_path: str) -> str|None:
     # Normalize the partial leaf path (strip any leading separators).
     rel_leaf = leaf_path.lstrip(os.sep)
 
+    if tracked_only:
+        work_tree = find_git_work_tree(root_dir)
+        if work_tree is not None:
+            return _find_tracked_path_by_leaf(root_dir, rel_leaf, work_tree)
+
     # Quick check: does the path exist directly under the given root?
     direct_candidate = os.path.join(root_dir, rel_leaf)
     if os.path.exists(direct_candidate):
@@ -36,3 +50,17 @@ def find_path_by_leaf(root_dir: str, leaf_path: str) -> str|None:
             return os.path.abspath(candidate)
 
     return None
+
+def _find_tracked_path_by_leaf(root_dir: str, rel_leaf: str, work_tree: str) -> str|None:
+    # Index paths are relative to the top of the work tree and always use '/'
+    root_rel = os.path.relpath(os.path.abspath(root_dir), work_tree).replace(os.sep, "/")
+    prefix = "" if root_rel == "." else root_rel + "/"
+    leaf = rel_leaf.replace(os.sep, "/")
+    best: str|None = None
+    for path in iter_tracked_files(work_tree):
+        if not path.startswith(prefix) or not (path == prefix + leaf or path.endswith("/" + leaf)):
+            continue
+        # prefer the shallowest match, like the top-down walk does
+        if best is None or path.count("/") < best.count("/"):
+            best = path
+    return None if best is None else os.path.abspath(os.path.join(work_tree, best))
@@ -1,6 +1,11 @@
 import os
+import mmap
+import struct
+import hashlib
+import secrets
 import subprocess
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Mapping, NamedTuple, Optional
 from pathlib import Path
 
 def get_git_repo_root(cwd: Optional[str] = os.getcwd()) -> Optional[str]:
@@ -47,6 +52,134 @@ def is_path_writeable(path: str | Path) -> bool:
         return False
     return True
 
+_WRITE_CHUNK = 1024 * 1024
+
+def _file_digest(path: str | Path) -> bytes:
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while chunk := f.read(_WRITE_CHUNK):
+            h.update(chunk)
+    return h.digest()
+
+class AtomicWriter:
+    """
+    Context manager that writes a file atomically, and only if its content changed.
+
+    Data is streamed to a temp file in the destination directory while being
+    hashed.  On exit the result is compared with the existing file, first by size
+    and then by hash, and the temp file is renamed over it only if they differ.
+    An unchanged file keeps its mtime, so Make/Verilator don't rebuild from it.
+
+    Usage:
+
+        with AtomicWriter("generated/regs_pkg.sv") as w:
+            w.write(header)
+            w.write(body)
+        if w.changed: ...
+    """
+
+    def __init__(self, path: str | Path, encoding: str = "utf-8"):
+        self.path = str(path)
+        self.encoding = encoding
+        self.changed: Optional[bool] = None   # set on exit
+        self._hash = hashlib.blake2b()
+        self._size = 0
+        self._tmp = None
+        self._tmp_path: Optional[str] = None
+
+    def __enter__(self) -> "AtomicWriter":
+        directory = os.path.dirname(self.path) or "."
+        while True:
+            tmp_path = os.path.join(directory, f".{os.path.basename(self.path)}.{secrets.token_hex(4)}.tmp")
+            try:
+                # mode 0666 lets the kernel apply the process umask, like a plain open() would
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            except FileExistsError:
+                continue
+            break
+        self._tmp_path = tmp_path
+        self._tmp = os.fdopen(fd, "wb")
+        return self
+
+    def write(self, data: str | bytes) -> int:
+        if isinstance(data, str):
+            data = data.encode(self.encoding)
+        self._hash.update(data)
+        self._size += len(data)
+        return self._tmp.write(data)
+
+    def writelines(self, lines: Iterable[str | bytes]):
+        for line in lines:
+            self.write(line)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        tmp_path = self._tmp_path
+        try:
+            if exc_type is not None:
+                return
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                st = None
+            if st is not None and st.st_size == self._size and _file_digest(self.path) == self._hash.digest():
+                self.changed = False
+                return
+            if st is not None:
+                os.chmod(tmp_path, st.st_mode & 0o7777)
+            # make the data durable before the rename publishes it
+            self._tmp.flush()
+            os.fsync(self._tmp.fileno())
+            self._tmp.close()
+            os.replace(tmp_path, self.path)
+            tmp_path = None
+            self.changed = True
+        finally:
+            self._tmp.close()
+            if tmp_path is not None:
+                os.unlink(tmp_path)
+
+def write_if_changed(path: str | Path, content: str | bytes | Iterable[str | bytes], encoding: str = "utf-8") -> bool:
+    """
+    Atomically write `content` to `path`, leaving the existing file (and its mtime)
+    untouched if the content is the same.  See AtomicWriter.
+
+    Args:
+        path: the file to write.  Its directory must already exist.
+        content: a str/bytes, or an iterable of str/bytes chunks that is streamed out.
+        encoding: encoding used for str content.
+
+    Returns:
+        True if the file was (re)written, False if it was already up to date.
+    """
+    with AtomicWriter(path, encoding=encoding) as w:
+        if isinstance(content, (str, bytes)):
+            w.write(content)
+        else:
+            w.writelines(content)
+    return bool(w.changed)
+
+def write_files_if_changed(files: Mapping[str | Path, str | bytes | Iterable[str | bytes]],
+                           encoding: str = "utf-8", max_workers: Optional[int] = None) -> list[str]:
+    """
+    Batch version of write_if_changed for codegen steps that emit many files.
+    The files are written concurrently on a small thread pool.
+
+    Args:
+        files: mapping of path -> content.
+        encoding: encoding used for str content.
+        max_workers: thread pool size (default: up to 16).
+
+    Returns:
+        The paths that were actually (re)written, in the order given.
+    """
+    items = list(files.items())
+    if not items:
+        return []
+    workers = max_workers or min(16, len(items))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        changed = list(pool.map(lambda kv: write_if_changed(kv[0], kv[1], encoding), items))
+    return [str(path) for (path, _), was_changed in zip(items, changed) if was_changed]
+
 # make relative-to-repo-root paths into absolute paths
 def make_repo_root_relpath_into_abs(rel_to_repo_root_path:str | Path, repo_root_abspath: Optional[str] = get_git_repo_root()) -> str:
     if os.path.isabs(rel_to_repo_root_path) or repo_root_abspath is None:
@@ -54,3 +187,220 @@ def make_repo_root_relpath_into_abs(rel_to_repo_root_path:str | Path, repo_root_
         return str(Path(rel_to_repo_root_path).absolute())
     else:
         return str((Path(repo_root_abspath) / rel_to_repo_root_path).absolute())
+
+class GitIndexEntry(NamedTuple):
+    """
+    One path in the git index, with the stat data git cached for it.  For an
+    unmerged (conflicted) path this is the stage-2 ("ours") entry, or the first
+    stage present if ours was deleted.  Stat fields are 0 when the index had to
+    be listed with `git ls-files` (see read_git_index).
+    """
+    path: str
+    mode: int
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    dev: int
+    ino: int
+    sha: str
+
+# (index path) -> (mtime_ns, size, entries) of the last parse
+_git_index_cache: dict[str, tuple[int, int, tuple[GitIndexEntry, ...]]] = {}
+
+_INDEX_ENTRY_STAT = struct.Struct(">10I")
+_INDEX_HEADER = struct.Struct(">4sII")
+_INDEX_EXTENSION = struct.Struct(">4sI")
+
+# split index ("link"): most entries live in a separate shared index file.
+# sparse index ("sdir"): collapsed directories appear as entries.
+_UNSUPPORTED_INDEX_EXTENSIONS = {b"link": "split index", b"sdir": "sparse index"}
+
+class _UnsupportedGitIndex(Exception):
+    pass
+
+def _locate_git(start: Optional[str]) -> Optional[tuple[str, str]]:
+    # returns (work tree, git dir) for the repo containing `start`
+    cur = os.path.abspath(start or os.getcwd())
+    while True:
+        dot_git = os.path.join(cur, ".git")
+        if os.path.isdir(dot_git):
+            return cur, dot_git
+        if os.path.isfile(dot_git):
+            with open(dot_git, "r") as f:
+                line = f.readline().strip()
+            if line.startswith("gitdir:"):
+                git_dir = line[len("gitdir:"):].strip()
+                return cur, os.path.normpath(os.path.join(cur, git_dir))
+        parent = os.path.dirname(cur)
+        if parent == cur:
+            return None
+        cur = parent
+
+def find_git_dir(start: Optional[str] = None) -> Optional[str]:
+    """
+    Walks up from `start` (default: cwd) looking for a `.git` directory, or a
+    `.git` file pointing at one (worktrees, submodules).  No subprocess is used.
+
+    Returns:
+    The absolute path of the git dir, or None if `start` is not inside a work tree.
+    """
+    located = _locate_git(start)
+    return None if located is None else located[1]
+
+def find_git_work_tree(start: Optional[str] = None) -> Optional[str]:
+    """
+    Same as get_git_repo_root, but found by walking up the directory tree
+    instead of running `git rev-parse`.
+
+    Returns:
+    The absolute path of the top of the work tree, or None if not inside one.
+    """
+    located = _locate_git(start)
+    return None if located is None else located[0]
+
+def _read_index_varint(buf: mmap.mmap, pos: int) -> tuple[int, int]:
+    # git's "offset" varint encoding (see varint.c), used by index v4 path compression
+    c = buf[pos]
+    pos += 1
+    value = c & 0x7F
+    while c & 0x80:
+        value += 1
+        c = buf[pos]
+        pos += 1
+        value = (value << 7) + (c & 0x7F)
+    return value, pos
+
+def _parse_git_index(index_path: str) -> tuple[GitIndexEntry, ...]:
+    with open(index_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _INDEX_HEADER.size:
+            return ()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            signature, version, count = _INDEX_HEADER.unpack_from(buf, 0)
+            if signature != b"DIRC" or version not in (2, 3, 4):
+                raise ValueError(f"{index_path}: unsupported git index (signature {signature!r}, version {version})")
+
+            entries: list[GitIndexEntry] = []
+            pos = _INDEX_HEADER.size
+            prev_name = b""
+            for _ in range(count):
+                entry_start = pos
+                (ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino,
+                 mode, _uid, _gid, size) = _INDEX_ENTRY_STAT.unpack_from(buf, pos)
+                pos += _INDEX_ENTRY_STAT.size
+                sha = buf[pos:pos + 20].hex()
+                pos += 20
+                flags = struct.unpack_from(">H", buf, pos)[0]
+                pos += 2
+                if version >= 3 and flags & 0x4000:
+                    pos += 2  # extended flags (skip-worktree, intent-to-add)
+
+                if version == 4:
+                    strip_len, pos = _read_index_varint(buf, pos)
+                    end = buf.find(b"\0", pos)
+                    name = prev_name[:len(prev_name) - strip_len] + buf[pos:end]
+                    pos = end + 1
+                else:
+                    end = buf.find(b"\0", pos)
+                    name = buf[pos:end]
+                    # entries are NUL padded to a multiple of 8 bytes
+                    pos = entry_start + ((end - entry_start + 8) & ~7)
+                prev_name = name
+
+                path = name.decode("utf-8", "surrogateescape")
+                stage = (flags >> 12) & 0x3
+                if stage > 0 and entries and entries[-1].path == path:
+                    # unmerged: stages come in order; prefer stage 2 ("ours") over base/theirs
+                    if stage != 2:
+                        continue
+                    entries.pop()
+                entries.append(GitIndexEntry(
+                    path=path,
+                    mode=mode,
+                    size=size,
+                    mtime_ns=mtime_s * 1_000_000_000 + mtime_ns,
+                    ctime_ns=ctime_s * 1_000_000_000 + ctime_ns,
+                    dev=dev,
+                    ino=ino,
+                    sha=sha,
+                ))
+
+            # extensions follow the entries, up to the trailing checksum
+            end_of_extensions = len(buf) - 20
+            while pos + _INDEX_EXTENSION.size <= end_of_extensions:
+                ext, ext_size = _INDEX_EXTENSION.unpack_from(buf, pos)
+                if ext in _UNSUPPORTED_INDEX_EXTENSIONS:
+                    raise _UnsupportedGitIndex(_UNSUPPORTED_INDEX_EXTENSIONS[ext])
+                pos += _INDEX_EXTENSION.size + ext_size
+            return tuple(entries)
+
+def _read_index_with_git(work_tree: str) -> tuple[GitIndexEntry, ...]:
+    # fallback for index layouts we don't parse; only mode/sha/path are available
+    out = subprocess.run(["git", "ls-files", "-z", "--stage"], cwd=work_tree,
+                         check=True, capture_output=True).stdout
+    entries: list[GitIndexEntry] = []
+    for record in out.split(b"\0"):
+        if not record:
+            continue
+        meta, _, name = record.partition(b"\t")
+        mode, sha, stage = meta.split()
+        path = name.decode("utf-8", "surrogateescape")
+        if entries and entries[-1].path == path:
+            if stage != b"2":
+                continue
+            entries.pop()
+        entries.append(GitIndexEntry(path, int(mode, 8), 0, 0, 0, 0, 0, sha.decode()))
+    return tuple(entries)
+
+def read_git_index(repo_root: Optional[str] = None) -> tuple[GitIndexEntry, ...]:
+    """
+    Reads the git index (`.git/index`, versions 2/3/4) of the repo containing
+    `repo_root` (default: cwd) by memory-mapping it.  No subprocess is used.
+
+    The parsed result is cached per index file and reused until the index's
+    mtime or size changes, so repeated calls are close to free.
+
+    Split (`core.splitIndex`) and sparse indexes can't be read this way; for
+    those the paths come from `git ls-files` instead, without stat data.
+
+    Returns:
+    A tuple of GitIndexEntry in index (sorted path) order.  Empty if not in a git repo.
+    """
+    located = _locate_git(repo_root)
+    if located is None:
+        return ()
+    work_tree, git_dir = located
+    index_path = os.path.join(git_dir, "index")
+    try:
+        st = os.stat(index_path)
+    except FileNotFoundError:
+        return ()  # fresh repo, nothing staged yet
+
+    cached = _git_index_cache.get(index_path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    try:
+        entries = _parse_git_index(index_path)
+    except (_UnsupportedGitIndex, struct.error, IndexError):
+        entries = _read_index_with_git(work_tree)
+    _git_index_cache[index_path] = (st.st_mtime_ns, st.st_size, entries)
+    return entries
+
+def iter_tracked_files(repo_root: Optional[str] = None, with_stat: bool = False,
+                       suffixes: Optional[tuple[str, ...]] = None) -> Iterator[str | GitIndexEntry]:
+    """
+    Yields the files tracked by git in the repo containing `repo_root`, e.g. all
+    tracked `.sv` files with `suffixes=(".sv", ".svh")`.  A fast replacement for
+    `git ls-files` that reads the index directly (see read_git_index).
+
+    Args:
+        repo_root: any directory inside the work tree (default: cwd).
+        with_stat: yield GitIndexEntry records instead of plain paths.
+        suffixes: only yield paths ending in one of these suffixes.
+
+    Returns:
+    Paths relative to the top of the work tree, in git's sorted order.
+    """
+    for entry in read_git_index(repo_root):
+        if suffixes is not None and not entry.path.endswith(suffixes):
+            continue
+        yield entry if with_stat else entry.path
@@ -2,17 +2,59 @@
 
 # can be imported as part of the pyutils package or just as directory imports, so we handle both cases
 try:
-    from utils.shellutils.which import Which
+    from utils.shellutils.which import Which, WhichRegistry
     from utils.shellutils.delta import print_delta
-    from utils.shellutils.console import get_console_width, get_console_height
+    from utils.shellutils.console import get_console_width, get_console_height, get_console_size, invalidate_console_size
+    from utils.shellutils.scheduler import Job, JobResult, JobStatus, JobScheduler
+    from utils.shellutils.versions import ToolVersion, VersionCache, parse_version, probe_versions, check_min_versions
+    from utils.shellutils.runner import ToolRun, ToolResult, run_tools, run_tools_async
+    from utils.shellutils.logmux import LogMultiplexer
+    from utils.shellutils.capture import BoundedCapture, CaptureResult, capture_run
+    from utils.shellutils.difftool import diff_files, print_native_diff
+    from utils.shellutils.status import StatusBoard, progress_bar
+    from utils.shellutils.writer import ConsoleWriter, get_console_writer
 except ModuleNotFoundError:
-    from .which import Which
+    from .which import Which, WhichRegistry
     from .delta import print_delta
-    from .console import get_console_width, get_console_height
+    from .console import get_console_width, get_console_height, get_console_size, invalidate_console_size
+    from .scheduler import Job, JobResult, JobStatus, JobScheduler
+    from .versions import ToolVersion, VersionCache, parse_version, probe_versions, check_min_versions
+    from .runner import ToolRun, ToolResult, run_tools, run_tools_async
+    from .logmux import LogMultiplexer
+    from .capture import BoundedCapture, CaptureResult, capture_run
+    from .difftool import diff_files, print_native_diff
+    from .status import StatusBoard, progress_bar
+    from .writer import ConsoleWriter, get_console_writer
 
 __all__ = [
     "Which", 
+    "WhichRegistry",
     "print_delta", 
     "get_console_width", 
-    "get_console_height"
+    "get_console_height",
+    "get_console_size",
+    "invalidate_console_size",
+    "Job",
+    "JobResult",
+    "JobStatus",
+    "JobScheduler",
+    "ToolVersion",
+    "VersionCache",
+    "parse_version",
+    "probe_versions",
+    "check_min_versions",
+    "ToolRun",
+    "ToolResult",
+    "run_tools",
+    "run_tools_async",
+    "LogMultiplexer",
+    "BoundedCapture",
+    "CaptureResult",
+    "capture_run",
+    "diff_files",
+    "print_native_diff",
+    "StatusBoard",
+    "progress_bar",
+    "ConsoleWriter",
+    "get_console_writer"
 ]
\ No newline at end of file
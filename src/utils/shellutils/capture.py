@@ -0,0 +1,165 @@
+import os
+import re
+import gzip
+import time
+import signal
+import threading
+import subprocess
+from dataclasses import dataclass
+from typing import IO, Iterable, Optional, Sequence
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.shellutils.runner import _CHUNK
+except ModuleNotFoundError:
+    from .runner import _CHUNK
+
+DEFAULT_PATTERNS = ("ERROR", "FATAL")
+_MAX_LINE = 64 * 1024   # longer lines are scanned in pieces
+
+class BoundedCapture:
+    """
+    Captures a possibly huge output stream in bounded memory: only the first
+    `head_bytes` and the last `tail_bytes` are kept, the full stream can be
+    spilled to `spill_path` (gzip-compressed if it ends in ".gz"), and lines,
+    bytes and matches of `patterns` (regexes, e.g. "ERROR", r"Assertion .* failed")
+    are counted on the fly, so a failure can be triaged without re-reading the log.
+
+    Feed it chunks with `feed()` and call `close()` at the end, or use capture_run().
+    """
+
+    def __init__(self, head_bytes: int = 64 * 1024, tail_bytes: int = 64 * 1024,
+                 spill_path: Optional[str] = None, patterns: Iterable[str] = DEFAULT_PATTERNS,
+                 max_matches: int = 100):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_path = spill_path
+        self.patterns = list(patterns)
+        self.max_matches = max_matches
+        self.total_bytes = 0
+        self.lines = 0
+        self.counts: dict[str, int] = dict.fromkeys(self.patterns, 0)
+        self.matches: list[tuple[int, str, str]] = []   # (line number, pattern, line), first max_matches
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._partial = b""
+        self._regex = (re.compile(b"|".join(b"(?P<p%d>%s)" % (i, p.encode()) for i, p in enumerate(self.patterns)))
+                       if self.patterns else None)
+        self._spill: Optional[IO[bytes]] = None
+        if spill_path is not None:
+            self._spill = gzip.open(spill_path, "wb", compresslevel=1) if spill_path.endswith(".gz") else open(spill_path, "wb")
+
+    def feed(self, chunk: bytes):
+        """Add the next chunk of output."""
+        if not chunk:
+            return
+        self.total_bytes += len(chunk)
+        if self._spill is not None:
+            self._spill.write(chunk)
+        if len(self._head) < self.head_bytes:
+            self._head += chunk[:self.head_bytes - len(self._head)]
+        self._tail += chunk
+        if len(self._tail) > self.tail_bytes:
+            del self._tail[:len(self._tail) - self.tail_bytes]
+
+        data = self._partial + chunk
+        end = data.rfind(b"\n") + 1
+        if end == 0 and len(data) > _MAX_LINE:
+            end = len(data)   # one enormous line; scan what we have rather than buffer it all
+        self._scan(data[:end])
+        self._partial = data[end:]
+
+    def _scan(self, region: bytes):
+        # count the lines in `region` (which ends at a line boundary) and the pattern matches
+        if not region:
+            return
+        first_line = self.lines + 1
+        self.lines += region.count(b"\n")
+        if self._regex is None:
+            return
+        for m in self._regex.finditer(region):
+            pattern = self.patterns[int(m.lastgroup[1:])]
+            self.counts[pattern] += 1
+            if len(self.matches) < self.max_matches:
+                start = region.rfind(b"\n", 0, m.start()) + 1
+                stop = region.find(b"\n", m.end())
+                line = region[start:stop if stop >= 0 else len(region)]
+                self.matches.append((first_line + region.count(b"\n", 0, start), pattern,
+                                     line.decode(errors="replace")))
+
+    def close(self):
+        """Finish: account for a last line without a newline and close the spill file."""
+        if self._partial:
+            self._scan(self._partial + b"\n")
+            self._partial = b""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    @property
+    def truncated(self) -> bool:
+        """True if some of the output is in neither head nor tail."""
+        return self.total_bytes > len(self._head) + len(self._tail)
+
+    @property
+    def head(self) -> str:
+        return self._head.decode(errors="replace")
+
+    @property
+    def tail(self) -> str:
+        if self.total_bytes <= len(self._head):
+            return ""
+        # don't repeat bytes that are also in the head
+        overlap = max(0, len(self._head) + len(self._tail) - self.total_bytes)
+        return self._tail[overlap:].decode(errors="replace")
+
+    @property
+    def text(self) -> str:
+        """The head and tail, with a marker where output was left out."""
+        if not self.truncated:
+            return self.head + self.tail
+        skipped = self.total_bytes - len(self._head) - len(self._tail)
+        return f"{self.head}\n[... {skipped} bytes not kept ...]\n{self.tail}"
+
+@dataclass
+class CaptureResult:
+    returncode: int
+    wall_time: float
+    capture: BoundedCapture
+    timed_out: bool = False
+
+def capture_run(cmd: Sequence[str], timeout: Optional[float] = None, head_bytes: int = 64 * 1024,
+                tail_bytes: int = 64 * 1024, spill_path: Optional[str] = None,
+                patterns: Iterable[str] = DEFAULT_PATTERNS, **popen_kwargs) -> CaptureResult:
+    """
+    Run `cmd` with stdout+stderr captured into a BoundedCapture, instead of
+    `capture_output=True`, which holds all of a noisy simulator's output in memory.
+
+    Returns:
+        A CaptureResult with the return code and the capture (head, tail, counts, matches).
+    """
+    capture = BoundedCapture(head_bytes, tail_bytes, spill_path, patterns)
+    start = time.monotonic()
+    proc = subprocess.Popen(list(cmd), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, start_new_session=True, **popen_kwargs)
+    timed_out = threading.Event()
+    def _kill():
+        timed_out.set()
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    timer = threading.Timer(timeout, _kill) if timeout is not None else None
+    if timer is not None:
+        timer.start()
+    try:
+        fd = proc.stdout.fileno()
+        while chunk := os.read(fd, _CHUNK):
+            capture.feed(chunk)
+        proc.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        proc.stdout.close()
+        capture.close()
+    return CaptureResult(proc.returncode, time.monotonic() - start, capture, timed_out.is_set())
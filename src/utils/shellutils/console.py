@@ -1,6 +1,12 @@
-import shutil
-
 import os, sys, shutil
+import signal
+import threading
+from typing import Optional
+
+# (width, height), cached until the terminal is resized (SIGWINCH) or invalidate_console_size()
+_geometry: Optional[tuple[int, int]] = None
+_winch_installed = False
+_winch_lock = threading.Lock()
 
 def _tty_width_height() -> tuple[int, int]:
     """
@@ -15,7 +21,8 @@ def _tty_width_height() -> tuple[int, int]:
     for s in (sys.stdout, sys.stderr, sys.stdin):
         try:
             if s.isatty():
-                return os.get_terminal_size(s.fileno()).lines, os.get_terminal_size(s.fileno()).columns
+                size = os.get_terminal_size(s.fileno())
+                return size.columns, size.lines
         except (OSError, ValueError, AttributeError):
             pass
 
@@ -25,15 +32,58 @@ def _tty_width_height() -> tuple[int, int]:
         with open("/dev/tty") as t:
             rows, cols, *_ = struct.unpack("hhhh", fcntl.ioctl(t, termios.TIOCGWINSZ, b"\0"*8))
             if cols:
-                return rows,cols
+                return cols, rows
     except Exception:
         pass
 
     # 3) last resort (does NOT trust env vars)
-    return shutil.get_terminal_size(fallback=(80, 24)).lines, shutil.get_terminal_size(fallback=(80, 24)).columns
+    size = shutil.get_terminal_size(fallback=(80, 24))
+    return size.columns, size.lines
+
+def _on_winch(signum, frame, previous=None):
+    global _geometry
+    _geometry = None
+    if callable(previous):
+        previous(signum, frame)
+
+def _install_winch_handler() -> bool:
+    # the cache is only safe if we hear about resizes; signal handlers can only be
+    # installed from the main thread
+    global _winch_installed
+    with _winch_lock:
+        if _winch_installed:
+            return True
+        if not hasattr(signal, "SIGWINCH") or threading.current_thread() is not threading.main_thread():
+            return False
+        previous = signal.getsignal(signal.SIGWINCH)
+        try:
+            signal.signal(signal.SIGWINCH, lambda signum, frame: _on_winch(signum, frame, previous))
+        except (ValueError, OSError):
+            return False
+        _winch_installed = True
+        return True
+
+def invalidate_console_size():
+    """Forget the cached console size (it is re-read on the next query)."""
+    global _geometry
+    _geometry = None
+
+def get_console_size() -> tuple[int, int]:
+    """
+    Get the console's (width, height), cached until the terminal is resized.
+    Without a SIGWINCH handler (Windows, or first called off the main thread)
+    the size is re-read every time.
+    """
+    global _geometry
+    geometry = _geometry
+    if geometry is None:
+        geometry = _tty_width_height()
+        if _install_winch_handler():
+            _geometry = geometry
+    return geometry
 
 def get_console_width() -> int:
-    return _tty_width_height()[0]
+    return get_console_size()[0]
 
 def get_console_height() -> int:
-    return _tty_width_height()[1]
\ No newline at end of file
+    return get_console_size()[1]
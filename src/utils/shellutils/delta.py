@@ -1,9 +1,28 @@
+import os
 import sys
-from utils.shellutils import Which
 import subprocess
 
-def print_delta(file_path1: str, file_path2: str):
-    delta = Which("delta", on_missing_action=Which.OnMissingAction.ERROR_AND_RAISE)
-    delta_bin = delta()
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.shellutils.which import Which
+    from utils.shellutils.difftool import print_native_diff
+except ModuleNotFoundError:
+    from .which import Which
+    from .difftool import print_native_diff
+
+# delta reads both files whole; above this size we diff in-process instead
+NATIVE_DIFF_THRESHOLD = 256 * 1024 * 1024
+
+def print_delta(file_path1: str, file_path2: str, native_threshold: int = NATIVE_DIFF_THRESHOLD, **diff_kwargs):
+    """
+    Show the differences between two files with `delta` if it is installed, or
+    with the built-in diff (see difftool.diff_files) if it isn't or if either
+    file is bigger than `native_threshold` bytes.  `diff_kwargs` go to the
+    built-in diff (context, max_lines, ansi).
+    """
+    too_big = max(os.path.getsize(file_path1), os.path.getsize(file_path2)) > native_threshold
+    delta_bin = None if too_big else Which("delta", on_missing_action=Which.OnMissingAction.QUIET)()
     if delta_bin is not None:
         subprocess.run([delta_bin, file_path1, file_path2], stdout=sys.stdout, stderr=sys.stderr)
+    else:
+        print_native_diff(file_path1, file_path2, **diff_kwargs)
@@ -0,0 +1,177 @@
+import os
+import sys
+import mmap
+import difflib
+import contextlib
+from typing import IO, Iterator, Optional
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.colors import AnsiColorsTool
+except ModuleNotFoundError:
+    from colors.ansi import AnsiColorsTool
+
+_BLOCK = 1024 * 1024           # prefix/suffix comparison block
+_MAX_WINDOW_LINES = 200_000    # difflib is quadratic in the worst case; cap the window it sees
+
+_SIGN_COLORS = {"-": "red", "+": "green"}
+
+@contextlib.contextmanager
+def _map(path: str) -> Iterator[bytes | mmap.mmap]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""      # mmap can't map empty files
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+def _common_prefix(a, b) -> int:
+    # compare whole blocks first (memcmp of two mmap slices), then bisect the first differing one
+    n = min(len(a), len(b))
+    pos = 0
+    while pos < n:
+        step = min(_BLOCK, n - pos)
+        if a[pos:pos + step] == b[pos:pos + step]:
+            pos += step
+            continue
+        while step > 64:
+            half = step // 2
+            if a[pos:pos + half] == b[pos:pos + half]:
+                pos += half
+                step -= half
+            else:
+                step = half
+        while pos < n and a[pos] == b[pos]:
+            pos += 1
+        break
+    return pos
+
+def _common_suffix(a, b, limit: int) -> int:
+    # like _common_prefix, from the end, never reaching into the first `limit` bytes
+    n = min(len(a), len(b)) - limit
+    length = 0
+    while length < n:
+        step = min(_BLOCK, n - length)
+        if a[len(a) - length - step:len(a) - length] == b[len(b) - length - step:len(b) - length]:
+            length += step
+            continue
+        while step > 64:
+            half = step // 2
+            if a[len(a) - length - half:len(a) - length] == b[len(b) - length - half:len(b) - length]:
+                length += half
+                step -= half
+            else:
+                step = half
+        while length < n and a[len(a) - length - 1] == b[len(b) - length - 1]:
+            length += 1
+        break
+    return length
+
+def _back_lines(data, pos: int, lines: int) -> int:
+    # start of the line `lines` lines before the one containing `pos`
+    pos = data.rfind(b"\n", 0, pos) + 1
+    for _ in range(lines):
+        if pos == 0:
+            break
+        pos = data.rfind(b"\n", 0, pos - 1) + 1
+    return pos
+
+def _forward_lines(data, pos: int, lines: int) -> int:
+    # end (after the newline) of the line `lines` lines after the one ending at/after `pos`
+    if pos > 0 and data[pos - 1:pos] == b"\n":
+        pos -= 1
+    for _ in range(lines + 1):
+        nl = data.find(b"\n", pos)
+        if nl < 0:
+            return len(data)
+        pos = nl + 1
+    return pos
+
+def _count_lines(data, end: int) -> int:
+    return sum(data[i:min(i + _BLOCK, end)].count(b"\n") for i in range(0, end, _BLOCK))
+
+def _range(start: int, length: int) -> str:
+    # hunk range as in `diff -u`: "start,length", 1-based, with an empty range naming the line before
+    if length == 1:
+        return f"{start + 1}"
+    return f"{start + 1 if length else start},{length}"
+
+def _lines(data, start: int, end: int) -> list[str]:
+    return data[start:end].decode(errors="replace").splitlines(keepends=True)
+
+def diff_files(path1: str, path2: str, context: int = 3, max_lines: Optional[int] = 2000,
+               ansi: Optional[AnsiColorsTool] = None) -> Iterator[str]:
+    """
+    Unified diff of two (possibly huge) files, computed in-process.
+
+    The common prefix and suffix are skipped by comparing mmap'd blocks, so
+    only the differing window (plus context) is split into lines and handed to
+    difflib.  Lines are colored with `ansi` (default: the shared AnsiColorsTool,
+    which is plain when stdout isn't a terminal).
+
+    Args:
+        context: lines of context around each change.
+        max_lines: stop after this many output lines (None: no limit).
+
+    Returns:
+        An iterator of output lines (with newlines); empty if the files are identical.
+    """
+    ansi = ansi or AnsiColorsTool.shared()
+    colors, reset = ansi.colors, ansi.colors["reset"]
+    paint = lambda color, s: f"{colors[color]}{s}{reset}" if colors[color] else s
+
+    with _map(path1) as a, _map(path2) as b:
+        prefix = _common_prefix(a, b)
+        if prefix == len(a) == len(b):
+            return
+        suffix = _common_suffix(a, b, prefix)
+        a_start = b_start = _back_lines(a, prefix, context)
+        a_end = _forward_lines(a, len(a) - suffix, context)
+        b_end = _forward_lines(b, len(b) - suffix, context)
+        first_line = _count_lines(a, a_start)
+        a_lines, b_lines = _lines(a, a_start, a_end), _lines(b, b_start, b_end)
+
+    yield paint("bold", f"--- {path1}") + "\n"
+    yield paint("bold", f"+++ {path2}") + "\n"
+    if max(len(a_lines), len(b_lines)) > _MAX_WINDOW_LINES:
+        yield paint("yellow", f"(differing region is over {_MAX_WINDOW_LINES} lines; diffing only its start)") + "\n"
+        a_lines, b_lines = a_lines[:_MAX_WINDOW_LINES], b_lines[:_MAX_WINDOW_LINES]
+
+    emitted = 0
+    matcher = difflib.SequenceMatcher(None, a_lines, b_lines, autojunk=False)
+    for group in matcher.get_grouped_opcodes(context):
+        i1, i2, j1, j2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+        yield paint("cyan", f"@@ -{_range(first_line + i1, i2 - i1)} +{_range(first_line + j1, j2 - j1)} @@") + "\n"
+        for tag, i1, i2, j1, j2 in group:
+            lines = ([(" ", l) for l in a_lines[i1:i2]] if tag == "equal" else
+                     [("-", l) for l in a_lines[i1:i2]] + [("+", l) for l in b_lines[j1:j2]])
+            for sign, line in lines:
+                if max_lines is not None and emitted >= max_lines:
+                    yield paint("yellow", f"[... diff truncated after {max_lines} lines ...]") + "\n"
+                    return
+                emitted += 1
+                body = sign + line.rstrip("\n")
+                yield (paint(_SIGN_COLORS[sign], body) if sign != " " else body) + "\n"
+                if not line.endswith("\n"):
+                    yield "\\ No newline at end of file\n"
+
+def print_native_diff(path1: str, path2: str, out: Optional[IO[str]] = None, **kwargs) -> bool:
+    """
+    Print diff_files(path1, path2, **kwargs) to `out` (default: stdout) in one batched write per 64 KiB.
+    Returns:
+        True if the files differ
+    """
+    out = out if out is not None else sys.stdout
+    buf: list[str] = []
+    size = 0
+    differ = False
+    for line in diff_files(path1, path2, **kwargs):
+        differ = True
+        buf.append(line)
+        size += len(line)
+        if size >= 64 * 1024:
+            out.write("".join(buf))
+            buf, size = [], 0
+    out.write("".join(buf))
+    out.flush()
+    return differ
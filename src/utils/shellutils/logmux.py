@@ -0,0 +1,195 @@
+import os
+import sys
+import zlib
+import selectors
+import threading
+import subprocess
+from collections import deque
+from typing import IO, Optional, Sequence
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.colors import AnsiColorsTool
+    from utils.shellutils.runner import _LineSplitter, _CHUNK
+except ModuleNotFoundError:
+    from colors.ansi import AnsiColorsTool
+    from .runner import _LineSplitter, _CHUNK
+
+# prefix colors, picked per job by a stable hash of its name
+PALETTE = ("cyan", "green", "yellow", "magenta", "blue", "bright_cyan", "bright_green",
+           "bright_yellow", "bright_magenta", "bright_blue", "dark_cyan", "dark_green",
+           "dark_yellow", "dark_magenta")
+
+class LogMultiplexer:
+    """
+    Interleaves the output of many concurrent jobs into one readable terminal
+    stream: every line is prefixed with its job's name in a stable per-job color.
+
+    Pipes are drained as soon as they are readable (selectors) and each job's
+    full output goes to `<log_dir>/<name>.log`, while the terminal gets one
+    `write` per frame from a separate thread.  If the terminal can't keep up,
+    the oldest queued lines are dropped (and counted) rather than letting the
+    children block on full pipes.
+
+    Usage:
+
+        with LogMultiplexer(log_dir="logs") as mux:
+            for test in tests:
+                mux.spawn(test, ["vvp", f"{test}.vvp"])
+            mux.pump()
+
+        # or with run_tools:
+        with LogMultiplexer(log_dir="logs") as mux:
+            run_tools(runs, on_line=mux.on_line)
+    """
+
+    def __init__(self, out: Optional[IO[str]] = None, log_dir: Optional[str] = None,
+                 frame_interval: float = 0.05, max_queued_bytes: int = 1 << 20,
+                 ansi: Optional[AnsiColorsTool] = None):
+        self.out = out if out is not None else sys.stdout
+        self.log_dir = log_dir
+        self.frame_interval = frame_interval
+        self.max_queued_bytes = max_queued_bytes
+        self.dropped = 0
+        ansi = ansi or AnsiColorsTool.shared()
+        self._codes = [ansi.colors[name] for name in PALETTE]
+        self._reset = ansi.colors["reset"]
+        self._prefixes: dict[str, str] = {}
+        self._queue: deque[str] = deque()
+        self._queued_bytes = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._closing = threading.Event()
+        self._logs: dict[str, IO[bytes]] = {}
+        self._selector = selectors.DefaultSelector()
+        self._procs: list[subprocess.Popen] = []
+        self._writer = threading.Thread(target=self._write_frames, name="LogMultiplexer", daemon=True)
+        self._writer.start()
+
+    # --- terminal side --------------------------------------------------------
+
+    def _prefix(self, name: str) -> str:
+        prefix = self._prefixes.get(name)
+        if prefix is None:
+            code = self._codes[zlib.crc32(name.encode()) % len(self._codes)]
+            prefix = self._prefixes[name] = f"{code}[{name}]{self._reset} "
+        return prefix
+
+    def _enqueue(self, text: str):
+        with self._cond:
+            self._queue.append(text)
+            self._queued_bytes += len(text)
+            while self._queued_bytes > self.max_queued_bytes and len(self._queue) > 1:
+                self._queued_bytes -= len(self._queue.popleft())
+                self.dropped += 1
+            self._cond.notify()
+
+    def _write_frames(self):
+        dropped_reported = 0
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue and self._closed:
+                    return
+                frame, self._queue = self._queue, deque()
+                self._queued_bytes = 0
+                dropped = self.dropped
+            text = "".join(frame)
+            if dropped != dropped_reported:
+                text = f"[... {dropped - dropped_reported} lines dropped, see the job logs ...]\n" + text
+                dropped_reported = dropped
+            try:
+                self.out.write(text)
+                self.out.flush()
+            except (OSError, ValueError):
+                pass   # terminal went away; the log files still have everything
+            self._closing.wait(self.frame_interval)   # let the next frame's lines accumulate
+
+    def _log(self, name: str) -> Optional[IO[bytes]]:
+        if self.log_dir is None:
+            return None
+        f = self._logs.get(name)
+        if f is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            f = self._logs[name] = open(os.path.join(self.log_dir, f"{name}.log"), "wb")
+        return f
+
+    def feed(self, name: str, line: str):
+        """Add one line (without its newline) of job `name`'s output."""
+        log = self._log(name)
+        if log is not None:
+            log.write(line.encode(errors="replace") + b"\n")
+        self._enqueue(f"{self._prefix(name)}{line}\n")
+
+    def on_line(self, name: str, stream: str, line: str):
+        """A run_tools `on_line` callback."""
+        self.feed(name, line)
+
+    # --- pipe side ------------------------------------------------------------
+
+    def add_pipe(self, name: str, pipe: int | IO[bytes]):
+        """Read job `name`'s output from `pipe` (an fd or binary file) in pump()."""
+        fd = pipe if isinstance(pipe, int) else pipe.fileno()
+        os.set_blocking(fd, False)
+        splitter = _LineSplitter(lambda line: self._enqueue(f"{self._prefix(name)}{line}\n"))
+        self._selector.register(fd, selectors.EVENT_READ, (name, splitter, pipe))
+
+    def spawn(self, name: str, cmd: Sequence[str], **popen_kwargs) -> subprocess.Popen:
+        """Start `cmd` with stdout+stderr going to this multiplexer."""
+        proc = subprocess.Popen(list(cmd), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, **popen_kwargs)
+        self._procs.append(proc)
+        self.add_pipe(name, proc.stdout)
+        return proc
+
+    def pump(self, timeout: Optional[float] = None) -> bool:
+        """
+        Read the registered pipes until they are all closed (or none has output
+        for `timeout` seconds), then reap the spawned processes.
+        Returns:
+            True once every pipe has been closed.
+        """
+        while self._selector.get_map():
+            events = self._selector.select(timeout)
+            if not events:
+                return False
+            for key, _mask in events:
+                name, splitter, pipe = key.data
+                try:
+                    chunk = os.read(key.fd, _CHUNK)
+                except BlockingIOError:
+                    continue
+                if chunk:
+                    log = self._log(name)
+                    if log is not None:
+                        log.write(chunk)
+                    splitter.feed(chunk)
+                else:
+                    splitter.close()
+                    self._selector.unregister(key.fd)
+                    if isinstance(pipe, int):
+                        os.close(pipe)
+                    else:
+                        pipe.close()
+        for proc in self._procs:
+            proc.wait()
+        return True
+
+    def close(self):
+        """Flush the last frame and close the log files."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._closing.set()
+        self._writer.join()
+        self._selector.close()
+        for f in self._logs.values():
+            f.close()
+        self._logs.clear()
+
+    def __enter__(self) -> "LogMultiplexer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
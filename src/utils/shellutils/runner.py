@@ -0,0 +1,162 @@
+import os
+import time
+import signal
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping, Optional, Union
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.shellutils.which import Which
+    from utils.system import get_nprocs
+except ModuleNotFoundError:
+    from .which import Which
+    from ..system import get_nprocs
+
+_CHUNK = 64 * 1024
+
+LineCallback = Callable[[str], None]
+# where one output stream goes: a file path, a per-line callback, a BoundedCapture
+# (anything with feed(chunk) and close()), or None to discard
+Sink = Union[str, os.PathLike, LineCallback, Any, None]
+
+@dataclass
+class ToolRun:
+    """
+    One tool invocation for run_tools.  stdout/stderr may each go to a file
+    (written as raw bytes, no line splitting), a per-line callback, or a
+    BoundedCapture.
+    """
+    name: str
+    cmd: list[str]
+    cwd: Optional[str] = None
+    env: Optional[Mapping[str, str]] = None
+    timeout: Optional[float] = None      # seconds; the whole process group is killed after it
+    stdout: Sink = None
+    stderr: Sink = None
+
+@dataclass
+class ToolResult:
+    name: str
+    returncode: Optional[int]
+    wall_time: float                     # seconds
+    timed_out: bool = False
+
+class _LineSplitter:
+    # turns chunks into lines without ever holding more than one partial line
+    def __init__(self, callback: LineCallback):
+        self.callback = callback
+        self.pending = b""
+
+    def feed(self, chunk: bytes):
+        data = self.pending + chunk
+        *lines, self.pending = data.split(b"\n")
+        for line in lines:
+            self.callback(line.decode(errors="replace"))
+
+    def close(self):
+        if self.pending:
+            self.callback(self.pending.decode(errors="replace"))
+            self.pending = b""
+
+async def _pump(stream: asyncio.StreamReader, sink: Sink, on_line: Optional[LineCallback]):
+    # copy one pipe to its sinks chunk by chunk, so output is never buffered whole
+    feeders = []   # objects with feed(chunk) and close(): line splitters or a BoundedCapture
+    file = None
+    if hasattr(sink, "feed"):
+        feeders.append(sink)
+    elif callable(sink):
+        feeders.append(_LineSplitter(sink))
+    elif sink is not None:
+        file = open(sink, "wb")
+    if on_line is not None:
+        feeders.append(_LineSplitter(on_line))
+    try:
+        while chunk := await stream.read(_CHUNK):
+            if file is not None:
+                file.write(chunk)
+            for feeder in feeders:
+                feeder.feed(chunk)
+        for feeder in feeders:
+            feeder.close()
+    finally:
+        if file is not None:
+            file.close()
+
+def _killpg(pid: int, sig: int):
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+async def _run_one(run: ToolRun, exe: str, semaphore: asyncio.Semaphore, kill_grace: float,
+                   on_line: Optional[Callable[[str, str, str], None]]) -> ToolResult:
+    async with semaphore:
+        start = time.monotonic()
+        env = None if run.env is None else {**os.environ, **run.env}
+        proc = await asyncio.create_subprocess_exec(
+            exe, *run.cmd[1:], cwd=run.cwd, env=env, stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            start_new_session=True)  # own process group, so timeouts kill the whole tree
+        pumps = asyncio.gather(
+            _pump(proc.stdout, run.stdout, on_line and (lambda line: on_line(run.name, "stdout", line))),
+            _pump(proc.stderr, run.stderr, on_line and (lambda line: on_line(run.name, "stderr", line))))
+        timed_out = False
+        try:
+            try:
+                await asyncio.wait_for(asyncio.shield(proc.wait()), run.timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                _killpg(proc.pid, signal.SIGTERM)
+                try:
+                    await asyncio.wait_for(asyncio.shield(proc.wait()), kill_grace)
+                except asyncio.TimeoutError:
+                    _killpg(proc.pid, signal.SIGKILL)
+                    await proc.wait()
+            await pumps
+        except asyncio.CancelledError:
+            _killpg(proc.pid, signal.SIGKILL)
+            raise
+        return ToolResult(run.name, proc.returncode, time.monotonic() - start, timed_out)
+
+async def run_tools_async(runs: Iterable[ToolRun], max_concurrency: Optional[int] = None,
+                          on_line: Optional[Callable[[str, str, str], None]] = None,
+                          kill_grace: float = 2.0) -> dict[str, ToolResult]:
+    """
+    Run many tool invocations concurrently on the running event loop.
+
+    Binaries are resolved with Which first (every missing tool is reported at
+    once), then at most `max_concurrency` (default: get_nprocs()) run at a time.
+    Output is streamed chunk by chunk to each run's sinks and to
+    `on_line(name, "stdout"|"stderr", line)`, never buffered whole.
+
+    Returns:
+        A ToolResult per run, keyed by name, in the order given.
+    """
+    runs = list(runs)
+    names = [run.name for run in runs]
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate run names")
+    tools = [run.cmd[0] for run in runs if os.sep not in run.cmd[0]]
+    resolved = Which.resolve_all(tools, on_missing_action=Which.OnMissingAction.ERROR_AND_RAISE)
+    semaphore = asyncio.Semaphore(max_concurrency or get_nprocs())
+    results = await asyncio.gather(*(
+        _run_one(run, str(resolved.get(run.cmd[0], run.cmd[0])), semaphore, kill_grace, on_line)
+        for run in runs))
+    return dict(zip(names, results))
+
+def run_tools(runs: Iterable[ToolRun], max_concurrency: Optional[int] = None,
+              on_line: Optional[Callable[[str, str, str], None]] = None,
+              kill_grace: float = 2.0) -> dict[str, ToolResult]:
+    """
+    Blocking wrapper around run_tools_async, for code without an event loop.
+
+    Usage:
+
+        results = run_tools([
+            ToolRun("lint", ["verilator", "--lint-only", "top.sv"], stderr="lint.log"),
+            ToolRun("sim", ["vvp", "sim.vvp"], timeout=600, stdout=print),
+        ])
+        failed = [r.name for r in results.values() if r.returncode != 0]
+    """
+    return asyncio.run(run_tools_async(runs, max_concurrency, on_line, kill_grace))
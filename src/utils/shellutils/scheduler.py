@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import errno
+import select
+import signal
+import subprocess
+from enum import Enum
+from dataclasses import dataclass
+from typing import Iterable, Mapping, Optional
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.shellutils.which import Which
+    from utils.system import get_nprocs, get_available_memory_bytes, ChildLimits
+    from utils.file_utils import write_if_changed
+except ModuleNotFoundError:
+    from .which import Which
+    from ..system import get_nprocs, get_available_memory_bytes, ChildLimits
+    from ..file_utils import write_if_changed
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+@dataclass
+class Job:
+    """
+    One external tool invocation (Verilator, iverilog, slang, ...) to schedule.
+
+    `cpus` and `memory_bytes` are reservations: the scheduler never starts jobs
+    whose reservations add up to more than it has, except that a job bigger
+    than the whole machine still runs, alone.
+    """
+    name: str
+    cmd: list[str]
+    deps: tuple[str, ...] = ()
+    priority: int = 0                    # higher runs first, before duration ordering
+    cpus: int = 1
+    memory_bytes: int = 0
+    cwd: Optional[str] = None
+    env: Optional[Mapping[str, str]] = None
+    log_path: Optional[str] = None       # stdout+stderr go here; None inherits ours
+    limits: Optional[ChildLimits] = None # rlimits for this job's process only
+
+@dataclass
+class JobResult:
+    name: str
+    status: JobStatus
+    returncode: Optional[int] = None
+    wall_time: float = 0.0               # seconds
+    user_time: float = 0.0               # seconds of CPU, from wait4
+    sys_time: float = 0.0
+    max_rss_kb: int = 0                  # peak RSS of the job's process tree, from wait4
+
+@dataclass
+class _Running:
+    job: Job
+    proc: subprocess.Popen
+    start: float
+    pidfd: Optional[int] = None
+    log_file: Optional[object] = None
+    killed: bool = False
+
+class JobScheduler:
+    """
+    Runs command jobs with dependency edges, priorities and per-job CPU/memory
+    reservations, making better use of CI cores than a fixed-size pool.
+
+    Ready jobs are started longest-first: each job's rank is its expected
+    duration (from the history file of previous runs) plus the longest chain
+    of jobs that depend on it, so long critical paths start early.  Peak RSS
+    and CPU time of every job come from `os.wait4`.  With `fail_fast` (the
+    default) the first failure kills every running job's process group and
+    cancels everything still pending.
+
+    Usage:
+
+        sched = JobScheduler(history_path=".cache/sim_durations.json")
+        results = sched.run([
+            Job("lint", ["verilator", "--lint-only", "top.sv"]),
+            Job("build", ["verilator", "--binary", "top.sv"], deps=("lint",), cpus=4, memory_bytes=4 << 30),
+            Job("sim", ["obj_dir/Vtop"], deps=("build",)),
+        ])
+    """
+
+    def __init__(self, max_cpus: Optional[int] = None, max_memory_bytes: Optional[int] = None,
+                 history_path: Optional[str] = None, fail_fast: bool = True,
+                 default_duration: float = 1.0, kill_grace: float = 5.0, poll_interval: float = 0.05):
+        self.max_cpus = max_cpus or get_nprocs()
+        self.max_memory_bytes = max_memory_bytes
+        self.history_path = history_path
+        self.fail_fast = fail_fast
+        self.default_duration = default_duration
+        self.kill_grace = kill_grace
+        self.poll_interval = poll_interval
+        self.history: dict[str, float] = self._load_history()
+
+    def _load_history(self) -> dict[str, float]:
+        if self.history_path is None:
+            return {}
+        try:
+            with open(self.history_path) as f:
+                return {k: float(v) for k, v in json.load(f).items()}
+        except (FileNotFoundError, ValueError, AttributeError):
+            return {}
+
+    def _save_history(self):
+        if self.history_path is None:
+            return
+        os.makedirs(os.path.dirname(self.history_path) or ".", exist_ok=True)
+        write_if_changed(self.history_path, json.dumps(self.history, indent=1, sort_keys=True))
+
+    def _record_duration(self, name: str, seconds: float):
+        # exponential moving average smooths out noisy machines
+        old = self.history.get(name)
+        self.history[name] = seconds if old is None else 0.5 * old + 0.5 * seconds
+
+    @staticmethod
+    def _check_graph(jobs: Mapping[str, Job]) -> dict[str, list[str]]:
+        dependents: dict[str, list[str]] = {name: [] for name in jobs}
+        for job in jobs.values():
+            for dep in job.deps:
+                if dep not in jobs:
+                    raise ValueError(f"job {job.name!r} depends on unknown job {dep!r}")
+                dependents[dep].append(job.name)
+        # Kahn's algorithm: anything left over is on a cycle
+        indegree = {name: len(job.deps) for name, job in jobs.items()}
+        ready = [name for name, n in indegree.items() if n == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for d in dependents[name]:
+                indegree[d] -= 1
+                if indegree[d] == 0:
+                    ready.append(d)
+        if seen != len(jobs):
+            cyclic = sorted(name for name, n in indegree.items() if n > 0)
+            raise ValueError(f"dependency cycle among jobs: {', '.join(cyclic)}")
+        return dependents
+
+    def _ranks(self, jobs: Mapping[str, Job], dependents: Mapping[str, list[str]]) -> dict[str, float]:
+        ranks: dict[str, float] = {}
+        def rank(name: str) -> float:
+            if name not in ranks:
+                own = self.history.get(name, self.default_duration)
+                ranks[name] = own + max((rank(d) for d in dependents[name]), default=0.0)
+            return ranks[name]
+        for name in jobs:
+            rank(name)
+        return ranks
+
+    @staticmethod
+    def _resolve_tools(jobs: Iterable[Job]) -> dict[str, str]:
+        # fail before starting anything if a tool is missing, naming all missing tools at once
+        tools = [job.cmd[0] for job in jobs if os.sep not in job.cmd[0]]
+        found = Which.resolve_all(tools, on_missing_action=Which.OnMissingAction.ERROR_AND_RAISE)
+        return {tool: str(path) for tool, path in found.items()}
+
+    def run(self, jobs: Iterable[Job]) -> dict[str, JobResult]:
+        """
+        Run `jobs` to completion (or first failure, with fail_fast).
+
+        Returns:
+            A JobResult for every job, keyed by name, in the order given.
+        """
+        jobs_by_name: dict[str, Job] = {}
+        for job in jobs:
+            if job.name in jobs_by_name:
+                raise ValueError(f"duplicate job name {job.name!r}")
+            jobs_by_name[job.name] = job
+        dependents = self._check_graph(jobs_by_name)
+        ranks = self._ranks(jobs_by_name, dependents)
+        tools = self._resolve_tools(jobs_by_name.values())
+
+        max_memory = self.max_memory_bytes if self.max_memory_bytes is not None else get_available_memory_bytes()
+        results = {name: JobResult(name, JobStatus.PENDING) for name in jobs_by_name}
+        remaining_deps = {name: set(job.deps) for name, job in jobs_by_name.items()}
+        ready = [name for name, deps in remaining_deps.items() if not deps]
+        running: dict[int, _Running] = {}
+        cpus_used = 0
+        memory_used = 0
+        stopping = False
+
+        try:
+            while ready or running:
+                # start whatever fits, most important first; smaller jobs may backfill
+                if not stopping:
+                    ready.sort(key=lambda n: (-jobs_by_name[n].priority, -ranks[n]))
+                    for name in list(ready):
+                        job = jobs_by_name[name]
+                        fits = (cpus_used + job.cpus <= self.max_cpus and memory_used + job.memory_bytes <= max_memory)
+                        if not fits and running:
+                            continue
+                        ready.remove(name)
+                        r = self._start(job, tools)
+                        running[r.proc.pid] = r
+                        results[name].status = JobStatus.RUNNING
+                        cpus_used += job.cpus
+                        memory_used += job.memory_bytes
+                elif not running:
+                    break
+
+                for r, status, rusage in self._wait_any(running):
+                    del running[r.proc.pid]
+                    cpus_used -= r.job.cpus
+                    memory_used -= r.job.memory_bytes
+                    result = self._finish(r, status, rusage)
+                    results[r.job.name] = result
+                    if result.status is JobStatus.SUCCEEDED:
+                        self._record_duration(r.job.name, result.wall_time)
+                        for d in dependents[r.job.name]:
+                            remaining_deps[d].discard(r.job.name)
+                            if not remaining_deps[d] and results[d].status is JobStatus.PENDING:
+                                ready.append(d)
+                    elif result.status is JobStatus.FAILED:
+                        if self.fail_fast and not stopping:
+                            stopping = True
+                            ready.clear()
+                            self._kill_all(running)
+                        self._cancel_dependents(r.job.name, dependents, results, ready)
+        finally:
+            if running:  # interrupted (e.g. KeyboardInterrupt): don't leave orphans behind
+                self._kill_all(running)
+                for r, status, rusage in self._wait_all(running):
+                    results[r.job.name] = self._finish(r, status, rusage)
+            self._save_history()
+
+        for result in results.values():
+            if result.status is JobStatus.PENDING:
+                result.status = JobStatus.CANCELLED
+        return results
+
+    @staticmethod
+    def _cancel_dependents(name: str, dependents: Mapping[str, list[str]],
+                           results: dict[str, JobResult], ready: list[str]):
+        stack = list(dependents[name])
+        while stack:
+            d = stack.pop()
+            if results[d].status is JobStatus.PENDING:
+                results[d].status = JobStatus.CANCELLED
+                if d in ready:
+                    ready.remove(d)
+                stack.extend(dependents[d])
+
+    def _start(self, job: Job, tools: Mapping[str, str]) -> _Running:
+        cmd = [tools.get(job.cmd[0], job.cmd[0]), *job.cmd[1:]]
+        log_file = open(job.log_path, "wb") if job.log_path else None
+        env = None if job.env is None else {**os.environ, **job.env}
+        proc = subprocess.Popen(cmd, cwd=job.cwd, env=env, stdin=subprocess.DEVNULL,
+                                stdout=log_file, stderr=subprocess.STDOUT if log_file else None,
+                                start_new_session=True,  # own process group, so we can kill the whole tree
+                                preexec_fn=job.limits.apply if job.limits is not None else None)
+        pidfd = None
+        if hasattr(os, "pidfd_open"):
+            try:
+                pidfd = os.pidfd_open(proc.pid)
+            except OSError:
+                pass
+        return _Running(job, proc, time.monotonic(), pidfd, log_file)
+
+    def _wait_any(self, running: Mapping[int, _Running]) -> list[tuple[_Running, int, object]]:
+        # reap every finished child; block (on pidfds where possible) until at least one is
+        while True:
+            done = []
+            for pid, r in running.items():
+                try:
+                    wpid, status, rusage = os.wait4(pid, os.WNOHANG)
+                except ChildProcessError:
+                    wpid, status, rusage = pid, 0, None
+                if wpid == pid:
+                    done.append((r, status, rusage))
+            if done or not running:
+                return done
+            pidfds = [r.pidfd for r in running.values() if r.pidfd is not None]
+            if len(pidfds) == len(running):
+                try:
+                    select.select(pidfds, [], [], 1.0)
+                except OSError as e:
+                    if e.errno != errno.EINTR:
+                        raise
+            else:
+                time.sleep(self.poll_interval)
+
+    def _wait_all(self, running: dict[int, _Running]) -> list[tuple[_Running, int, object]]:
+        done = []
+        while running:
+            for r, status, rusage in self._wait_any(running):
+                del running[r.proc.pid]
+                done.append((r, status, rusage))
+        return done
+
+    def _kill_all(self, running: Mapping[int, _Running]):
+        for r in running.values():
+            r.killed = True
+            try:
+                os.killpg(r.proc.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.kill_grace
+        # escalate for anything still alive after the grace period
+        while time.monotonic() < deadline:
+            if all(self._exited(r) for r in running.values()):
+                return
+            time.sleep(self.poll_interval)
+        for r in running.values():
+            try:
+                os.killpg(r.proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    @staticmethod
+    def _exited(r: _Running) -> bool:
+        # peek without reaping, so wait4 still gets the rusage
+        try:
+            info = os.waitid(os.P_PID, r.proc.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+        except ChildProcessError:
+            return True
+        return info is not None
+
+    @staticmethod
+    def _finish(r: _Running, status: int, rusage) -> JobResult:
+        wall = time.monotonic() - r.start
+        returncode = os.waitstatus_to_exitcode(status) if rusage is not None else None
+        r.proc.returncode = returncode  # we reaped it ourselves; keep Popen from trying again
+        if r.pidfd is not None:
+            os.close(r.pidfd)
+        if r.log_file is not None:
+            r.log_file.close()
+        if r.killed and returncode != 0:
+            job_status = JobStatus.CANCELLED
+        else:
+            job_status = JobStatus.SUCCEEDED if returncode == 0 else JobStatus.FAILED
+        return JobResult(
+            name=r.job.name,
+            status=job_status,
+            returncode=returncode,
+            wall_time=wall,
+            user_time=rusage.ru_utime if rusage is not None else 0.0,
+            sys_time=rusage.ru_stime if rusage is not None else 0.0,
+            max_rss_kb=rusage.ru_maxrss if rusage is not None else 0,
+        )
@@ -0,0 +1,159 @@
+import sys
+import threading
+from typing import IO, Optional
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.shellutils.console import get_console_size
+except ModuleNotFoundError:
+    from .console import get_console_size
+
+_CLEAR_EOL = "\033[K"
+_CLEAR_EOS = "\033[J"
+
+def progress_bar(done: int, total: int, width: int = 20) -> str:
+    """A text progress bar like `[#######.............]  35%`."""
+    frac = min(1.0, done / total) if total else 1.0
+    filled = int(frac * width)
+    return f"[{'#' * filled}{'.' * (width - filled)}] {frac * 100:3.0f}%"
+
+class StatusBoard:
+    """
+    Live multi-line status display (one line per key, e.g. per job) that is
+    cheap to update from anywhere: `set()` only records the new text, and a
+    background thread redraws at most `fps` times a second, rewriting only the
+    lines that changed, in a single write.  Lines are cut to the terminal width
+    and the board to its height (read from the cached console geometry).
+
+    When `out` is not a terminal, changed lines are printed as plain lines at
+    most every `plain_interval` seconds instead, so CI logs stay readable.
+
+    Usage:
+
+        with StatusBoard() as board:
+            for job in jobs:
+                board.set(job.name, f"{job.name}: queued")
+            ...
+            board.set(name, f"{name}: {progress_bar(done, total)}")
+            board.log(f"{name} FAILED")     # permanent line above the board
+    """
+
+    def __init__(self, out: Optional[IO[str]] = None, fps: float = 10.0,
+                 plain_interval: float = 5.0, is_tty: Optional[bool] = None):
+        self.out = out if out is not None else sys.stdout
+        if is_tty is None:
+            try:
+                is_tty = self.out.isatty()
+            except (AttributeError, ValueError):
+                is_tty = False
+        self.is_tty = is_tty
+        self.interval = 1.0 / fps if is_tty else plain_interval
+        self._lines: dict[str, str] = {}
+        self._drawn: list[str] = []         # what is on screen now (TTY mode)
+        self._printed: dict[str, str] = {}  # last text printed per key (plain mode)
+        self._logs: list[str] = []
+        self._dirty = False
+        self._cond = threading.Condition()
+        self._closed = False
+        self._closing = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set(self, key: str, text: str):
+        """Set the status line for `key` (added at the bottom if new)."""
+        with self._cond:
+            if self._lines.get(key) != text:
+                self._lines[key] = text
+                self._dirty = True
+                self._cond.notify()
+
+    def remove(self, key: str):
+        with self._cond:
+            if self._lines.pop(key, None) is not None:
+                self._dirty = True
+                self._cond.notify()
+
+    def log(self, text: str):
+        """Print a permanent line above the board."""
+        with self._cond:
+            self._logs.append(text)
+            self._dirty = True
+            self._cond.notify()
+
+    def _frame_tty(self, lines: list[str], logs: list[str]) -> str:
+        width, height = get_console_size()
+        limit = max(1, height - 1)
+        if len(lines) > limit:
+            hidden = len(lines) - limit + 1
+            lines = lines[:limit - 1] + [f"... and {hidden} more"]
+        lines = [line[:width - 1] for line in lines]   # never wrap, or the cursor math breaks
+
+        parts: list[str] = []
+        if self._drawn:
+            parts.append(f"\r\033[{len(self._drawn)}A")   # back to the top of the board
+        if logs:
+            # logs push the board down: everything below them is redrawn
+            parts.append(_CLEAR_EOS + "".join(f"{log}\n" for log in logs))
+            self._drawn = []
+        for i, line in enumerate(lines):
+            if i < len(self._drawn) and self._drawn[i] == line:
+                parts.append("\n")
+            else:
+                parts.append(f"{line}{_CLEAR_EOL}\n")
+        if len(lines) < len(self._drawn):
+            parts.append(_CLEAR_EOS)
+        self._drawn = lines
+        return "".join(parts)
+
+    def _frame_plain(self, lines: dict[str, str], logs: list[str]) -> str:
+        parts = [f"{log}\n" for log in logs]
+        for key, text in lines.items():
+            if self._printed.get(key) != text:
+                parts.append(f"{text}\n")
+        self._printed = dict(lines)
+        return "".join(parts)
+
+    def render(self):
+        """Draw the current state now (the background thread calls this)."""
+        with self._cond:
+            lines = dict(self._lines)
+            logs, self._logs = self._logs, []
+            self._dirty = False
+        frame = self._frame_tty(list(lines.values()), logs) if self.is_tty else self._frame_plain(lines, logs)
+        if frame:
+            try:
+                self.out.write(frame)
+                self.out.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            self.render()
+            self._closing.wait(self.interval)   # coalesce everything that changes in the meantime
+
+    def start(self) -> "StatusBoard":
+        self._thread = threading.Thread(target=self._run, name="StatusBoard", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the thread and draw the final state."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._closing.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.render()
+
+    def __enter__(self) -> "StatusBoard":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
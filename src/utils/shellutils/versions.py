@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import subprocess
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Mapping, Optional, Sequence
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.shellutils.which import Which
+    from utils.file_utils import write_if_changed
+except ModuleNotFoundError:
+    from .which import Which
+    from ..file_utils import write_if_changed
+
+_VERSION_RE = re.compile(r"(\d+)\.(\d+)(?:\.(\d+))?")
+
+DEFAULT_ARGS = ("--version",)
+
+@dataclass(frozen=True)
+class ToolVersion:
+    tool: str
+    path: str                            # realpath of the binary that was probed
+    version: Optional[tuple[int, ...]]   # None if the output had no version number
+    raw: str                             # first non-empty line of the probe output
+
+    def __str__(self) -> str:
+        return ".".join(map(str, self.version)) if self.version else self.raw
+
+def parse_version(text: str) -> Optional[tuple[int, ...]]:
+    """
+    Find the first dotted version number in a tool's version banner,
+    e.g. "Verilator 5.020 2024-01-01" -> (5, 20), "slang version 7.0.1+ab" -> (7, 0, 1).
+    Returns:
+        The version as a tuple of ints, or None if there is none
+    """
+    m = _VERSION_RE.search(text)
+    if m is None:
+        return None
+    return tuple(int(g) for g in m.groups() if g is not None)
+
+def _default_cache_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "utils", "tool_versions.json")
+
+class VersionCache:
+    """
+    On-disk `realpath -> (size, mtime_ns, args) -> version` table, so a tool's
+    version probe subprocess only runs again when the binary itself changes
+    (it was upgraded, rebuilt or PATH now points at another one).
+    """
+
+    def __init__(self, path: Optional[str | Path] = None):
+        self.path = str(path) if path is not None else _default_cache_path()
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.path) as f:
+                self.entries: dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def _stamp(st: os.stat_result, args: Sequence[str]) -> list:
+        return [st.st_size, st.st_mtime_ns, list(args)]
+
+    def get(self, realpath: str, st: os.stat_result, args: Sequence[str]) -> Optional[dict]:
+        with self._lock:
+            entry = self.entries.get(realpath)
+        if entry is not None and entry.get("stamp") == self._stamp(st, args):
+            return entry
+        return None
+
+    def put(self, realpath: str, st: os.stat_result, args: Sequence[str], raw: str):
+        with self._lock:
+            self.entries[realpath] = {"stamp": self._stamp(st, args), "raw": raw}
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            write_if_changed(self.path, json.dumps(self.entries, indent=1, sort_keys=True))
+            self._dirty = False
+
+def _run_probe(path: str, args: Sequence[str], timeout: float) -> str:
+    try:
+        proc = subprocess.run([path, *args], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    text = proc.stdout.decode(errors="replace")
+    return next((line.strip() for line in text.splitlines() if line.strip()), "")
+
+def probe_versions(tools: Iterable[str] | Mapping[str, Sequence[str]], cache: Optional[VersionCache] = None,
+                   timeout: float = 10.0, max_workers: Optional[int] = None,
+                   on_missing_action: Which.OnMissingAction = Which.OnMissingAction.ERROR_AND_RAISE) -> dict[str, Optional[ToolVersion]]:
+    """
+    Get the versions of several tools, running `<tool> --version` only for binaries
+    whose (realpath, size, mtime) isn't in the cache yet; those probes run in parallel.
+
+    Args:
+        tools: tool names, or a mapping of tool name -> probe arguments (default `--version`).
+        cache: the VersionCache to use (default: one at ~/.cache/utils/tool_versions.json).
+        timeout: seconds to wait for each probe.
+        max_workers: parallel probes (default: one per uncached tool).
+        on_missing_action: what to do about tools not in PATH (see Which.resolve_all).
+
+    Returns:
+        A dict of tool -> ToolVersion, or None for missing tools.
+    """
+    if not isinstance(tools, Mapping):
+        tools = {tool: DEFAULT_ARGS for tool in tools}
+    if cache is None:
+        cache = VersionCache()
+    found = Which.resolve_all(tools, on_missing_action=on_missing_action)
+
+    results: dict[str, Optional[ToolVersion]] = {}
+    todo: list[tuple[str, str, os.stat_result]] = []
+    for tool, path in found.items():
+        if path is None:
+            results[tool] = None
+            continue
+        realpath = os.path.realpath(path)
+        st = os.stat(realpath)
+        entry = cache.get(realpath, st, tools[tool])
+        if entry is not None:
+            results[tool] = ToolVersion(tool, realpath, parse_version(entry["raw"]), entry["raw"])
+        else:
+            todo.append((tool, realpath, st))
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max_workers or len(todo)) as pool:
+            outputs = list(pool.map(lambda item: _run_probe(item[1], tools[item[0]], timeout), todo))
+        for (tool, realpath, st), raw in zip(todo, outputs):
+            if raw:
+                cache.put(realpath, st, tools[tool], raw)  # failed probes are retried next time
+            results[tool] = ToolVersion(tool, realpath, parse_version(raw), raw)
+        cache.save()
+    return {tool: results[tool] for tool in found}
+
+def check_min_versions(minimums: Mapping[str, str | tuple[int, ...]], cache: Optional[VersionCache] = None,
+                       **kwargs) -> dict[str, Optional[ToolVersion]]:
+    """
+    Enforce minimum tool versions, e.g. `{"verilator": "5.020", "slang": "7.0"}`.
+    Every tool that is too old (or whose version can't be parsed) is reported in one error.
+
+    Returns:
+        The probed versions (see probe_versions).
+    """
+    wanted = {tool: (parse_version(v) or ()) if isinstance(v, str) else tuple(v) for tool, v in minimums.items()}
+    versions = probe_versions(list(wanted), cache=cache, **kwargs)
+    too_old = [
+        f"{tool} {v if v.version else 'unknown version'} < {'.'.join(map(str, wanted[tool]))}"
+        for tool, v in versions.items()
+        if v is not None and (v.version is None or v.version < wanted[tool])
+    ]
+    if too_old:
+        raise RuntimeError("tools too old: " + "; ".join(too_old))
+    return versions
@@ -1,14 +1,96 @@
 from enum import Enum
 import os
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 import shutil
 
 # can be imported as part of the pyutils package or just as directory imports, so we handle both cases
 try:
-    from utils.colors import AnsiColorsTool
+    from utils.shellutils.writer import get_console_writer
 except ModuleNotFoundError:
-    from colors.ansi import AnsiColorsTool
+    from .writer import get_console_writer
+
+class WhichRegistry:
+    """
+    Memoized PATH lookup for many tools at once.
+
+    Each PATH directory is listed once (os.scandir) and its listing reused
+    until the directory's mtime changes, and results are cached per
+    (PATH, tool), so resolving a whole tool manifest costs one stat per PATH
+    directory instead of one per directory per tool.  Changing PATH, or
+    adding/removing files in a PATH directory, invalidates the affected results.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listings: dict[str, tuple[int, frozenset[str]]] = {}   # dir -> (mtime_ns, names)
+        self._results: dict[tuple[str, str], tuple[tuple, Optional[str]]] = {}   # (PATH, tool) -> (stamp, path)
+
+    def invalidate(self):
+        """Forget everything (e.g. after chmod'ing a tool, which doesn't change its directory)."""
+        with self._lock:
+            self._listings.clear()
+            self._results.clear()
+
+    def _listing(self, d: str, mtime_ns: int) -> frozenset[str]:
+        cached = self._listings.get(d)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        try:
+            with os.scandir(d) as it:
+                names = frozenset(entry.name for entry in it)
+        except OSError:
+            names = frozenset()
+        self._listings[d] = (mtime_ns, names)
+        return names
+
+    def resolve_all(self, tools: Iterable[str], path: Optional[str] = None) -> dict[str, Optional[Path]]:
+        """
+        Look up every tool in `tools` on `path` (default: $PATH) in one pass.
+        Returns:
+            A dict of tool -> Path of the first executable match, or None if missing.
+        """
+        if path is None:
+            path = os.environ.get("PATH", os.defpath)
+        if os.name == "nt":
+            return {tool: (Path(found) if (found := shutil.which(tool, path=path)) else None) for tool in tools}
+        dirs = list(dict.fromkeys(d for d in path.split(os.pathsep) if d))
+        mtimes = []
+        for d in dirs:
+            try:
+                mtimes.append(os.stat(d).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        stamp = tuple(mtimes)
+
+        found: dict[str, Optional[Path]] = {}
+        with self._lock:
+            for tool in tools:
+                if os.sep in tool:
+                    # a path, not a name: check it directly, like shutil.which
+                    ok = os.path.isfile(tool) and os.access(tool, os.X_OK)
+                    found[tool] = Path(tool) if ok else None
+                    continue
+                cached = self._results.get((path, tool))
+                if cached is None or cached[0] != stamp:
+                    match = None
+                    for d, mtime_ns in zip(dirs, mtimes):
+                        if mtime_ns is None or tool not in self._listing(d, mtime_ns):
+                            continue
+                        candidate = os.path.join(d, tool)
+                        if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+                            match = candidate
+                            break
+                    cached = self._results[(path, tool)] = (stamp, match)
+                found[tool] = None if cached[1] is None else Path(cached[1])
+        return found
+
+    def resolve(self, tool: str, path: Optional[str] = None) -> Optional[Path]:
+        """Look up one tool (see resolve_all)."""
+        return self.resolve_all((tool,), path)[tool]
+
+_registry = WhichRegistry()
 
 class Which:
     """
@@ -47,7 +129,8 @@ class Which:
             else:
                 return Path(self.tool_bin_path)
         else:
-            if shutil.which(self.tool_name) is None:
+            found = _registry.resolve(self.tool_name)
+            if found is None:
                 if self.on_missing_action == self.OnMissingAction.ERROR or self.on_missing_action == self.OnMissingAction.ERROR_AND_RAISE:
                     self._print_error(f"error: {self.tool_name} not found in PATH\n")
                     self._print_install_instructions(self.tool_name)
@@ -58,30 +141,52 @@ class Which:
                     self._print_install_instructions(self.tool_name)
                 return None
             else:
-                return Path(shutil.which(self.tool_name))
+                return found
+
+    @classmethod
+    def resolve_all(cls, tool_names: Iterable[str], on_missing_action: OnMissingAction = OnMissingAction.ERROR_AND_RAISE) -> dict[str, Optional[Path]]:
+        """
+        Check a whole manifest of tools in one PATH scan.  Unlike calling Which
+        per tool, every missing tool is reported together (with install instructions
+        for each) before raising, so users can install everything in one go.
+
+        Returns a dict of tool name -> path to the tool, or None if it is missing.
+        """
+        found = _registry.resolve_all(dict.fromkeys(tool_names))
+        missing = [tool for tool, path in found.items() if path is None]
+        if missing and on_missing_action != cls.OnMissingAction.QUIET:
+            which = cls(missing[0], on_missing_action=on_missing_action)
+            if on_missing_action == cls.OnMissingAction.WARNING:
+                which._print_warning(f"warning: not found in PATH: {', '.join(missing)}\n")
+            else:
+                which._print_error(f"error: not found in PATH: {', '.join(missing)}\n")
+            for tool in missing:
+                which._print_install_instructions(tool)
+            if on_missing_action == cls.OnMissingAction.ERROR_AND_RAISE:
+                raise FileNotFoundError(f"not found in PATH: {', '.join(missing)}")
+        return found
 
     def _print_error(self, message: str):
         """Print error message in red."""
-        ansi = AnsiColorsTool()
-        print(ansi.bright_red(message), end='')
+        get_console_writer().error(message)
 
     def _print_warning(self, message: str):
         """Print warning message in yellow."""
-        ansi = AnsiColorsTool()
-        print(ansi.bright_yellow(message), end='')
+        get_console_writer().warning(message)
 
     def _print_install_instructions(self, tool_name: str):
         """
         Print helpful instructions for installing a tool if it is not found in PATH.
         """
-        ansi = AnsiColorsTool()
+        out = get_console_writer()
+        ansi = out.ansi
         if tool_name == 'delta':
-            print(f"Please install {ansi.bold}delta{ansi.reset}:")
-            print("  (macOS) brew install git-delta")
-            print("  (Ubuntu/Debian) sudo apt install delta")
+            out.print(f"Please install {ansi.bold}delta{ansi.reset}:")
+            out.print("  (macOS) brew install git-delta")
+            out.print("  (Ubuntu/Debian) sudo apt install delta")
         elif tool_name == 'slang':
-            print(f"Please install {ansi.bold}slang{ansi.reset}")
-            print(f"""
+            out.print(f"Please install {ansi.bold}slang{ansi.reset}")
+            out.print(f"""
 Instructions to compile and install slang areavailable in {ansi.bright_blue}https://github.com/MikePopoloski/slang.git{ansi.reset} 
 repo's README.md.  
 
@@ -94,5 +199,5 @@ Roughly, it will be something like this:
 """)
         else:
             # if we don't know how to install it, just print a generic message
-            print(f"Please install {ansi.bold}{tool_name}{ansi.reset}.")
-
+            out.print(f"Please install {ansi.bold}{tool_name}{ansi.reset}.")
+        out.flush()   # the caller may be about to raise
@@ -0,0 +1,116 @@
+import sys
+import atexit
+import threading
+from typing import IO, Optional
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.colors import AnsiColorsTool
+except ModuleNotFoundError:
+    from colors.ansi import AnsiColorsTool
+
+class ConsoleWriter:
+    """
+    Buffered, thread-safe console output with one shared color table.
+
+    Text is collected in memory and written in large chunks once `max_buffer`
+    characters are pending, `flush_interval` seconds after the first pending
+    write, on `flush()`, or at exit.  Every `write()`/`print()` call is added
+    whole, so parallel workers sharing a writer never interleave partial lines.
+
+    `stream=None` means "whatever sys.stdout is when flushing", so redirections
+    made after the writer was created are honored.
+
+    Usage:
+
+        out = ConsoleWriter()
+        for row in rows:
+            out.print(row.name, out.ansi.green("ok") if row.ok else out.ansi.red("FAIL"))
+        out.flush()
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, ansi: Optional[AnsiColorsTool] = None,
+                 max_buffer: int = 64 * 1024, flush_interval: float = 0.1):
+        self._stream = stream
+        self.ansi = ansi or AnsiColorsTool.shared()
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self._parts: list[str] = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    @property
+    def stream(self) -> IO[str]:
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, text: str):
+        """Queue `text` (str() is applied, so ColoredStrings are rendered)."""
+        text = str(text)
+        if not text:
+            return
+        with self._lock:
+            self._parts.append(text)
+            self._size += len(text)
+            if self._size < self.max_buffer:
+                if self._timer is None and self.flush_interval is not None:
+                    self._timer = threading.Timer(self.flush_interval, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def print(self, *args, sep: str = " ", end: str = "\n", color: Optional[str] = None):
+        """Like print(), optionally in `color` (any AnsiColorsTool color name)."""
+        text = sep.join(str(a) for a in args)
+        if color is not None:
+            text = self.ansi[color](text)
+        self.write(f"{text}{end}")
+
+    def error(self, message: str):
+        """Queue `message` in bright red."""
+        self.write(self.ansi.bright_red(message))
+
+    def warning(self, message: str):
+        """Queue `message` in bright yellow."""
+        self.write(self.ansi.bright_yellow(message))
+
+    def flush(self):
+        """Write everything pending in one write."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._parts:
+                return
+            text = "".join(self._parts)
+            self._parts, self._size = [], 0
+            # write under the lock, so concurrent flushes keep their order
+            try:
+                self.stream.write(text)
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass   # stream closed (e.g. at interpreter exit)
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def __enter__(self) -> "ConsoleWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+_console: Optional[ConsoleWriter] = None
+_console_lock = threading.Lock()
+
+def get_console_writer() -> ConsoleWriter:
+    """The shared ConsoleWriter for sys.stdout."""
+    global _console
+    if _console is None:
+        with _console_lock:
+            if _console is None:
+                _console = ConsoleWriter()
+    return _console
@@ -11,7 +11,9 @@ try:
         raise_recursion_limit,
         get_recursion_limit,
         get_stack_limit,
-        raise_stack_limit
+        raise_stack_limit,
+        run_with_deep_stack,
+        DeepStackExecutor
     )
 except ModuleNotFoundError:
     from .ulimits import ( 
@@ -19,8 +21,50 @@ except ModuleNotFoundError:
         raise_recursion_limit,
         get_recursion_limit, 
         get_stack_limit, 
-        raise_stack_limit
+        raise_stack_limit,
+        run_with_deep_stack,
+        DeepStackExecutor
     ) 
+try:
+    from utils.system.cgroups import (
+        get_cgroup_cpu_quota,
+        get_cgroup_memory_limit,
+        get_cgroup_memory_usage,
+        get_cgroup_memory_high,
+        get_cgroup_cpuset,
+        get_cgroup_pids,
+        get_available_memory_bytes
+    )
+    from utils.system.limits import SystemLimits
+    from utils.system.executor import (
+        get_cpu_worker_count,
+        get_worker_count,
+        MemoryAwareExecutor,
+        make_executor
+    )
+    from utils.system.governor import ChildLimits, ChildUsage, UsageLog, run_limited
+    from utils.system.sampler import ResourceSampler
+    from utils.system.topology import Cpu, CpuTopology, read_topology, get_topology, make_pinning_initializer
+except ModuleNotFoundError:
+    from .cgroups import (
+        get_cgroup_cpu_quota,
+        get_cgroup_memory_limit,
+        get_cgroup_memory_usage,
+        get_cgroup_memory_high,
+        get_cgroup_cpuset,
+        get_cgroup_pids,
+        get_available_memory_bytes
+    )
+    from .limits import SystemLimits
+    from .executor import (
+        get_cpu_worker_count,
+        get_worker_count,
+        MemoryAwareExecutor,
+        make_executor
+    )
+    from .governor import ChildLimits, ChildUsage, UsageLog, run_limited
+    from .sampler import ResourceSampler
+    from .topology import Cpu, CpuTopology, read_topology, get_topology, make_pinning_initializer
 
 __all__ = [
     "get_nprocs", 
@@ -28,5 +72,29 @@ __all__ = [
     "raise_recursion_limit", 
     "get_recursion_limit", 
     "get_stack_limit", 
-    "raise_stack_limit"
-]
\ No newline at end of file
+    "raise_stack_limit",
+    "run_with_deep_stack",
+    "DeepStackExecutor",
+    "get_cgroup_cpu_quota",
+    "get_cgroup_memory_limit",
+    "get_cgroup_memory_usage",
+    "get_cgroup_memory_high",
+    "get_cgroup_cpuset",
+    "get_cgroup_pids",
+    "get_available_memory_bytes",
+    "SystemLimits",
+    "get_cpu_worker_count",
+    "get_worker_count",
+    "MemoryAwareExecutor",
+    "make_executor",
+    "ChildLimits",
+    "ChildUsage",
+    "UsageLog",
+    "run_limited",
+    "ResourceSampler",
+    "Cpu",
+    "CpuTopology",
+    "read_topology",
+    "get_topology",
+    "make_pinning_initializer"
+]
@@ -0,0 +1,258 @@
+import os
+import sys
+import functools
+from typing import Optional
+
+_CGROUP_ROOT = "/sys/fs/cgroup"
+
+# cgroup v1 reports "no limit" as a huge page-rounded number rather than "max"
+_V1_UNLIMITED = 1 << 60
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+def _read_int(path: str) -> Optional[int]:
+    text = _read(path)
+    try:
+        return None if text is None else int(text)
+    except ValueError:
+        return None
+
+def _read_stat_field(path: str, field: str) -> Optional[int]:
+    text = _read(path)
+    if text is None:
+        return None
+    for line in text.splitlines():
+        name, _, value = line.partition(" ")
+        if name == field:
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+def parse_cpu_list(text: str) -> set[int]:
+    """
+    Parse the kernel's cpu list format, e.g. "0-3,8,10-11".
+    Returns:
+        The set of CPU numbers
+    """
+    cpus: set[int] = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+@functools.lru_cache(maxsize=None)
+def _cgroup_dirs() -> tuple[tuple[str, ...], dict[str, tuple[str, ...]]]:
+    # (v2 dirs, {v1 controller: dirs}) from /proc/self/cgroup, each ordered from our
+    # own cgroup up to the mount root so hierarchical limits can be combined
+    def _chain(mount: str, rel: str) -> tuple[str, ...]:
+        if not os.path.isdir(mount):
+            return ()
+        dirs: list[str] = []
+        rel = rel.strip("/")
+        while True:
+            d = os.path.join(mount, rel) if rel else mount
+            if os.path.isdir(d):   # in a container the host-side path may not be mounted
+                dirs.append(d)
+            if not rel:
+                return tuple(dirs)
+            rel = os.path.dirname(rel)
+
+    text = _read("/proc/self/cgroup")
+    if text is None:
+        return (), {}
+    v2: tuple[str, ...] = ()
+    v1: dict[str, tuple[str, ...]] = {}
+    pure_v2 = os.path.exists(f"{_CGROUP_ROOT}/cgroup.controllers")
+    for line in text.splitlines():
+        try:
+            _hier, controllers, path = line.split(":", 2)
+        except ValueError:
+            continue
+        if controllers == "":
+            v2 = _chain(_CGROUP_ROOT if pure_v2 else f"{_CGROUP_ROOT}/unified", path)
+        else:
+            for controller in controllers.split(","):
+                v1[controller] = (_chain(f"{_CGROUP_ROOT}/{controllers}", path)
+                                  or _chain(f"{_CGROUP_ROOT}/{controller}", path))
+    return v2, v1
+
+def reset_cgroup_cache():
+    """Forget which cgroup we are in (it is looked up once and cached)."""
+    _cgroup_dirs.cache_clear()
+
+def _v2_dir() -> Optional[str]:
+    dirs = _cgroup_dirs()[0]
+    return dirs[0] if dirs else None
+
+def _v2_has(name: str) -> bool:
+    d = _v2_dir()
+    return d is not None and os.path.exists(os.path.join(d, name))
+
+def _v2_limit(name: str) -> Optional[int]:
+    # the effective v2 limit is the smallest one on the way up to the root
+    limits = []
+    for d in _cgroup_dirs()[0]:
+        text = _read(os.path.join(d, name))
+        if text is not None and text.isdigit():
+            limits.append(int(text))
+    return min(limits) if limits else None
+
+def _v1_dir(controller: str) -> Optional[str]:
+    dirs = _cgroup_dirs()[1].get(controller)
+    return dirs[0] if dirs else None
+
+def get_cgroup_cpu_quota_us() -> Optional[tuple[int, int]]:
+    """
+    Get the raw cgroup CPU quota and period (v2 `cpu.max` or v1 `cpu.cfs_quota_us`/`cpu.cfs_period_us`).
+    Returns:
+        (quota_us, period_us) of the tightest quota, or None if unlimited/unknown
+    """
+    try:
+        best: Optional[tuple[int, int]] = None
+        for d in _cgroup_dirs()[0]:
+            text = _read(os.path.join(d, "cpu.max"))
+            if text is None:
+                continue
+            quota, period = text.split()
+            if quota != "max" and (best is None or int(quota) / int(period) < best[0] / best[1]):
+                best = (int(quota), int(period))
+        if best is not None or _v2_has("cpu.max"):
+            return best
+        d = _v1_dir("cpu")
+        if d is not None:
+            q, p = _read_int(f"{d}/cpu.cfs_quota_us"), _read_int(f"{d}/cpu.cfs_period_us")
+            if q is not None and p is not None and q > 0 and p > 0:
+                return q, p
+    except (ValueError, ZeroDivisionError):
+        pass  # malformed; treat as unknown
+    return None
+
+def get_cgroup_cpu_quota() -> Optional[float]:
+    """
+    Get the cgroup CPU quota (cgroups v2 `cpu.max` or v1 `cpu.cfs_quota_us`).
+    Returns:
+        The quota in CPUs (may be fractional), or None if unlimited/unknown
+    """
+    raw = get_cgroup_cpu_quota_us()
+    return None if raw is None else raw[0] / raw[1]
+
+def get_cgroup_cpuset() -> Optional[set[int]]:
+    """
+    Get the CPUs the cgroup lets us run on (v2 `cpuset.cpus.effective` or v1 `cpuset.effective_cpus`).
+    Returns:
+        The set of CPU numbers, or None if unknown
+    """
+    candidates = []
+    d = _v2_dir()
+    if d is not None:
+        candidates.append(os.path.join(d, "cpuset.cpus.effective"))
+    d = _v1_dir("cpuset")
+    if d is not None:
+        candidates += [f"{d}/cpuset.effective_cpus", f"{d}/cpuset.cpus"]
+    for path in candidates:
+        text = _read(path)
+        if text:
+            try:
+                return parse_cpu_list(text)
+            except ValueError:
+                return None
+    return None
+
+def get_cgroup_memory_limit() -> Optional[int]:
+    """
+    Get the cgroup memory limit (cgroups v2 `memory.max` or v1 `memory.limit_in_bytes`).
+    Returns:
+        The limit in bytes, or None if unlimited/unknown
+    """
+    if _v2_has("memory.max"):
+        return _v2_limit("memory.max")
+    d = _v1_dir("memory")
+    if d is None:
+        return None
+    # v1 reports the limit inherited from ancestors in memory.stat
+    v1 = _read_stat_field(f"{d}/memory.stat", "hierarchical_memory_limit") or _read_int(f"{d}/memory.limit_in_bytes")
+    if v1 is not None and v1 < _V1_UNLIMITED:
+        return v1
+    return None
+
+def get_cgroup_memory_high() -> Optional[int]:
+    """
+    Get the cgroup v2 `memory.high` throttling threshold.
+    Returns:
+        The threshold in bytes, or None if unset/unknown (v1 has no equivalent)
+    """
+    return _v2_limit("memory.high")
+
+def get_cgroup_memory_usage() -> Optional[int]:
+    """
+    Get the cgroup's current memory usage (v2 `memory.current` or v1 `memory.usage_in_bytes`),
+    not counting inactive page cache (`inactive_file`), which the kernel reclaims under pressure.
+    Returns:
+        The usage in bytes, or None if unknown
+    """
+    d = _v2_dir()
+    usage = None if d is None else _read_int(os.path.join(d, "memory.current"))
+    if usage is not None:
+        inactive = _read_stat_field(os.path.join(d, "memory.stat"), "inactive_file")
+    else:
+        d = _v1_dir("memory")
+        usage = None if d is None else _read_int(f"{d}/memory.usage_in_bytes")
+        if usage is None:
+            return None
+        inactive = _read_stat_field(f"{d}/memory.stat", "total_inactive_file")
+    return max(0, usage - (inactive or 0))
+
+def get_cgroup_pids() -> tuple[Optional[int], Optional[int]]:
+    """
+    Get the cgroup's process count and `pids.max` limit.
+    Returns:
+        (current, max); either is None if unknown/unlimited
+    """
+    d = _v2_dir()
+    if d is not None and _v2_has("pids.current"):
+        return _read_int(os.path.join(d, "pids.current")), _v2_limit("pids.max")
+    d = _v1_dir("pids")
+    if d is None:
+        return None, None
+    return _read_int(f"{d}/pids.current"), _read_int(f"{d}/pids.max")
+
+def _get_meminfo_available() -> Optional[int]:
+    text = _read("/proc/meminfo")
+    if text is None:
+        return None
+    for line in text.splitlines():
+        if line.startswith("MemAvailable:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+def get_available_memory_bytes() -> int:
+    """
+    Get the memory still available to this process: the smaller of the cgroup
+    headroom (`memory.max` minus current usage) and the host's MemAvailable.
+    Returns:
+        int: Available memory in bytes
+    """
+    candidates: list[int] = []
+    limit = get_cgroup_memory_limit()
+    if limit is not None:
+        candidates.append(max(0, limit - (get_cgroup_memory_usage() or 0)))
+    available = _get_meminfo_available()
+    if available is not None:
+        candidates.append(available)
+    if not candidates:
+        # no /proc (macOS): fall back to physical memory
+        try:
+            candidates.append(os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE"))
+        except (ValueError, OSError, AttributeError):
+            candidates.append(sys.maxsize)
+    return min(candidates)
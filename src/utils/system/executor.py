@@ -0,0 +1,140 @@
+import time
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+# can be imported as part of the utils package or just as directory imports, so we handle both cases
+try:
+    from utils.system.limits import SystemLimits
+    from utils.system.cgroups import get_available_memory_bytes
+    from utils.system.topology import get_topology, make_pinning_initializer
+except ModuleNotFoundError:
+    from .limits import SystemLimits
+    from .cgroups import get_available_memory_bytes
+    from .topology import get_topology, make_pinning_initializer
+
+def get_cpu_worker_count() -> int:
+    """
+    Get the number of CPUs we can actually keep busy: get_nprocs(), further capped
+    by the cgroup `cpu.max` quota (get_nprocs only looks at the quota when there
+    is no affinity API).
+    Returns:
+        int: Number of CPUs, at least 1
+    """
+    return SystemLimits.current().effective_cpus
+
+def get_worker_count(task_memory_bytes: Optional[int] = None, max_workers: Optional[int] = None) -> int:
+    """
+    Get a worker count for a pool of CPU-bound tasks that each need about
+    `task_memory_bytes` of memory.
+    Args:
+        task_memory_bytes: caller's per-task memory estimate.  None ignores memory.
+        max_workers: an upper bound of the caller's own.
+    Returns:
+        int: min(CPU workers, available memory / task memory, max_workers), at least 1
+    """
+    workers = get_cpu_worker_count()
+    if task_memory_bytes:
+        workers = min(workers, get_available_memory_bytes() // task_memory_bytes)
+    if max_workers is not None:
+        workers = min(workers, max_workers)
+    return max(1, int(workers))
+
+class MemoryAwareExecutor(Executor):
+    """
+    Executor wrapper that admits tasks only while there is memory for them.
+
+    `submit` blocks (throttles the caller) until a task slot is free and the
+    available memory (cgroup headroom or MemAvailable) covers `task_memory_bytes`
+    for the new task plus every task admitted in the last `ramp_seconds`, which
+    may not have allocated their memory yet.  Memory is re-checked every
+    `poll_interval` seconds while waiting, so workers are admitted again as soon
+    as pressure drops.  One task is always admitted when nothing is running.
+    """
+
+    def __init__(self, inner: Executor, max_workers: int, task_memory_bytes: int,
+                 poll_interval: float = 0.25, ramp_seconds: float = 2.0,
+                 available_memory: Callable[[], int] = get_available_memory_bytes):
+        self.inner = inner
+        self.max_workers = max_workers
+        self.task_memory_bytes = task_memory_bytes
+        self.poll_interval = poll_interval
+        self.ramp_seconds = ramp_seconds
+        self._available_memory = available_memory
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._recent_starts: list[float] = []
+        self._shutdown = False
+
+    def _can_admit(self) -> bool:
+        if self._shutdown or self._in_flight == 0:
+            return True
+        if self._in_flight >= self.max_workers:
+            return False
+        now = time.monotonic()
+        self._recent_starts = [t for t in self._recent_starts if now - t < self.ramp_seconds]
+        needed = self.task_memory_bytes * (1 + len(self._recent_starts))
+        return self._available_memory() >= needed
+
+    def _task_done(self, _future: Future):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._cond:
+            while not self._can_admit():
+                self._cond.wait(self.poll_interval)
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._in_flight += 1
+            self._recent_starts.append(time.monotonic())
+        try:
+            future = self.inner.submit(fn, *args, **kwargs)
+        except BaseException:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()   # wake throttled submitters so they fail fast
+        self.inner.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+def make_executor(kind: str = "process", task_memory_bytes: Optional[int] = None,
+                  max_workers: Optional[int] = None, pin: Optional[str] = None, **kwargs) -> Executor:
+    """
+    Create a pool sized for this machine/container rather than by CPU count alone.
+
+    Args:
+        kind: "process" (ProcessPoolExecutor) or "thread" (ThreadPoolExecutor).
+        task_memory_bytes: per-task memory estimate.  When given, the pool is wrapped
+            in a MemoryAwareExecutor that keeps throttling as memory pressure changes.
+        max_workers: an upper bound on the worker count.
+        pin: pin each worker with os.sched_setaffinity: "core" (one worker per physical
+            core, spread over NUMA nodes) or "node" (pack workers within NUMA nodes).
+            "core" also caps the pool at the number of physical cores.
+        kwargs: passed through to the underlying executor (initializer, mp_context, ...).
+
+    Returns:
+        The executor; use it as a context manager like any other.
+    """
+    pool_cls = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}.get(kind)
+    if pool_cls is None:
+        raise ValueError(f"unknown executor kind: {kind}")
+    if pin == "core":
+        cores = len(get_topology().cores)
+        max_workers = min(max_workers, cores) if max_workers is not None else cores
+    cpu_workers = get_worker_count(max_workers=max_workers)
+    if pin is not None:
+        kwargs["initializer"], kwargs["initargs"] = make_pinning_initializer(
+            pin, cpu_workers, kwargs.get("initializer"), kwargs.get("initargs", ()),
+            mp_context=kwargs.get("mp_context"))
+    if task_memory_bytes is None:
+        return pool_cls(max_workers=cpu_workers, **kwargs)
+    # size the inner pool by CPU only; memory admission happens per task
+    return MemoryAwareExecutor(pool_cls(max_workers=cpu_workers, **kwargs), cpu_workers, task_memory_bytes)
@@ -0,0 +1,177 @@
+import os
+import csv
+import json
+import time
+import resource
+import threading
+import subprocess
+from dataclasses import dataclass, asdict, field
+from typing import Optional, Sequence
+
+# rlimit name -> ChildLimits field
+_LIMIT_FIELDS = {
+    "address_space": resource.RLIMIT_AS,
+    "stack": resource.RLIMIT_STACK,
+    "cpu_seconds": resource.RLIMIT_CPU,
+    "nofile": resource.RLIMIT_NOFILE,
+}
+
+@dataclass(frozen=True)
+class ChildLimits:
+    """
+    Resource limits to apply to one child process (not to ourselves).
+
+    Each field lowers the child's soft limit (and raises it up to the hard
+    limit where allowed); None leaves that limit alone.  Use `apply` as a
+    `preexec_fn`, or `apply_to(pid)` to set them from outside with prlimit(2)
+    (Linux), which is safe to use from threaded programs.
+    """
+    address_space: Optional[int] = None  # bytes (RLIMIT_AS)
+    stack: Optional[int] = None          # bytes (RLIMIT_STACK)
+    cpu_seconds: Optional[int] = None    # RLIMIT_CPU, child gets SIGXCPU then SIGKILL
+    nofile: Optional[int] = None         # open files (RLIMIT_NOFILE)
+
+    def _targets(self, get_current) -> list[tuple[int, tuple[int, int]]]:
+        targets = []
+        for name, which in _LIMIT_FIELDS.items():
+            value = getattr(self, name)
+            if value is None:
+                continue
+            _soft, hard = get_current(which)
+            soft = value if hard == resource.RLIM_INFINITY else min(value, hard)
+            targets.append((which, (soft, hard)))
+        return targets
+
+    def apply(self):
+        """Apply the limits to the current process (call from preexec_fn)."""
+        for which, limits in self._targets(resource.getrlimit):
+            resource.setrlimit(which, limits)
+
+    def apply_to(self, pid: int):
+        """Apply the limits to another process with prlimit(2) (Linux only)."""
+        for which, limits in self._targets(lambda w: resource.prlimit(pid, w)):
+            resource.prlimit(pid, which, limits)
+
+@dataclass
+class ChildUsage:
+    """Accounting record for one finished child process, from os.wait4."""
+    args: list[str]
+    pid: int
+    returncode: int
+    wall_time: float                     # seconds
+    user_time: float                     # seconds
+    sys_time: float                      # seconds
+    max_rss_kb: int
+    limits: Optional[ChildLimits] = None
+    timed_out: bool = False
+
+    @property
+    def cpu_time(self) -> float:
+        return self.user_time + self.sys_time
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["args"] = " ".join(self.args)
+        d["limits"] = None if self.limits is None else {k: v for k, v in asdict(self.limits).items() if v is not None}
+        return d
+
+def run_limited(cmd: Sequence[str], limits: Optional[ChildLimits] = None, timeout: Optional[float] = None,
+                use_prlimit: bool = False, **popen_kwargs) -> ChildUsage:
+    """
+    Run `cmd` to completion under per-child rlimits and account for its resources.
+
+    Args:
+        cmd: the command line.
+        limits: rlimits to apply to the child only.
+        timeout: wall-clock limit in seconds; the child's process group is killed after it.
+        use_prlimit: set the limits with prlimit(2) right after spawning instead of in
+            preexec_fn (safer in threaded programs, but the child runs unlimited for
+            a moment).
+        popen_kwargs: passed to subprocess.Popen (cwd, env, stdout, ...).
+
+    Returns:
+        A ChildUsage record with wall/CPU time and peak RSS from os.wait4.
+    """
+    if limits is not None and not use_prlimit:
+        popen_kwargs["preexec_fn"] = limits.apply
+    popen_kwargs.setdefault("start_new_session", timeout is not None)
+    start = time.monotonic()
+    proc = subprocess.Popen(list(cmd), **popen_kwargs)
+    if limits is not None and use_prlimit:
+        limits.apply_to(proc.pid)
+
+    timed_out = threading.Event()
+    def _kill():
+        timed_out.set()
+        try:
+            if popen_kwargs["start_new_session"]:
+                os.killpg(proc.pid, 9)
+            else:
+                proc.kill()
+        except ProcessLookupError:
+            pass
+    timer = threading.Timer(timeout, _kill) if timeout is not None else None
+    if timer is not None:
+        timer.start()
+    try:
+        while True:
+            try:
+                _pid, status, rusage = os.wait4(proc.pid, 0)
+                break
+            except InterruptedError:
+                continue
+    finally:
+        if timer is not None:
+            timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)  # we reaped it; keep Popen from trying again
+    return ChildUsage(
+        args=[str(a) for a in cmd],
+        pid=proc.pid,
+        returncode=proc.returncode,
+        wall_time=time.monotonic() - start,
+        user_time=rusage.ru_utime,
+        sys_time=rusage.ru_stime,
+        max_rss_kb=rusage.ru_maxrss,
+        limits=limits,
+        timed_out=timed_out.is_set(),
+    )
+
+@dataclass
+class UsageLog:
+    """
+    Thread-safe collection of ChildUsage records, e.g. for a whole regression,
+    to find the heavy tests and bin-pack them.
+    """
+    records: list[ChildUsage] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def add(self, usage: ChildUsage) -> ChildUsage:
+        with self._lock:
+            self.records.append(usage)
+        return usage
+
+    def run(self, cmd: Sequence[str], limits: Optional[ChildLimits] = None, **kwargs) -> ChildUsage:
+        """run_limited(), recording the result."""
+        return self.add(run_limited(cmd, limits, **kwargs))
+
+    def heaviest(self, n: int = 10, key: str = "max_rss_kb") -> list[ChildUsage]:
+        """The `n` records with the largest `key` (max_rss_kb, wall_time, cpu_time, ...)."""
+        with self._lock:
+            return sorted(self.records, key=lambda r: getattr(r, key), reverse=True)[:n]
+
+    def to_json(self, path: str):
+        with self._lock:
+            rows = [r.to_dict() for r in self.records]
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=1)
+
+    def to_csv(self, path: str):
+        with self._lock:
+            rows = [r.to_dict() for r in self.records]
+        columns = ["args", "pid", "returncode", "wall_time", "user_time", "sys_time", "max_rss_kb", "timed_out"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,146 @@
+import os
+import math
+import time
+import resource
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple, Union
+
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.system.cgroups import (
+        get_cgroup_cpu_quota_us,
+        get_cgroup_cpuset,
+        get_cgroup_memory_limit,
+        get_cgroup_memory_high,
+        get_cgroup_memory_usage,
+        get_cgroup_pids,
+        get_available_memory_bytes,
+        reset_cgroup_cache
+    )
+except ModuleNotFoundError:
+    from .cgroups import (
+        get_cgroup_cpu_quota_us,
+        get_cgroup_cpuset,
+        get_cgroup_memory_limit,
+        get_cgroup_memory_high,
+        get_cgroup_memory_usage,
+        get_cgroup_pids,
+        get_available_memory_bytes,
+        reset_cgroup_cache
+    )
+
+Num = Union[int, float]
+
+# rlimits included in a snapshot, by short name
+_RLIMITS = {
+    name: getattr(resource, f"RLIMIT_{name.upper()}")
+    for name in ("as", "data", "rss", "stack", "cpu", "nofile", "nproc", "memlock")
+    if hasattr(resource, f"RLIMIT_{name.upper()}")
+}
+
+DEFAULT_TTL = 1.0  # seconds
+
+def _norm(v: int) -> Num:
+    return math.inf if v == resource.RLIM_INFINITY else v
+
+@dataclass(frozen=True)
+class SystemLimits:
+    """
+    Snapshot of the CPU, memory, process and rlimit constraints we run under:
+    affinity and cgroup cpuset, CPU quota, `memory.max`/`memory.high`/usage,
+    `pids.max` and the rlimits, all read in one pass (cgroups v1 or v2).
+
+    Use `SystemLimits.current()` to get a snapshot cached for `DEFAULT_TTL`
+    seconds; the cache check is a clock read and a compare, so schedulers can
+    call it in their inner loop.  `SystemLimits.refresh()` forces a re-read.
+    """
+    cpus: frozenset[int]                 # affinity mask ∩ cgroup cpuset (empty if unknown)
+    cpu_quota_us: Optional[int]
+    cpu_period_us: Optional[int]
+    memory_max: Optional[int]            # bytes
+    memory_high: Optional[int]           # bytes
+    memory_current: Optional[int]        # bytes, without reclaimable page cache
+    memory_available: int                # bytes, see get_available_memory_bytes
+    pids_max: Optional[int]
+    pids_current: Optional[int]
+    rlimits: Mapping[str, Tuple[Num, Num]] = field(default_factory=dict)  # name -> (soft, hard)
+    taken_at: float = 0.0                # time.monotonic() of the read
+
+    @property
+    def cpu_quota(self) -> Optional[float]:
+        """CPU quota in CPUs (may be fractional), or None if unlimited."""
+        if self.cpu_quota_us is None or not self.cpu_period_us:
+            return None
+        return self.cpu_quota_us / self.cpu_period_us
+
+    @property
+    def cpu_count(self) -> int:
+        """CPUs we may be scheduled on: the affinity/cpuset size, else the quota, else all CPUs."""
+        if self.cpus:
+            return len(self.cpus)
+        quota = self.cpu_quota
+        if quota is not None:
+            return max(1, math.ceil(quota))
+        return os.cpu_count() or 1
+
+    @property
+    def effective_cpus(self) -> int:
+        """CPUs we can keep busy: cpu_count, further capped by the quota."""
+        quota = self.cpu_quota
+        cpus = self.cpu_count
+        return max(1, min(cpus, math.ceil(quota)) if quota is not None else cpus)
+
+    @classmethod
+    def read(cls) -> "SystemLimits":
+        """Read a fresh snapshot (uncached)."""
+        try:
+            cpus = set(os.sched_getaffinity(0))
+        except AttributeError:
+            cpus = set()  # not on macOS/Windows
+        cpuset = get_cgroup_cpuset()
+        if cpus and cpuset:
+            cpus &= cpuset
+        quota = get_cgroup_cpu_quota_us()
+        pids_current, pids_max = get_cgroup_pids()
+        rlimits = {}
+        for name, which in _RLIMITS.items():
+            soft, hard = resource.getrlimit(which)
+            rlimits[name] = (_norm(soft), _norm(hard))
+        return cls(
+            cpus=frozenset(cpus),
+            cpu_quota_us=None if quota is None else quota[0],
+            cpu_period_us=None if quota is None else quota[1],
+            memory_max=get_cgroup_memory_limit(),
+            memory_high=get_cgroup_memory_high(),
+            memory_current=get_cgroup_memory_usage(),
+            memory_available=get_available_memory_bytes(),
+            pids_max=pids_max,
+            pids_current=pids_current,
+            rlimits=MappingProxyType(rlimits),
+            taken_at=time.monotonic(),
+        )
+
+    @classmethod
+    def current(cls, max_age: float = DEFAULT_TTL) -> "SystemLimits":
+        """
+        Get the cached snapshot, re-reading it if it is older than `max_age` seconds.
+        """
+        snap = _snapshot
+        if snap is not None and time.monotonic() - snap.taken_at < max_age:
+            return snap
+        return cls.refresh(reset_cgroups=False)
+
+    @classmethod
+    def refresh(cls, reset_cgroups: bool = True) -> "SystemLimits":
+        """
+        Re-read and cache a new snapshot.  With `reset_cgroups`, also look up
+        again which cgroup we are in (e.g. after being moved to another one).
+        """
+        global _snapshot
+        if reset_cgroups:
+            reset_cgroup_cache()
+        _snapshot = cls.read()
+        return _snapshot
+
+_snapshot: Optional[SystemLimits] = None
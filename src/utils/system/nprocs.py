@@ -1,33 +1,18 @@
-import os, math
+# can be imported as part of the pyutils package or just as directory imports, so we handle both cases
+try:
+    from utils.system.limits import SystemLimits
+except ModuleNotFoundError:
+    from .limits import SystemLimits
 
 def get_nprocs() -> int:
     """
     Get number of effective CPUs, accounting for the fact that we may be in a container.
+
+    This is the affinity mask (intersected with the cgroup's effective cpuset),
+    else the cgroups CPU quota, else the total logical CPUs.  The underlying
+    reads are cached for a short time (see SystemLimits.current), so this is
+    cheap enough to call in a loop.
     Returns:
         int: Number of effective CPUs
     """
-    # 1) Affinity (best: respects taskset/cpuset)
-    try:
-        return len(os.sched_getaffinity(0))
-    except AttributeError:
-        pass  # not on macOS/Windows
-
-    # 2) cgroups CPU quota (containers without cpuset)
-    try:
-        # cgroups v2
-        p = "/sys/fs/cgroup/cpu.max"
-        if os.path.exists(p):
-            q, period = open(p).read().split()
-            if q != "max":
-                return max(1, math.ceil(int(q) / int(period)))
-        # cgroups v1
-        q1, p1 = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
-        if os.path.exists(q1) and os.path.exists(p1):
-            q, period = int(open(q1).read()), int(open(p1).read())
-            if q > 0 and period > 0:
-                return max(1, math.ceil(q / period))
-    except Exception:
-        pass  # ignore if not accessible
-
-    # 3) Total logical CPUs
-    return os.cpu_count() or 1
\ No newline at end of file
+    return SystemLimits.current().cpu_count
@@ -0,0 +1,264 @@
+import os
+import csv
+import json
+import time
+import array
+import threading
+from typing import Callable, Iterable, Optional
+
+COLUMNS = (
+    "time",             # seconds since start()
+    "rss_kb",           # VmRSS
+    "hwm_kb",           # VmHWM, our own peak RSS so far
+    "threads",
+    "cpu_user",         # seconds
+    "cpu_sys",          # seconds
+    "read_bytes",       # /proc/self/io rchar
+    "write_bytes",      # /proc/self/io wchar
+    "children",         # live child processes sampled
+    "children_rss_kb",
+    "children_cpu",     # seconds (user + sys) of the live children
+)
+
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_CHILD_SCAN_EVERY = 10   # samples between /proc scans for children, if the kernel lacks task/*/children
+
+ThresholdCallback = Callable[["ResourceSampler", str, float], None]
+
+def _pread(fd: Optional[int]) -> str:
+    # /proc files regenerate on a read at offset 0, so one open fd can be re-read cheaply
+    if fd is None:
+        return ""
+    try:
+        return os.pread(fd, 4096, 0).decode("ascii", "replace")
+    except OSError:
+        return ""
+
+def _open(path: str) -> Optional[int]:
+    try:
+        return os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+
+def _stat_fields(text: str) -> list[str]:
+    # fields after "pid (comm)"; comm may contain spaces and parentheses
+    return text[text.rfind(")") + 2:].split()
+
+class ResourceSampler:
+    """
+    Background thread that samples this process's (and its children's) memory,
+    CPU time and I/O every `interval` seconds into a fixed-size ring buffer, so
+    long synthesis/simulation drivers can see *when* memory grew, not just the
+    final high-water mark.
+
+    Samples are kept column-wise in `array('d')` buffers of `capacity` entries;
+    the oldest samples are overwritten.  Sampling reads a few /proc files through
+    file descriptors kept open for the sampler's lifetime, which costs well under
+    1% of a CPU at the default 100 ms interval (see `overhead`).
+
+    Usage:
+
+        with ResourceSampler(interval=0.1) as sampler:
+            sampler.on_threshold("rss_kb", 8 << 20, lambda s, col, v: print("RSS over 8 GiB"))
+            run_flow()
+        sampler.to_csv("resources.csv")
+    """
+
+    def __init__(self, interval: float = 0.1, capacity: int = 36_000):
+        if interval <= 0 or capacity <= 0:
+            raise ValueError("interval and capacity must be positive")
+        self.interval = interval
+        self.capacity = capacity
+        self._data = {name: array.array("d", bytes(8 * capacity)) for name in COLUMNS}
+        self._next = 0          # total samples taken; the ring index is _next % capacity
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+        self._busy = 0.0        # seconds spent sampling
+        self._watched: set[int] = set()
+        self._children: set[int] = set()
+        self._child_fds: dict[int, int] = {}
+        self._thresholds: list[list] = []   # [column, limit, callback, above]
+        self._fds: dict[str, Optional[int]] = {}
+
+    # --- configuration --------------------------------------------------------
+
+    def watch(self, pid: int):
+        """Also sample process `pid` (e.g. one started with run_limited) as a child."""
+        self._watched.add(pid)
+
+    def on_threshold(self, column: str, limit: float, callback: ThresholdCallback):
+        """
+        Call `callback(sampler, column, value)` from the sampler thread each time
+        `column` rises above `limit` (once per crossing, not on every sample).
+        """
+        if column not in COLUMNS:
+            raise ValueError(f"unknown column {column!r}; expected one of {COLUMNS}")
+        self._thresholds.append([column, limit, callback, False])
+
+    # --- lifecycle ------------------------------------------------------------
+
+    def start(self) -> "ResourceSampler":
+        if self._thread is not None:
+            raise RuntimeError("sampler already started")
+        self._fds = {name: _open(f"/proc/self/{name}") for name in ("status", "io")}
+        self._start = time.monotonic()
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="ResourceSampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread, taking one last sample, and close the /proc files."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.sample()
+        for fd in list(self._fds.values()) + list(self._child_fds.values()):
+            if fd is not None:
+                os.close(fd)
+        self._fds = {}
+        self._child_fds = {}
+
+    def __enter__(self) -> "ResourceSampler":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    # --- sampling -------------------------------------------------------------
+
+    def _find_children(self) -> set[int]:
+        pid = os.getpid()
+        found: set[int] = set()
+        try:
+            tids = os.listdir(f"/proc/{pid}/task")
+        except OSError:
+            return found
+        supported = False
+        for tid in tids:
+            try:
+                with open(f"/proc/{pid}/task/{tid}/children") as f:
+                    found.update(int(c) for c in f.read().split())
+                supported = True
+            except (OSError, ValueError):
+                pass
+        if supported:
+            return found
+        if self._next % _CHILD_SCAN_EVERY:
+            return self._children
+        # no CONFIG_PROC_CHILDREN: scan /proc for processes whose parent is us
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(_stat_fields(f.read())[1]) == pid:
+                        found.add(int(entry))
+            except (OSError, ValueError, IndexError):
+                pass
+        return found
+
+    def _sample_children(self) -> tuple[int, float, float]:
+        self._children = self._find_children()
+        pids = self._children | self._watched
+        count, rss, cpu = 0, 0.0, 0.0
+        for pid in pids:
+            fd = self._child_fds.get(pid)
+            if fd is None:
+                fd = _open(f"/proc/{pid}/stat")
+                if fd is None:
+                    continue
+                self._child_fds[pid] = fd
+            fields = _stat_fields(_pread(fd))
+            if len(fields) < 22 or fields[0] == "Z":
+                continue
+            count += 1
+            cpu += (int(fields[11]) + int(fields[12])) / _TICKS
+            rss += int(fields[21]) * _PAGE_KB
+        for pid in set(self._child_fds) - pids:
+            os.close(self._child_fds.pop(pid))
+        self._watched &= set(self._child_fds)
+        return count, rss, cpu
+
+    def sample(self) -> dict[str, float]:
+        """Take one sample now (the thread calls this every `interval`)."""
+        t0 = time.perf_counter()
+        row = dict.fromkeys(COLUMNS, 0.0)
+        row["time"] = time.monotonic() - self._start
+        for line in _pread(self._fds.get("status")).splitlines():
+            key, _, value = line.partition(":")
+            if key == "VmRSS":
+                row["rss_kb"] = float(value.split()[0])
+            elif key == "VmHWM":
+                row["hwm_kb"] = float(value.split()[0])
+            elif key == "Threads":
+                row["threads"] = float(value)
+        for line in _pread(self._fds.get("io")).splitlines():
+            key, _, value = line.partition(":")
+            if key == "rchar":
+                row["read_bytes"] = float(value)
+            elif key == "wchar":
+                row["write_bytes"] = float(value)
+        times = os.times()
+        row["cpu_user"], row["cpu_sys"] = times.user, times.system
+        row["children"], row["children_rss_kb"], row["children_cpu"] = self._sample_children()
+
+        with self._lock:
+            i = self._next % self.capacity
+            for name in COLUMNS:
+                self._data[name][i] = row[name]
+            self._next += 1
+        for threshold in self._thresholds:
+            column, limit, callback, above = threshold
+            value = row[column]
+            threshold[3] = value > limit
+            if value > limit and not above:
+                callback(self, column, value)
+        self._busy += time.perf_counter() - t0
+        return row
+
+    # --- results --------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    @property
+    def overhead(self) -> float:
+        """Fraction of wall time spent sampling so far."""
+        elapsed = time.monotonic() - self._start
+        return self._busy / elapsed if elapsed > 0 else 0.0
+
+    def _order(self) -> Iterable[int]:
+        n = len(self)
+        first = self._next - n
+        return [(first + k) % self.capacity for k in range(n)]
+
+    def column(self, name: str) -> list[float]:
+        """One column, oldest sample first."""
+        with self._lock:
+            data = self._data[name]
+            return [data[i] for i in self._order()]
+
+    def samples(self) -> list[dict[str, float]]:
+        """All buffered samples as dicts, oldest first."""
+        with self._lock:
+            return [{name: self._data[name][i] for name in COLUMNS} for i in self._order()]
+
+    def to_csv(self, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.samples())
+
+    def to_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"interval": self.interval, "samples": self.samples()}, f)
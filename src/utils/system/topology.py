@@ -0,0 +1,166 @@
+import os
+import functools
+import itertools
+import multiprocessing
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Sequence
+
+# can be imported as part of the utils package or just as directory imports, so we handle both cases
+try:
+    from utils.system.cgroups import parse_cpu_list, _read
+    from utils.system.limits import SystemLimits
+except ModuleNotFoundError:
+    from .cgroups import parse_cpu_list, _read
+    from .limits import SystemLimits
+
+_SYSFS = "/sys/devices/system"
+
+PIN_POLICIES = ("core", "node")
+
+@dataclass(frozen=True)
+class Cpu:
+    id: int                  # logical CPU number, as used by sched_setaffinity
+    core: int                # core_id (unique only within a package)
+    package: int             # physical_package_id (socket)
+    node: int                # NUMA node, 0 if the machine has no NUMA info
+
+@dataclass(frozen=True)
+class CpuTopology:
+    """
+    The logical CPUs we may run on, grouped into physical cores (SMT siblings)
+    and NUMA nodes.  Only CPUs in our affinity mask and cgroup cpuset are listed.
+    """
+    cpus: tuple[Cpu, ...]
+
+    @functools.cached_property
+    def cores(self) -> tuple[tuple[int, ...], ...]:
+        """Physical cores as tuples of their usable SMT sibling CPUs, ordered by node then CPU."""
+        groups: dict[tuple[int, int], list[Cpu]] = {}
+        for cpu in self.cpus:
+            groups.setdefault((cpu.package, cpu.core), []).append(cpu)
+        ordered = sorted(groups.values(), key=lambda g: (g[0].node, min(c.id for c in g)))
+        return tuple(tuple(sorted(c.id for c in g)) for g in ordered)
+
+    @functools.cached_property
+    def nodes(self) -> dict[int, tuple[int, ...]]:
+        """NUMA node -> usable CPUs on it."""
+        nodes: dict[int, list[int]] = {}
+        for cpu in self.cpus:
+            nodes.setdefault(cpu.node, []).append(cpu.id)
+        return {node: tuple(sorted(ids)) for node, ids in sorted(nodes.items())}
+
+    def siblings(self, cpu: int) -> tuple[int, ...]:
+        """The usable SMT siblings of `cpu` (including itself)."""
+        for core in self.cores:
+            if cpu in core:
+                return core
+        raise KeyError(cpu)
+
+    def node_cores(self, node: int) -> tuple[tuple[int, ...], ...]:
+        """The physical cores on NUMA node `node`."""
+        cpus = set(self.nodes.get(node, ()))
+        return tuple(core for core in self.cores if core[0] in cpus)
+
+    def pinning_plan(self, policy: str, workers: Optional[int] = None) -> list[frozenset[int]]:
+        """
+        CPU sets for a pool of workers.
+
+        Args:
+            policy: "core" gives each worker its own physical core (all of its SMT
+                siblings), spread evenly over the NUMA nodes; "node" packs workers
+                into as few nodes as hold them, one per core, each allowed to run
+                anywhere on its node so it keeps its L3 and local memory.
+            workers: the pool size (default: one per physical core).  Beyond the
+                number of cores, sets are reused round-robin.
+
+        Returns:
+            One CPU set per worker slot.
+        """
+        if policy not in PIN_POLICIES:
+            raise ValueError(f"unknown pinning policy {policy!r}; expected one of {PIN_POLICIES}")
+        if not self.cpus:
+            return []
+        workers = workers or len(self.cores)
+        if policy == "core":
+            # interleave the nodes so a small pool still uses every socket's bandwidth
+            per_node = [self.node_cores(node) for node in self.nodes]
+            order = [core for batch in itertools.zip_longest(*per_node) for core in batch if core is not None]
+            slots = [frozenset(core) for core in order]
+        else:
+            slots = []
+            for node, cpus in self.nodes.items():
+                slots += [frozenset(cpus)] * len(self.node_cores(node))
+        return [slots[i % len(slots)] for i in range(workers)]
+
+def _read_int(path: str, default: int) -> int:
+    text = _read(path)
+    try:
+        return int(text) if text is not None else default
+    except ValueError:
+        return default
+
+def read_topology(allowed: Optional[Iterable[int]] = None, sysfs: str = _SYSFS) -> CpuTopology:
+    """
+    Read the CPU/NUMA topology from sysfs.
+    Args:
+        allowed: CPUs to include (default: SystemLimits.current().cpus, i.e. our
+            affinity mask and cgroup cpuset).
+        sysfs: the /sys/devices/system directory (for tests).
+    Returns:
+        The CpuTopology; without sysfs (macOS) every CPU is its own core on node 0.
+    """
+    if allowed is None:
+        allowed = SystemLimits.current().cpus or range(os.cpu_count() or 1)
+    allowed = set(allowed)
+
+    node_of: dict[int, int] = {}
+    node_dir = os.path.join(sysfs, "node")
+    if os.path.isdir(node_dir):
+        for entry in os.listdir(node_dir):
+            if entry.startswith("node") and entry[4:].isdigit():
+                cpulist = _read(os.path.join(node_dir, entry, "cpulist"))
+                for cpu in parse_cpu_list(cpulist or ""):
+                    node_of[cpu] = int(entry[4:])
+
+    cpus = []
+    for cpu in sorted(allowed):
+        topo = os.path.join(sysfs, "cpu", f"cpu{cpu}", "topology")
+        cpus.append(Cpu(
+            id=cpu,
+            core=_read_int(os.path.join(topo, "core_id"), cpu),
+            package=_read_int(os.path.join(topo, "physical_package_id"), 0),
+            node=node_of.get(cpu, 0),
+        ))
+    return CpuTopology(tuple(cpus))
+
+@functools.lru_cache(maxsize=1)
+def get_topology() -> CpuTopology:
+    """The topology for our current CPUs, read once and cached."""
+    return read_topology()
+
+def _pin_worker(counter, plan: Sequence[frozenset[int]], initializer: Optional[Callable], initargs: tuple):
+    # runs first thing in each pool worker (thread or process)
+    with counter.get_lock():
+        slot = counter.value
+        counter.value += 1
+    try:
+        os.sched_setaffinity(0, plan[slot % len(plan)])   # 0 = the calling thread
+    except (AttributeError, OSError):
+        pass   # no affinity API, or the CPU went away; run unpinned
+    if initializer is not None:
+        initializer(*initargs)
+
+def make_pinning_initializer(policy: str, workers: int, initializer: Optional[Callable] = None,
+                             initargs: tuple = (), topology: Optional[CpuTopology] = None,
+                             mp_context=None) -> tuple[Callable, tuple]:
+    """
+    Build an (initializer, initargs) pair for ThreadPoolExecutor/ProcessPoolExecutor
+    that pins each worker to its own slot of `topology.pinning_plan(policy, workers)`
+    with os.sched_setaffinity, then runs the caller's own `initializer`.
+
+    Returns:
+        (initializer, initargs) to pass to the executor.
+    """
+    plan = (topology or get_topology()).pinning_plan(policy, workers)
+    counter = (mp_context or multiprocessing).Value("i", 0)
+    return _pin_worker, (counter, plan, initializer, initargs)
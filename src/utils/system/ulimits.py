@@ -1,9 +1,16 @@
 import sys
 import math
 import resource
-from typing import Tuple, Union
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional, Tuple, TypeVar, Union
 
 Num = Union[int, float]
+T = TypeVar("T")
+
+DEEP_STACK_BYTES = 512 * 1024 * 1024
+DEEP_RECURSION_LIMIT = 100_000
 
 def _norm(v: int) -> Num:
     return math.inf if v == resource.RLIM_INFINITY else v
@@ -46,17 +53,115 @@ def get_stack_limit() -> Tuple[Num, Num]:
     soft, hard = resource.getrlimit(resource.RLIMIT_STACK)
     return _norm(soft), _norm(hard)
 
-def get_max_memory_kb() -> int:
+def get_max_memory_kb(include_children: bool = False) -> int:
     """
     Get the maximum memory usage of the current process.
+    Args:
+        include_children: also consider waited-for child processes (RUSAGE_CHILDREN),
+            returning the larger of the two peaks.
     Returns:
         int: The maximum memory usage in kilobytes
     """
     ru = resource.getrusage(resource.RUSAGE_SELF)
     n = ru.ru_maxrss
+    if include_children:
+        n = max(n, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
     if sys.platform.startswith("linux"):
         return n                  # kb
     elif sys.platform == "darwin":
         return n / 1024           # in bytes
     else:
-        return n / 1024           # most BSDs report kB
\ No newline at end of file
+        return n / 1024           # most BSDs report kB
+# threading.stack_size() and the recursion limit are interpreter-wide, so changes
+# to them are serialized and reference counted
+_stack_lock = threading.Lock()
+_recursion_lock = threading.Lock()
+_recursion_users = 0
+_saved_recursion_limit = 0
+
+@contextlib.contextmanager
+def _thread_stack_size(stack_bytes: int) -> Iterator[None]:
+    # threads started inside this block get a `stack_bytes` C stack
+    with _stack_lock:
+        old = threading.stack_size(stack_bytes)
+        try:
+            yield
+        finally:
+            threading.stack_size(old)
+
+def _acquire_recursion_limit(limit: int):
+    global _recursion_users, _saved_recursion_limit
+    with _recursion_lock:
+        if _recursion_users == 0:
+            _saved_recursion_limit = sys.getrecursionlimit()
+        _recursion_users += 1
+        if sys.getrecursionlimit() < limit:
+            sys.setrecursionlimit(limit)
+
+def _release_recursion_limit():
+    global _recursion_users
+    with _recursion_lock:
+        _recursion_users -= 1
+        if _recursion_users == 0:
+            sys.setrecursionlimit(_saved_recursion_limit)
+
+def run_with_deep_stack(fn: Callable[..., T], *args, stack_bytes: int = DEEP_STACK_BYTES,
+                        recursion_limit: int = DEEP_RECURSION_LIMIT, **kwargs) -> T:
+    """
+    Run `fn(*args, **kwargs)` on a new thread with a `stack_bytes` C stack and
+    the recursion limit raised to `recursion_limit`, and wait for it.
+
+    raise_stack_limit() cannot grow the main thread's stack once it is running,
+    so deep recursive code (e.g. AST walks of big designs) segfaults at high
+    recursion limits; a fresh thread gets its whole stack up front.  Both
+    settings are restored afterwards.
+
+    Returns:
+        Whatever `fn` returns; exceptions from `fn` are re-raised here.
+    """
+    result: list = []
+    error: list[BaseException] = []
+
+    def _target():
+        try:
+            result.append(fn(*args, **kwargs))
+        except BaseException as e:
+            error.append(e)
+
+    _acquire_recursion_limit(recursion_limit)
+    try:
+        with _thread_stack_size(stack_bytes):
+            thread = threading.Thread(target=_target, name="deep-stack")
+            thread.start()
+        thread.join()
+    finally:
+        _release_recursion_limit()
+    if error:
+        raise error[0]
+    return result[0]
+
+class DeepStackExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor whose worker threads have a `stack_bytes` C stack, with
+    the recursion limit raised to `recursion_limit` until shutdown, for running
+    many deep recursive jobs (see run_with_deep_stack).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, stack_bytes: int = DEEP_STACK_BYTES,
+                 recursion_limit: int = DEEP_RECURSION_LIMIT, **kwargs):
+        super().__init__(max_workers=max_workers, **kwargs)
+        self.stack_bytes = stack_bytes
+        self._holds_recursion_limit = True
+        _acquire_recursion_limit(recursion_limit)
+
+    def _adjust_thread_count(self):
+        # workers are started lazily from submit(); give them the big stack
+        with _thread_stack_size(self.stack_bytes):
+            super()._adjust_thread_count()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+        with self._shutdown_lock:
+            release, self._holds_recursion_limit = self._holds_recursion_limit, False
+        if release:
+            _release_recursion_limit()
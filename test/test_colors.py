@@ -0,0 +1,341 @@
+"""Unit tests for colors module."""
+
+import io
+import sys
+import itertools
+import pytest
+from typing import Optional
+from utils.colors import AnsiColorsTool, HighlightRule, LogHighlighter  # type: ignore
+from utils.colors.highlight import DEFAULT_RULES  # type: ignore
+
+ENABLED = AnsiColorsTool.EnableState.ENABLED
+DISABLED = AnsiColorsTool.EnableState.DISABLED
+
+def _linear_resolve(ansi: AnsiColorsTool, key: str) -> Optional[str]:
+    # the original scan-based resolution, kept as the reference behavior
+    lower_key = key.lower()
+    if lower_key in ansi.colors:
+        return ansi.colors[lower_key]
+    matches = [name for name in ansi.colors.keys() if name.lower().startswith(lower_key)]
+    if len(matches) == 1:
+        return ansi.colors[matches[0]]
+    matches = [name for name in ansi.key_synonyms.keys() if name.lower().startswith(lower_key)]
+    if len(matches) == 1:
+        return ansi.colors[ansi.key_synonyms[matches[0]]]
+    return None
+
+class TestColorKeyResolution:
+    """Tests for the precomputed color key index."""
+
+    def test_matches_linear_scan(self):
+        """Test that every prefix of every name and synonym resolves as before."""
+        ansi = AnsiColorsTool(ENABLED)
+        keys = {""}
+        for name in itertools.chain(ansi.colors, ansi.key_synonyms):
+            keys.update(name[:i] for i in range(1, len(name) + 1))
+            keys.update(name[:i].upper() for i in range(1, len(name) + 1))
+        keys.update(["zzz", "bright_x", "bkgg", "drk", "br", "b", "bo", "re", "res"])
+        for key in keys:
+            assert ansi._resolve_color_key(key) == _linear_resolve(ansi, key), key
+
+    def test_ambiguity_and_synonyms(self):
+        """Test ambiguous prefixes, synonym fallback and exact-over-prefix matches."""
+        ansi = AnsiColorsTool(ENABLED)
+        assert ansi._resolve_color_key("br") is None                        # bright_* and br_* synonyms
+        assert ansi._resolve_color_key("bkgg") == ansi.colors["bkg_green"]  # only the synonym matches
+        assert ansi._resolve_color_key("red") == ansi.colors["red"]         # exact beats the red/... prefixes
+        assert ansi._resolve_color_key("b") is None                         # synonym "b" is a prefix of others too
+
+    def test_disabled_palette(self):
+        """Test that disabled tools resolve keys to empty codes."""
+        ansi = AnsiColorsTool(DISABLED)
+        assert ansi._resolve_color_key("br_green") == ""
+        assert ansi.br_green("x") == "x"
+
+    def test_proxies_are_shared(self):
+        """Test that repeated lookups return the same proxy object."""
+        ansi = AnsiColorsTool(ENABLED)
+        assert ansi.br_green is ansi.br_green
+        assert ansi["bold"] is ansi.bold
+        assert ansi.wrap().bold is ansi.bold
+        assert f"{ansi.bold}x{ansi.reset}" == "\033[1mx\033[0m"
+
+class TestSharedPalettes:
+    """Tests for the shared palettes and cheap construction."""
+
+    def test_palettes_are_shared_and_read_only(self):
+        """Test that tools share one frozen palette per enabled state."""
+        a, b = AnsiColorsTool(ENABLED), AnsiColorsTool(ENABLED)
+        assert a.colors is b.colors and a._key_index is b._key_index
+        assert AnsiColorsTool(DISABLED).colors is AnsiColorsTool(DISABLED).colors
+        with pytest.raises(TypeError):
+            a.colors["red"] = ""
+
+    def test_isatty_cached_per_stream(self, monkeypatch):
+        """Test that the terminal check is cached until sys.stdout is replaced."""
+        calls = []
+
+        class _Stream(io.StringIO):
+            def __init__(self, tty: bool):
+                super().__init__()
+                self.tty = tty
+            def isatty(self):
+                calls.append(self)
+                return self.tty
+
+        tty = _Stream(True)
+        monkeypatch.setattr(sys, "stdout", tty)
+        assert AnsiColorsTool().colors["red"] and AnsiColorsTool().colors["red"]
+        assert calls == [tty]
+        monkeypatch.setattr(sys, "stdout", _Stream(False))
+        assert AnsiColorsTool().colors["red"] == ""
+        assert len(calls) == 2
+
+    def test_shared_instance(self, monkeypatch):
+        """Test that shared() returns one instance per resolved state."""
+        assert AnsiColorsTool.shared(ENABLED) is AnsiColorsTool.shared(ENABLED)
+        assert AnsiColorsTool.shared(DISABLED) is not AnsiColorsTool.shared(ENABLED)
+        monkeypatch.setattr(sys, "stdout", io.StringIO())
+        assert AnsiColorsTool.shared() is AnsiColorsTool.shared(DISABLED)
+
+def _reference_render(cs) -> str:
+    # the original render: sort the spans, color each segment, reset after it
+    plain, parts, pos = str.__str__(cs), [], 0
+    for start, end, code in sorted(cs._spans, key=lambda s: s[0]):
+        parts.append(plain[pos:start] if pos < start else "")
+        parts.append(f"{code}{plain[start:end]}\033[0m" if code else plain[start:end])
+        pos = end
+    return "".join(parts) + plain[pos:]
+
+class TestColoredString:
+    """Tests for ColoredString span storage, rendering and lookups."""
+
+    def _sample(self):
+        ansi = AnsiColorsTool(ENABLED)
+        parts = [ansi.colorize_string(f"w{i}", ("red", "green", "blue", "zzz")[i % 4]) for i in range(40)]
+        s = "head "
+        for i, part in enumerate(parts):
+            s = s + part + ("" if i % 3 else " ")
+        return ansi, s
+
+    def test_render_matches_reference_and_is_cached(self):
+        """Test that rendering matches the original algorithm and is memoized."""
+        _, s = self._sample()
+        assert isinstance(s, AnsiColorsTool.ColoredString)
+        assert str(s) == _reference_render(s)
+        assert str(s) is str(s)
+
+    def test_unsorted_spans(self):
+        """Test that spans given out of order are sorted once, at construction."""
+        ansi = AnsiColorsTool(ENABLED)
+        s = AnsiColorsTool.ColoredString(ansi, "abcdef", [(4, 6, "\033[94m"), (0, 2, "\033[91m")])
+        assert s._spans == [(0, 2, "\033[91m"), (4, 6, "\033[94m")]
+        assert str(s) == "\033[91mab\033[0mcd\033[94mef\033[0m"
+
+    def test_index_and_slice_lookups(self):
+        """Test that binary-searched lookups agree with a linear scan of the spans."""
+        _, s = self._sample()
+        spans = s._spans
+        for idx in range(-len(s), len(s)):
+            pos = idx % len(s)
+            expected = [(0, 1, c) for (b, e, c) in spans if b <= pos < e][:1]
+            assert s[idx]._spans == expected and str.__str__(s[idx]) == str.__str__(s)[idx]
+        for start, stop in [(0, 7), (3, 30), (10, None), (-12, -2), (None, 5), (50, 40)]:
+            sliced = s[start:stop]
+            lo, hi, _ = slice(start, stop).indices(len(s))
+            hi = max(lo, hi)
+            expected = [(max(b, lo) - lo, min(e, hi) - lo, c) for (b, e, c) in spans if max(b, lo) < min(e, hi)]
+            assert sliced._spans == expected and str.__str__(sliced) == str.__str__(s)[start:stop]
+            assert str(sliced) == _reference_render(sliced)
+
+    def test_concatenation_keeps_spans(self):
+        """Test that + and radd shift spans and leave the operands unchanged."""
+        ansi = AnsiColorsTool(ENABLED)
+        a, b = ansi.colorize_string("ab", "red"), ansi.colorize_string("cd", "green")
+        joined = "x" + a + "-" + b
+        assert joined._spans == [(1, 3, ansi.colors["red"]), (4, 6, ansi.colors["green"])]
+        assert a._spans == [(0, 2, ansi.colors["red"])] and len(joined) == 6
+
+class TestColoredStringBuilder:
+    """Tests for ColoredStringBuilder and ColoredString.join."""
+
+    def test_builder_matches_concatenation(self):
+        """Test that building gives the same text and spans as repeated +."""
+        ansi = AnsiColorsTool(ENABLED)
+        parts = [ansi.colorize_string(f"item{i}", ("red", "green")[i % 2]) if i % 3 else f"plain{i}" for i in range(30)]
+        expected = ""
+        for part in parts:
+            expected = expected + part
+        built = AnsiColorsTool.ColoredStringBuilder(ansi).extend(parts).build()
+        assert str.__str__(built) == str.__str__(expected)
+        assert built._spans == expected._spans and str(built) == str(expected)
+
+    def test_append_with_color_and_join(self):
+        """Test coloring appended text and joining with a colored separator."""
+        ansi = AnsiColorsTool(ENABLED)
+        red, green = ansi.colors["red"], ansi.colors["green"]
+        b = AnsiColorsTool.ColoredStringBuilder(ansi)
+        b.append("a").append("bc", "red").join(["x", ansi.colorize_string("y", "g")], sep=", ")
+        assert len(b) == 7
+        built = b.build()
+        assert str.__str__(built) == "abcx, y" and built._spans == [(1, 3, red), (6, 7, green)]
+        b.append("z")
+        assert len(built) == 7 and len(b.build()) == 8
+
+    def test_colored_join(self):
+        """Test that ColoredString.join keeps separator and part spans."""
+        ansi = AnsiColorsTool(ENABLED)
+        sep = ansi.colorize_string("|", "blue")
+        joined = sep.join(["a", ansi.colorize_string("b", "red"), "c"])
+        blue, red = ansi.colors["blue"], ansi.colors["red"]
+        assert str.__str__(joined) == "a|b|c"
+        assert joined._spans == [(1, 2, blue), (2, 3, red), (3, 4, blue)]
+        with pytest.raises(TypeError):
+            sep.join(["a", 1])
+
+def _color_at(s) -> list:
+    # the color code of every character, the ground truth spans must preserve
+    return [next((c for b, e, c in s._spans if b <= i < e), None) for i in range(len(s))]
+
+class TestColoredStringMethods:
+    """Tests for the span-preserving str methods of ColoredString."""
+
+    def _sample(self, text: str = "  alpha beta\tgamma, delta\n\nepsilon zeta  "):
+        ansi = AnsiColorsTool(ENABLED)
+        b = AnsiColorsTool.ColoredStringBuilder(ansi)
+        for i, char in enumerate(text):
+            b.append(char, ("red", "green", "blue")[i // 3 % 3] if i % 7 else None)
+        return ansi, b.build(), text
+
+    def _check_pieces(self, s, pieces, expected):
+        # each piece is a substring of `s` at a known offset, with the same colors
+        assert [str.__str__(p) for p in pieces] == expected
+        colors, plain, pos = _color_at(s), str.__str__(s), 0
+        for piece in pieces:
+            assert isinstance(piece, AnsiColorsTool.ColoredString)
+            found = plain.find(str.__str__(piece), pos)
+            assert _color_at(piece) == colors[found:found + len(piece)]
+            pos = found + len(piece)
+
+    def test_split_family(self):
+        """Test split/rsplit/splitlines/partition against str and for colors."""
+        _, s, text = self._sample()
+        for args in [(), (None, 1), (None, 0), (" ",), (" ", 2), ("a",), ("ta",)]:
+            self._check_pieces(s, s.split(*args), text.split(*args))
+            self._check_pieces(s, s.rsplit(*args), text.rsplit(*args))
+        for keepends in (False, True):
+            self._check_pieces(s, s.splitlines(keepends), text.splitlines(keepends))
+        for sep in ("a", "zz", ", "):
+            self._check_pieces(s, list(s.partition(sep)), list(text.partition(sep)))
+            self._check_pieces(s, list(s.rpartition(sep)), list(text.rpartition(sep)))
+        with pytest.raises(ValueError):
+            s.split("")
+
+    def test_strip_and_padding(self):
+        """Test strip and the justify methods keep the text's colors in place."""
+        _, s, text = self._sample()
+        for method, args in [("strip", ()), ("lstrip", ()), ("rstrip", (" a",)), ("strip", ("a ",))]:
+            self._check_pieces(s, [getattr(s, method)(*args)], [getattr(text, method)(*args)])
+        for width in (3, 50, 51):
+            for method in ("ljust", "rjust", "center"):
+                padded = getattr(s, method)(width, "*")
+                assert str.__str__(padded) == getattr(text, method)(width, "*")
+                offset = str.__str__(padded).index(text)
+                assert _color_at(padded)[offset:offset + len(s)] == _color_at(s)
+        assert s.strip("#") is s and s.ljust(3) is s
+
+    def test_replace(self):
+        """Test replace with plain and colored replacements."""
+        ansi, s, text = self._sample()
+        for old, new, count in [("a", "AA", -1), ("a", "", 2), ("", "-", 5), ("zz", "y", -1)]:
+            assert str.__str__(s.replace(old, new, count)) == text.replace(old, new, count)
+        marked = s.replace("beta", ansi.colorize_string("BETA", "magenta"))
+        start = text.index("beta")
+        assert _color_at(marked)[start:start + 4] == [ansi.colors["magenta"]] * 4
+        assert _color_at(marked)[:start] == _color_at(s)[:start]
+
+    def test_format(self):
+        """Test format with colored templates, arguments and specs."""
+        ansi = AnsiColorsTool(ENABLED)
+        red, green = ansi.colors["red"], ansi.colors["green"]
+        template = ansi.colorize_string("{{{}}} {name:>{width}}|{!s:^6.2}|{:x}", "red")
+        ok = ansi.colorize_string("ok", "green")
+        result = template.format(ok, ok, 255, name=ok, width=4)
+        assert str.__str__(result) == "{ok}   ok|  ok  |ff"
+        # padding added by the specs is uncolored, like the formatted plain values
+        assert _color_at(result) == ([red] + [green] * 2 + [red] * 2 + [None] * 2 + [green] * 2 + [red]
+                                     + [None] * 2 + [green] * 2 + [None] * 2 + [red] + [None] * 2)
+        assert f"{ok:>3}" == f" {green}ok\033[0m"
+        with pytest.raises(ValueError):
+            ansi.colorize_string("{0} {}", "red").format(1, 2)
+
+    def test_expandtabs_and_wrap(self):
+        """Test expandtabs and wrap/fill against str and textwrap."""
+        import textwrap
+        _, s, text = self._sample()
+        assert str.__str__(s.expandtabs(4)) == text.expandtabs(4)
+        for kwargs in [{}, {"initial_indent": "> ", "subsequent_indent": "  "}, {"max_lines": 2},
+                       {"replace_whitespace": False, "expand_tabs": False}]:
+            lines = s.wrap(12, **kwargs)
+            assert [str.__str__(line) for line in lines] == textwrap.wrap(text, 12, **kwargs)
+            assert str.__str__(s.fill(12, **kwargs)) == textwrap.fill(text, 12, **kwargs)
+        words = s.wrap(12)
+        assert _color_at(words[0]) == _color_at(s)[:len(words[0])]
+        assert _color_at(words[1]) == _color_at(s)[13:13 + len(words[1])]
+
+_LOG = """UVM_INFO @ 10: reporter [TEST] starting
+plain line, nothing here (XUVM_ERROR is not a match)
+UVM_INFO then UVM_ERROR @ 20: env [CHK] mismatch
+%Warning-WIDTH: foo.v:12: width
+Assertion a_req_ack FAILED at 100ns
+*E,NOTFND: missing
+TEST PASSED, PASSING is not PASS
+no trailing newline UVM_INFO"""
+
+class TestLogHighlighter:
+    """Tests for LogHighlighter."""
+
+    def test_rules(self):
+        """Test token and whole-line rules, word boundaries and overrides."""
+        ansi = AnsiColorsTool(ENABLED)
+        c = lambda color, text: f"{ansi.colors[color]}{text}{ansi.colors['reset']}"
+        lines = _LOG.split("\n")
+        expected = "\n".join([
+            f"{c('cyan', 'UVM_INFO')} @ 10: reporter [TEST] starting",
+            lines[1],
+            c("bright_red", lines[2]),    # the whole-line rule overrides the earlier UVM_INFO
+            c("yellow", lines[3]),
+            c("red", lines[4]),
+            c("bright_red", lines[5]),
+            f"TEST {c('green', 'PASSED')}, PASSING is not {c('green', 'PASS')}",
+            f"no trailing newline {c('cyan', 'UVM_INFO')}",
+        ])
+        highlighter = LogHighlighter(ansi=ansi)
+        assert highlighter.highlight(_LOG) == expected
+        assert highlighter.highlight(_LOG.encode()) == expected.encode()
+
+    def test_grouped_alternation_matches_plain(self):
+        """Test that grouping rules by first character doesn't change the result."""
+        ansi = AnsiColorsTool(ENABLED)
+        grouped = LogHighlighter(ansi=ansi)
+        plain = LogHighlighter(DEFAULT_RULES + (HighlightRule(r"(?:never)+", "blue"),), ansi=ansi)
+        assert "(?P<_r0>" in plain._pattern and "(?P<_r0>" not in grouped._pattern
+        text = "\n".join(_LOG.split("\n") * 3 + ["a UVM_WARNING b", "xassertion fail", "ASSERT: x failed"])
+        assert grouped.highlight(text) == plain.highlight(text)
+
+    def test_stream_blocks(self):
+        """Test that streaming in small blocks gives the same output as one call."""
+        highlighter = LogHighlighter(ansi=AnsiColorsTool(ENABLED), block_size=7)
+        for data, buffer in [(_LOG, io.StringIO), (_LOG.encode(), io.BytesIO)]:
+            out = buffer()
+            highlighter.highlight_stream(buffer(data), out)
+            assert out.getvalue() == highlighter.highlight(data)
+
+    def test_disabled_passthrough(self):
+        """Test that a disabled highlighter returns and copies input untouched."""
+        highlighter = LogHighlighter(ansi=AnsiColorsTool(DISABLED))
+        assert not highlighter.enabled
+        assert highlighter.highlight(_LOG) is _LOG
+        out = io.BytesIO()
+        highlighter.highlight_stream(io.BytesIO(_LOG.encode()), out)
+        assert out.getvalue() == _LOG.encode()
@@ -0,0 +1,264 @@
+"""Unit tests for file_utils module."""
+
+import os
+import hashlib
+import subprocess
+import pytest
+from utils.file_utils import (   # type: ignore
+    find_path_by_leaf,
+    read_git_index,
+    iter_tracked_files,
+    find_git_work_tree,
+    AtomicWriter,
+    write_if_changed,
+    write_files_if_changed,
+    ArtifactCache,
+    fingerprint_files,
+    FingerprintMemo
+)
+
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """A small git repo with a few staged files."""
+    _git(tmp_path, "init", "-q")
+    for rel in ["rtl/core/alu.sv", "rtl/core/alu_pkg.sv", "rtl/top.sv", "tb/tb_top.sv", "readme.md"]:
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(f"// {rel}\n")
+    _git(tmp_path, "add", "-A")
+    return tmp_path
+
+def _ls_files(repo):
+    out = subprocess.run(["git", "ls-files"], cwd=repo, check=True, capture_output=True, text=True).stdout
+    return out.splitlines()
+
+class TestGitIndex:
+    """Tests for the git index reader."""
+
+    @pytest.mark.parametrize("index_version", ["2", "3", "4"])
+    def test_matches_git_ls_files(self, git_repo, index_version):
+        """Test that the index reader lists the same paths as `git ls-files` for each index version."""
+        _git(git_repo, "update-index", "--index-version", index_version)
+        paths = [e.path for e in read_git_index(str(git_repo))]
+        assert paths == _ls_files(git_repo)
+
+    def test_split_index_falls_back(self, git_repo):
+        """Test that a split index (which can't be parsed directly) still lists every tracked file."""
+        _git(git_repo, "update-index", "--split-index")
+        (git_repo / "rtl" / "new.sv").write_text("// new\n")
+        _git(git_repo, "add", "rtl/new.sv")
+        assert [e.path for e in read_git_index(str(git_repo))] == _ls_files(git_repo)
+
+    def test_conflicted_path_reports_ours(self, git_repo):
+        """Test that an unmerged path is listed once, with the stage-2 ("ours") blob."""
+        for args in (["-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "base"],
+                     ["checkout", "-qb", "theirs"]):
+            _git(git_repo, *args)
+        (git_repo / "readme.md").write_text("theirs\n")
+        _git(git_repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qam", "theirs")
+        _git(git_repo, "checkout", "-q", "-")
+        (git_repo / "readme.md").write_text("ours\n")
+        _git(git_repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qam", "ours")
+        subprocess.run(["git", "merge", "-q", "theirs"], cwd=git_repo, capture_output=True)
+        ours = subprocess.run(["git", "rev-parse", "HEAD:readme.md"], cwd=git_repo,
+                              check=True, capture_output=True, text=True).stdout.strip()
+        readme = [e for e in read_git_index(str(git_repo)) if e.path == "readme.md"]
+        assert [e.sha for e in readme] == [ours]
+
+    def test_stat_data(self, git_repo):
+        """Test that the stat data in the index matches the file on disk."""
+        entry = next(e for e in iter_tracked_files(str(git_repo / "rtl"), with_stat=True) if e.path == "rtl/top.sv")
+        st = os.stat(git_repo / "rtl/top.sv")
+        assert entry.size == st.st_size
+        assert entry.ino == (st.st_ino & 0xFFFFFFFF)
+        assert len(entry.sha) == 40
+
+    def test_suffix_filter_and_cache_invalidation(self, git_repo):
+        """Test that suffix filtering works and the cache notices a changed index."""
+        assert list(iter_tracked_files(str(git_repo), suffixes=(".md",))) == ["readme.md"]
+        (git_repo / "notes.md").write_text("notes\n")
+        _git(git_repo, "add", "notes.md")
+        assert list(iter_tracked_files(str(git_repo), suffixes=(".md",))) == ["notes.md", "readme.md"]
+
+    def test_not_a_repo(self, tmp_path):
+        """Test that the reader returns nothing outside a git repo."""
+        if find_git_work_tree(str(tmp_path)) is not None:
+            pytest.skip("tmp dir is inside a git work tree")
+        assert read_git_index(str(tmp_path)) == ()
+        assert list(iter_tracked_files(str(tmp_path))) == []
+
+    def test_find_path_by_leaf_tracked_only(self, git_repo):
+        """Test that the tracked-only leaf search finds tracked files and ignores untracked ones."""
+        (git_repo / "build" / "core").mkdir(parents=True)
+        (git_repo / "build" / "core" / "gen.sv").write_text("")
+        found = find_path_by_leaf(str(git_repo), "core/alu.sv", tracked_only=True)
+        assert found == str(git_repo / "rtl/core/alu.sv")
+        assert find_path_by_leaf(str(git_repo), "core/gen.sv", tracked_only=True) is None
+        (git_repo / "untracked.sv").write_text("")
+        assert find_path_by_leaf(str(git_repo), "untracked.sv", tracked_only=True) is None
+        assert find_path_by_leaf(str(git_repo), "core/gen.sv") == str(git_repo / "build/core/gen.sv")
+
+class TestWriteIfChanged:
+    """Tests for the atomic write-if-changed helpers."""
+
+    def test_unchanged_content_keeps_mtime(self, tmp_path):
+        """Test that rewriting identical content leaves the file untouched."""
+        path = tmp_path / "regs_pkg.sv"
+        assert write_if_changed(path, "package regs_pkg;\nendpackage\n") is True
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        assert write_if_changed(path, ["package regs_pkg;\n", "endpackage\n"]) is False
+        assert os.stat(path).st_mtime_ns == 1_000_000_000
+        assert write_if_changed(path, "package regs_pkg2;\nendpackage\n") is True
+        assert path.read_text() == "package regs_pkg2;\nendpackage\n"
+        assert [p.name for p in tmp_path.iterdir()] == ["regs_pkg.sv"]   # no temp files left behind
+
+    def test_new_file_mode_follows_umask(self, tmp_path):
+        """Test that new files get 0666 & ~umask rather than the 0600 of a temp file."""
+        old_umask = os.umask(0o027)
+        try:
+            write_if_changed(tmp_path / "new.svh", "`define X\n")
+        finally:
+            os.umask(old_umask)
+        assert os.stat(tmp_path / "new.svh").st_mode & 0o777 == 0o640
+
+    def test_atomic_writer_discards_on_error(self, tmp_path):
+        """Test that an exception inside the writer leaves the old file in place."""
+        path = tmp_path / "image.hex"
+        path.write_bytes(b"00000000\n")
+        with pytest.raises(RuntimeError):
+            with AtomicWriter(path) as w:
+                w.write(b"deadbeef\n")
+                raise RuntimeError("codegen failed")
+        assert path.read_bytes() == b"00000000\n"
+        assert [p.name for p in tmp_path.iterdir()] == ["image.hex"]
+
+    def test_batch(self, tmp_path):
+        """Test that the batch writer reports only the files it changed."""
+        files = {tmp_path / f"f{i}.svh": f"`define F{i}\n" for i in range(50)}
+        assert len(write_files_if_changed(files)) == 50
+        files[tmp_path / "f7.svh"] = "`define F7_CHANGED\n"
+        assert write_files_if_changed(files) == [str(tmp_path / "f7.svh")]
+
+class TestArtifactCache:
+    """Tests for the content-addressed artifact cache."""
+
+    def _setup(self, tmp_path):
+        work = tmp_path / "work"
+        (work / "cfg").mkdir(parents=True)
+        (work / "cfg" / "regs.toml").write_text("xlen = 32\n")
+        calls = []
+        def generator():
+            calls.append(1)
+            (work / "generated").mkdir(exist_ok=True)
+            (work / "generated" / "regs_pkg.sv").write_text(f"// gen {len(calls)}\n")
+        return work, calls, generator
+
+    @pytest.mark.parametrize("hardlink", [False, True])
+    def test_hit_skips_generator(self, tmp_path, hardlink):
+        """Test that a second run with identical inputs restores outputs without calling the generator."""
+        work, calls, generator = self._setup(tmp_path)
+        cache = ArtifactCache(tmp_path / "cache", hardlink=hardlink)
+        kwargs = dict(inputs=["cfg/regs.toml"], outputs=["generated/regs_pkg.sv"],
+                      generator_version="regs-gen 1.0", params={"xlen": 32}, base_dir=work)
+        assert cache.run(generator, **kwargs) is False
+        (work / "generated" / "regs_pkg.sv").unlink()
+        assert cache.run(generator, **kwargs) is True
+        assert calls == [1]
+        assert (work / "generated" / "regs_pkg.sv").read_text() == "// gen 1\n"
+
+        # any change to inputs, version or params is a miss
+        assert cache.run(generator, **{**kwargs, "params": {"xlen": 64}}) is False
+        assert cache.run(generator, **kwargs) is True
+        assert (work / "generated" / "regs_pkg.sv").read_text() == "// gen 1\n"   # entry not overwritten
+        (work / "cfg" / "regs.toml").write_text("xlen = 64\n")
+        assert cache.run(generator, **kwargs) is False
+        assert len(calls) == 3
+
+    def test_outputs_are_part_of_key(self, tmp_path):
+        """Test that asking for a different set of outputs is a miss."""
+        work, calls, generator = self._setup(tmp_path)
+        cache = ArtifactCache(tmp_path / "cache")
+        kwargs = dict(inputs=["cfg/regs.toml"], generator_version="v1", base_dir=work)
+        assert cache.run(generator, outputs=["generated/regs_pkg.sv"], **kwargs) is False
+        def generator2():
+            generator()
+            (work / "generated" / "regs.h").write_text("#define X\n")
+        assert cache.run(generator2, outputs=["generated/regs_pkg.sv", "generated/regs.h"], **kwargs) is False
+        assert (work / "generated" / "regs.h").exists()
+
+    def test_restore_refreshes_mtime(self, tmp_path):
+        """Test that restored outputs are newer than their inputs, and up-to-date outputs are left alone."""
+        work, calls, generator = self._setup(tmp_path)
+        cache = ArtifactCache(tmp_path / "cache")
+        kwargs = dict(inputs=["cfg/regs.toml"], outputs=["generated/regs_pkg.sv"], generator_version="v1", base_dir=work)
+        cache.run(generator, **kwargs)
+        out = work / "generated" / "regs_pkg.sv"
+        out.write_text("stale\n")
+        os.utime(out, (1, 1))
+        assert cache.run(generator, **kwargs) is True
+        assert out.stat().st_mtime > (work / "cfg" / "regs.toml").stat().st_mtime - 1
+        os.utime(out, (5, 5))
+        assert cache.run(generator, **kwargs) is True
+        assert out.stat().st_mtime == 5
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entries are evicted once the size cap is exceeded."""
+        work = tmp_path / "work"
+        work.mkdir()
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=250)
+        for i in range(3):
+            (work / f"out{i}.hex").write_bytes(b"x" * 100)
+            cache.store(f"key{i}", [f"out{i}.hex"], base_dir=work)
+            os.utime(tmp_path / "cache" / "entries" / f"key{i}" / "manifest.json", (i, i))
+        assert not cache.restore("key0", base_dir=work)
+        assert cache.restore("key1", base_dir=work)
+        assert cache.restore("key2", base_dir=work)
+
+    def test_leftover_deleting_entries_are_purged(self, tmp_path):
+        """Test that entries orphaned by an interrupted eviction don't count against the cap forever."""
+        cache = ArtifactCache(tmp_path / "cache", max_bytes=0)
+        orphan = tmp_path / "cache" / "entries" / "abc.deleting"
+        orphan.mkdir()
+        (orphan / "manifest.json").write_text('{"files": [], "size": 100}')
+        assert cache.evict() == 0
+        assert not orphan.exists()
+
+class TestFingerprint:
+    """Tests for the parallel file fingerprinting API."""
+
+    def test_matches_hashlib(self, tmp_path):
+        """Test that digests match hashlib for small and mmap-sized files."""
+        files = {tmp_path / "small.sv": b"module m; endmodule\n", tmp_path / "big.hex": os.urandom(3 * 1024 * 1024)}
+        for p, data in files.items():
+            p.write_bytes(data)
+        digests = fingerprint_files(files, max_workers=2)
+        for p, data in files.items():
+            assert digests[str(p)] == hashlib.sha256(data).hexdigest()
+
+    def test_memo_skips_unchanged_files(self, tmp_path, monkeypatch):
+        """Test that memoized files are not re-read and the memo persists across instances."""
+        p = tmp_path / "rtl.sv"
+        p.write_text("module m; endmodule\n")
+        os.utime(p, (1_000_000, 1_000_000))   # old enough not to be racy
+        memo_path = tmp_path / "memo.json"
+        with FingerprintMemo(memo_path) as memo:
+            first = fingerprint_files([p], memo=memo)
+
+        import utils.file_utils.fingerprint as fp   # type: ignore
+        monkeypatch.setattr(fp, "hash_file", lambda *a, **k: pytest.fail("file was re-read"))
+        assert fingerprint_files([p], memo=FingerprintMemo(memo_path)) == first
+
+    def test_memo_drops_stale_keys(self, tmp_path):
+        """Test that keys of files that changed since the last run are pruned on save."""
+        p = tmp_path / "rtl.sv"
+        memo_path = tmp_path / "memo.json"
+        for i, text in enumerate(["v1\n", "v2 longer\n"]):
+            p.write_text(text)
+            os.utime(p, (1_000_000 + i, 1_000_000 + i))
+            with FingerprintMemo(memo_path) as memo:
+                fingerprint_files([p], memo=memo)
+        assert len(FingerprintMemo(memo_path).entries) == 1
+
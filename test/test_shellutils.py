@@ -3,9 +3,26 @@
 import pytest
 import tempfile
 import os
+import sys
 from pathlib import Path
-from utils.shellutils import Which
-from utils.shellutils import get_console_width, get_console_height
+from utils.shellutils import Which, WhichRegistry
+from utils.shellutils import get_console_width, get_console_height, get_console_size, invalidate_console_size
+from utils.shellutils import StatusBoard, progress_bar
+from utils.shellutils import ConsoleWriter
+import threading
+import signal
+from utils.shellutils import Job, JobStatus, JobScheduler
+from utils.shellutils import ToolRun, run_tools, LogMultiplexer
+from utils.shellutils import BoundedCapture, capture_run
+from utils.shellutils import diff_files, print_delta
+import difflib
+import random
+from utils.colors import AnsiColorsTool
+import gzip
+import io
+from utils.shellutils import VersionCache, parse_version, probe_versions, check_min_versions
+import json
+import time
 
 class TestWhich:
     """Tests for the Which class."""
@@ -66,6 +83,37 @@ class TestWhich:
         assert Which.OnMissingAction.WARNING.value == "warning"
         assert Which.OnMissingAction.ERROR_AND_RAISE.value == "error_and_raise"
 
+class TestWhichRegistry:
+    """Tests for the memoized, batched PATH lookup."""
+
+    def _tool(self, d: Path, name: str) -> Path:
+        path = d / name
+        path.write_text("#!/bin/sh\n")
+        path.chmod(0o755)
+        return path
+
+    def test_resolve_all_and_invalidation(self, tmp_path):
+        """Test one-pass resolution, PATH order, and invalidation when a PATH dir changes."""
+        a, b = tmp_path / "a", tmp_path / "b"
+        a.mkdir()
+        b.mkdir()
+        tool_b = self._tool(b, "tool")
+        (a / "tool").write_text("not executable")
+        registry = WhichRegistry()
+        path = os.pathsep.join([str(a), str(b)])
+        assert registry.resolve_all(["tool", "other"], path) == {"tool": tool_b, "other": None}
+        tool_a = self._tool(a, "tool2")
+        os.utime(a, ns=(0, 1))   # make sure the directory mtime differs even on coarse filesystems
+        assert registry.resolve("tool2", path) == tool_a
+        assert registry.resolve("tool", os.pathsep.join([str(b)])) == tool_b
+
+    def test_reports_all_missing(self, capsys):
+        """Test that Which.resolve_all reports every missing tool before raising."""
+        with pytest.raises(FileNotFoundError, match="nonexistent_a.*nonexistent_b"):
+            Which.resolve_all(["python3", "nonexistent_a", "nonexistent_b"])
+        out = capsys.readouterr().out
+        assert "nonexistent_a" in out and "nonexistent_b" in out
+
 class TestConsole:
     """Tests for the console module."""
 
@@ -79,4 +127,347 @@ class TestConsole:
         """Test that get_console_height returns the height of the console."""
         height = get_console_height()
         assert height > 0
-        assert height <= 1_000_000
\ No newline at end of file
+        assert height <= 1_000_000
+
+    def test_width_and_height_not_swapped(self, monkeypatch):
+        """Test that width is the column count and height the line count."""
+        monkeypatch.setattr(os, "get_terminal_size", lambda fd: os.terminal_size((132, 43)))
+        monkeypatch.setattr(sys.stdout, "isatty", lambda: True, raising=False)
+        invalidate_console_size()
+        try:
+            assert (get_console_width(), get_console_height()) == (132, 43)
+        finally:
+            invalidate_console_size()
+
+    def test_size_cached_until_sigwinch(self, monkeypatch):
+        """Test that the size is cached and re-read after SIGWINCH."""
+        calls = []
+        monkeypatch.setattr(os, "get_terminal_size", lambda fd: calls.append(fd) or os.terminal_size((100, 30)))
+        monkeypatch.setattr(sys.stdout, "isatty", lambda: True, raising=False)
+        invalidate_console_size()
+        try:
+            get_console_size()
+            get_console_size()
+            assert len(calls) == 1
+            os.kill(os.getpid(), signal.SIGWINCH)
+            get_console_size()
+            assert len(calls) == 2
+        finally:
+            invalidate_console_size()
+
+class TestStatusBoard:
+    """Tests for the throttled status renderer."""
+
+    def test_redraws_only_changed_lines(self):
+        """Test that a TTY frame rewrites only the lines that changed."""
+        out = io.StringIO()
+        board = StatusBoard(out=out, is_tty=True)
+        board.set("a", "job a: running")
+        board.set("b", "job b: running")
+        board.render()
+        first = out.getvalue()
+        assert "job a: running" in first and "job b: running" in first
+        board.set("b", "job b: done")
+        board.render()
+        second = out.getvalue()[len(first):]
+        assert "job a" not in second and "job b: done" in second
+        board.render()
+        assert out.getvalue()[len(first) + len(second):] == "\r\033[2A\n\n"
+
+    def test_coalesces_updates(self):
+        """Test that many updates between frames produce few writes."""
+        class CountingOut(io.StringIO):
+            writes = 0
+            def write(self, s):
+                CountingOut.writes += 1
+                return super().write(s)
+        out = CountingOut()
+        with StatusBoard(out=out, is_tty=True, fps=5) as board:
+            for i in range(10_000):
+                board.set(f"job{i % 500}", f"job{i % 500}: {progress_bar(i, 10_000)}")
+        assert out.writes < 20
+
+    def test_plain_fallback(self):
+        """Test that non-TTY output is plain lines for changed entries only."""
+        out = io.StringIO()
+        board = StatusBoard(out=out, is_tty=False)
+        board.set("a", "a: 1")
+        board.set("b", "b: 1")
+        board.render()
+        board.set("a", "a: 2")
+        board.log("note")
+        board.render()
+        assert out.getvalue() == "a: 1\nb: 1\nnote\na: 2\n"
+
+class TestJobScheduler:
+    """Tests for the JobScheduler class."""
+
+    def test_dependencies_and_history(self, tmp_path):
+        """Test that jobs run after their dependencies and durations are recorded."""
+        order = tmp_path / "order.txt"
+        history = tmp_path / "history.json"
+        jobs = [
+            Job("c", ["sh", "-c", f"echo c >> {order}"], deps=("a", "b")),
+            Job("a", ["sh", "-c", f"echo a >> {order}"]),
+            Job("b", ["sh", "-c", f"echo b >> {order}"], deps=("a",)),
+        ]
+        results = JobScheduler(max_cpus=2, history_path=str(history)).run(jobs)
+        assert all(r.status is JobStatus.SUCCEEDED for r in results.values())
+        assert order.read_text().split() == ["a", "b", "c"]
+        assert results["a"].max_rss_kb > 0
+        assert set(json.loads(history.read_text())) == {"a", "b", "c"}
+
+    def test_fail_fast_cancels_the_rest(self):
+        """Test that the first failure kills running jobs and cancels pending ones."""
+        jobs = [
+            Job("fail", ["sh", "-c", "exit 3"], priority=1),
+            Job("slow", ["sleep", "30"]),
+            Job("after", ["true"], deps=("slow",)),
+        ]
+        results = JobScheduler(max_cpus=2, kill_grace=1.0).run(jobs)
+        assert results["fail"].status is JobStatus.FAILED
+        assert results["fail"].returncode == 3
+        assert results["slow"].status is JobStatus.CANCELLED
+        assert results["slow"].wall_time < 10
+        assert results["after"].status is JobStatus.CANCELLED
+
+    def test_rejects_cycles(self):
+        """Test that a dependency cycle is reported before anything runs."""
+        with pytest.raises(ValueError):
+            JobScheduler().run([Job("a", ["true"], deps=("b",)), Job("b", ["true"], deps=("a",))])
+
+
+class TestVersionProbe:
+    """Tests for the cached tool version probes."""
+
+    def _tool(self, d: Path, name: str, banner: str) -> Path:
+        path = d / name
+        path.write_text(f"#!/bin/sh\necho probed >> {d}/count\necho '{banner}'\n")
+        path.chmod(0o755)
+        return path
+
+    def test_parse_version(self):
+        """Test version parsing from typical banners."""
+        assert parse_version("Verilator 5.020 2024-01-01 rev v5.020") == (5, 20)
+        assert parse_version("slang version 7.0.1+ab12") == (7, 0, 1)
+        assert parse_version("no numbers") is None
+
+    def test_cache_until_binary_changes(self, tmp_path, monkeypatch):
+        """Test that probes run once per binary version, in parallel on a cold cache."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        tool = self._tool(bin_dir, "vtool", "vtool 1.2.3")
+        self._tool(bin_dir, "other", "other v4.5")
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        cache_path = tmp_path / "versions.json"
+
+        versions = probe_versions(["vtool", "other"], cache=VersionCache(cache_path))
+        assert versions["vtool"].version == (1, 2, 3) and versions["other"].version == (4, 5)
+        probe_versions(["vtool", "other"], cache=VersionCache(cache_path))
+        assert (bin_dir / "count").read_text().count("probed") == 2
+
+        tool.write_text(tool.read_text().replace("1.2.3", "1.3.0"))
+        os.utime(tool, ns=(0, 10**9))
+        assert probe_versions(["vtool"], cache=VersionCache(cache_path))["vtool"].version == (1, 3, 0)
+
+    def test_min_versions(self, tmp_path, monkeypatch):
+        """Test that too-old tools are reported."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        self._tool(bin_dir, "vtool", "vtool 1.2.3")
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        cache = VersionCache(tmp_path / "versions.json")
+        assert check_min_versions({"vtool": "1.2"}, cache=cache)["vtool"].version == (1, 2, 3)
+        with pytest.raises(RuntimeError, match="vtool 1.2.3 < 1.10"):
+            check_min_versions({"vtool": "1.10"}, cache=cache)
+
+class TestRunTools:
+    """Tests for the asyncio tool runner."""
+
+    def test_streams_lines_and_files(self, tmp_path):
+        """Test line callbacks, file sinks and return codes."""
+        lines = []
+        results = run_tools([
+            ToolRun("a", ["sh", "-c", "echo one; echo two; echo err >&2; exit 3"], stdout=lines.append,
+                    stderr=str(tmp_path / "a.err")),
+            ToolRun("b", ["sh", "-c", "printf 'no newline'"], stdout=lines.append),
+        ], max_concurrency=2)
+        assert results["a"].returncode == 3 and results["b"].returncode == 0
+        assert sorted(lines) == ["no newline", "one", "two"]
+        assert (tmp_path / "a.err").read_text() == "err\n"
+
+    def test_timeout_kills_process_group(self):
+        """Test that a timed-out run's whole process group is killed."""
+        start = time.monotonic()
+        results = run_tools([ToolRun("slow", ["sh", "-c", "sleep 30 & sleep 30; wait"], timeout=0.3)], kill_grace=0.2)
+        assert results["slow"].timed_out and results["slow"].returncode < 0
+        assert time.monotonic() - start < 10
+
+    def test_bounded_concurrency(self, tmp_path):
+        """Test that no more than max_concurrency runs overlap."""
+        cmd = ["sh", "-c", f"echo start >> {tmp_path}/log; sleep 0.2; echo end >> {tmp_path}/log"]
+        run_tools([ToolRun(f"r{i}", cmd) for i in range(4)], max_concurrency=2)
+        depth = peak = 0
+        for event in (tmp_path / "log").read_text().split():
+            depth += 1 if event == "start" else -1
+            peak = max(peak, depth)
+        assert peak <= 2
+
+class TestLogMultiplexer:
+    """Tests for the multiplexed job log output."""
+
+    def test_prefixed_lines_and_logs(self, tmp_path):
+        """Test per-job prefixes, stable colors and per-job log files."""
+        out = io.StringIO()
+        ansi = AnsiColorsTool(AnsiColorsTool.EnableState.ENABLED)
+        with LogMultiplexer(out=out, log_dir=str(tmp_path), ansi=ansi) as mux:
+            mux.spawn("job1", ["sh", "-c", "echo a; echo b"])
+            mux.spawn("job2", ["sh", "-c", "printf c"])
+            assert mux.pump(timeout=10)
+        text = out.getvalue()
+        assert f"{mux._prefix('job1')}a\n" in text and f"{mux._prefix('job2')}c\n" in text
+        assert mux._prefix("job1") == LogMultiplexer(out=io.StringIO(), ansi=ansi)._prefix("job1")
+        assert (tmp_path / "job1.log").read_text() == "a\nb\n"
+        assert (tmp_path / "job2.log").read_text() == "c"
+
+    def test_flood_drops_instead_of_blocking(self, tmp_path):
+        """Test that a slow terminal drops queued lines while the log keeps everything."""
+        class SlowOut(io.StringIO):
+            def write(self, s):
+                time.sleep(0.05)
+                return super().write(s)
+        out = SlowOut()
+        with LogMultiplexer(out=out, log_dir=str(tmp_path), max_queued_bytes=4096,
+                            ansi=AnsiColorsTool(AnsiColorsTool.EnableState.DISABLED)) as mux:
+            mux.spawn("flood", ["sh", "-c", "seq 200000"])
+            assert mux.pump(timeout=20)
+        assert mux.dropped > 0
+        assert "lines dropped" in out.getvalue()
+        assert (tmp_path / "flood.log").read_text().count("\n") == 200000
+
+    def test_run_tools_callback(self):
+        """Test feeding run_tools output through on_line."""
+        out = io.StringIO()
+        with LogMultiplexer(out=out, ansi=AnsiColorsTool(AnsiColorsTool.EnableState.DISABLED)) as mux:
+            run_tools([ToolRun("x", ["echo", "hi"])], on_line=mux.on_line)
+        assert out.getvalue() == "[x] hi\n"
+
+class TestBoundedCapture:
+    """Tests for bounded-memory output capture."""
+
+    def test_head_tail_counts_and_spill(self, tmp_path):
+        """Test that only head and tail are kept while everything is counted and spilled."""
+        spill = str(tmp_path / "out.log.gz")
+        result = capture_run(["sh", "-c", "seq 1 100000; echo 'ERROR: x'; echo FATAL; echo ERROR"],
+                             head_bytes=100, tail_bytes=100, spill_path=spill)
+        cap = result.capture
+        assert result.returncode == 0 and cap.truncated
+        assert cap.head.startswith("1\n2\n") and len(cap.head) == 100
+        assert cap.tail.endswith("ERROR: x\nFATAL\nERROR\n") and len(cap.tail) == 100
+        assert cap.lines == 100003
+        assert cap.counts == {"ERROR": 2, "FATAL": 1}
+        assert cap.matches[0] == (100001, "ERROR", "ERROR: x")
+        assert gzip.open(spill).read().count(b"\n") == 100003
+
+    def test_small_output_not_duplicated(self):
+        """Test that output smaller than head+tail is returned exactly once."""
+        cap = BoundedCapture(head_bytes=4, tail_bytes=100, patterns=())
+        for chunk in (b"abc", b"def\ng", b"hi"):
+            cap.feed(chunk)
+        cap.close()
+        assert not cap.truncated and cap.text == "abcdef\nghi" and cap.lines == 2
+
+    def test_as_run_tools_sink(self):
+        """Test that a BoundedCapture works as a run_tools sink."""
+        cap = BoundedCapture(patterns=["FAIL"])
+        run_tools([ToolRun("t", ["sh", "-c", "echo ok; echo FAIL here"], stdout=cap)])
+        assert cap.counts["FAIL"] == 1 and cap.matches == [(2, "FAIL", "FAIL here")]
+
+class TestNativeDiff:
+    """Tests for the in-process diff fallback."""
+
+    PLAIN = AnsiColorsTool(AnsiColorsTool.EnableState.DISABLED)
+
+    def _diff(self, tmp_path, a: str, b: str, **kwargs) -> list[str]:
+        (tmp_path / "a").write_text(a)
+        (tmp_path / "b").write_text(b)
+        return list(diff_files(str(tmp_path / "a"), str(tmp_path / "b"), ansi=self.PLAIN, **kwargs))
+
+    def test_matches_difflib(self, tmp_path):
+        """Test that hunks match difflib.unified_diff over the whole files."""
+        rng = random.Random(1)
+        a = [f"line {i}\n" for i in range(5000)]
+        for _ in range(20):
+            b = list(a)
+            for _ in range(rng.randint(1, 4)):
+                i = rng.randrange(len(b))
+                choice = rng.random()
+                if choice < 0.3:
+                    del b[i]
+                elif choice < 0.6:
+                    b.insert(i, "new\n")
+                else:
+                    b[i] = "changed\n"
+            ours = self._diff(tmp_path, "".join(a), "".join(b), max_lines=None)
+            ref = list(difflib.unified_diff(a, b, str(tmp_path / "a"), str(tmp_path / "b")))
+            assert ours[2:] == ref[2:]
+
+    def test_identical_and_edge_cases(self, tmp_path):
+        """Test identical files, empty files and missing final newlines."""
+        assert self._diff(tmp_path, "same\n", "same\n") == []
+        assert self._diff(tmp_path, "", "x\n")[2:] == ["@@ -0,0 +1 @@\n", "+x\n"]
+        assert self._diff(tmp_path, "a\nb", "a\nc")[-4:] == [
+            "-b\n", "\\ No newline at end of file\n", "+c\n", "\\ No newline at end of file\n"]
+
+    def test_output_cap(self, tmp_path):
+        """Test that output stops at max_lines."""
+        out = self._diff(tmp_path, "a\n" * 100, "b\n" * 100, max_lines=10)
+        assert len(out) == 2 + 1 + 10 + 1 and "truncated" in out[-1]
+
+    def test_print_delta_fallback(self, tmp_path, capsys, monkeypatch):
+        """Test that print_delta uses the built-in diff when delta is missing."""
+        monkeypatch.setenv("PATH", str(tmp_path))
+        (tmp_path / "a").write_text("x\n")
+        (tmp_path / "b").write_text("y\n")
+        print_delta(str(tmp_path / "a"), str(tmp_path / "b"), ansi=self.PLAIN)
+        assert capsys.readouterr().out.endswith("@@ -1 +1 @@\n-x\n+y\n")
+
+class TestConsoleWriter:
+    """Tests for the buffered console writer."""
+
+    def test_buffers_until_threshold(self):
+        """Test that output is held until the size threshold, then written at once."""
+        out = io.StringIO()
+        writer = ConsoleWriter(out, ansi=AnsiColorsTool(AnsiColorsTool.EnableState.DISABLED),
+                               max_buffer=100, flush_interval=None)
+        writer.print("hello", "world")
+        assert out.getvalue() == ""
+        writer.write("x" * 100)
+        assert out.getvalue() == "hello world\n" + "x" * 100
+        writer.close()
+
+    def test_flush_interval(self):
+        """Test that pending output is flushed after flush_interval."""
+        out = io.StringIO()
+        writer = ConsoleWriter(out, max_buffer=1 << 20, flush_interval=0.05)
+        writer.print("late")
+        time.sleep(0.3)
+        assert out.getvalue() == "late\n"
+        writer.close()
+
+    def test_threads_do_not_interleave_lines(self):
+        """Test that lines printed from many threads stay whole."""
+        out = io.StringIO()
+        writer = ConsoleWriter(out, ansi=AnsiColorsTool(AnsiColorsTool.EnableState.ENABLED), max_buffer=4096)
+        def work(n):
+            for i in range(500):
+                writer.print(f"worker {n} line {i}", color="green")
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writer.close()
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 4000
+        assert all(l.startswith("\033[92mworker ") and l.endswith("\033[0m") for l in lines)
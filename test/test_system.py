@@ -6,9 +6,29 @@ from utils.system import (   # type: ignore
     raise_recursion_limit, 
     get_recursion_limit, 
     get_stack_limit,
-    raise_stack_limit
+    raise_stack_limit,
+    run_with_deep_stack,
+    DeepStackExecutor,
+    get_available_memory_bytes,
+    get_worker_count,
+    MemoryAwareExecutor,
+    make_executor,
+    SystemLimits,
+    ChildLimits,
+    UsageLog,
+    run_limited,
+    ResourceSampler,
+    read_topology,
+    get_topology
  )
+import os
 import sys
+import pytest
+import json
+import time
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import math
 import resource
 from typing import Tuple, Union
@@ -48,4 +68,205 @@ class TestSystem:
         """Test that get_stack_limit returns the current stack limit."""
         stack_limit = get_stack_limit()
         assert stack_limit[0] > 0
-        assert stack_limit[1] > stack_limit[0]
\ No newline at end of file
+        assert stack_limit[1] > stack_limit[0]
+
+class TestExecutor:
+    """Tests for the resource-aware executor factory."""
+
+    def test_get_worker_count(self):
+        """Test that the worker count honors memory estimates and caller caps."""
+        assert get_available_memory_bytes() > 0
+        assert get_worker_count() >= 1
+        assert get_worker_count(max_workers=1) == 1
+        assert get_worker_count(task_memory_bytes=1 << 62) == 1
+
+    def test_make_executor(self):
+        """Test that both plain and memory-aware executors run work."""
+        with make_executor("thread") as pool:
+            assert list(pool.map(abs, [-1, -2])) == [1, 2]
+        with make_executor("thread", task_memory_bytes=1024) as pool:
+            assert isinstance(pool, MemoryAwareExecutor)
+            assert list(pool.map(abs, [-1, -2, -3])) == [1, 2, 3]
+
+    def test_memory_throttling(self):
+        """Test that tasks wait for memory and are admitted once it frees up."""
+        available = [100]
+        gate = threading.Event()
+        pool = MemoryAwareExecutor(ThreadPoolExecutor(4), max_workers=4, task_memory_bytes=60,
+                                   poll_interval=0.01, ramp_seconds=0, available_memory=lambda: available[0])
+        first = pool.submit(gate.wait)    # always admitted: nothing running
+        try:
+            available[0] = 10
+            submitted = threading.Event()
+            threading.Thread(target=lambda: (pool.submit(abs, -1), submitted.set()), daemon=True).start()
+            time.sleep(0.05)
+            assert not submitted.is_set()
+            available[0] = 100
+            assert submitted.wait(2)
+        finally:
+            gate.set()
+            pool.shutdown()
+        first.result()
+
+class TestSystemLimits:
+    """Tests for the cached SystemLimits snapshot."""
+
+    def test_snapshot(self):
+        """Test that a snapshot reports sane CPU, memory and rlimit values."""
+        limits = SystemLimits.refresh()
+        assert limits.cpu_count >= limits.effective_cpus >= 1
+        assert limits.cpu_count == get_nprocs()
+        assert limits.memory_available > 0
+        assert limits.rlimits["stack"] == get_stack_limit()
+
+    def test_cached_until_ttl_expires(self):
+        """Test that current() returns the cached snapshot until it is too old."""
+        first = SystemLimits.refresh()
+        assert SystemLimits.current() is first
+        assert SystemLimits.current(max_age=0) is not first
+
+
+class TestGovernor:
+    """Tests for per-child rlimits and wait4 accounting."""
+
+    def test_limits_apply_to_child_only(self):
+        """Test that a child sees its RLIMIT_NOFILE and we keep ours."""
+        ours = resource.getrlimit(resource.RLIMIT_NOFILE)
+        usage = run_limited([sys.executable, "-c",
+                             "import resource, sys; sys.exit(resource.getrlimit(resource.RLIMIT_NOFILE)[0] != 64)"],
+                            ChildLimits(nofile=64))
+        assert usage.returncode == 0
+        assert resource.getrlimit(resource.RLIMIT_NOFILE) == ours
+
+    def test_prlimit(self):
+        """Test setting the limits from outside with prlimit."""
+        usage = run_limited([sys.executable, "-c",
+                             "import resource, sys, time; time.sleep(0.2); "
+                             "sys.exit(resource.getrlimit(resource.RLIMIT_NOFILE)[0] != 64)"],
+                            ChildLimits(nofile=64), use_prlimit=True)
+        assert usage.returncode == 0
+
+    def test_usage_records(self, tmp_path):
+        """Test peak RSS and timing records, heaviest() and the exports."""
+        log = UsageLog()
+        small = log.run([sys.executable, "-c", "pass"])
+        big = log.run([sys.executable, "-c", "b = bytearray(256 << 20); b[::4096] = b'x' * len(b[::4096])"])
+        assert big.max_rss_kb >= 256 * 1024 > small.max_rss_kb
+        assert big.wall_time > 0 and big.cpu_time > 0
+        assert log.heaviest(1) == [big]
+        log.to_csv(tmp_path / "usage.csv")
+        log.to_json(tmp_path / "usage.json")
+        assert (tmp_path / "usage.csv").read_text().count("\n") == 3
+
+    def test_timeout(self):
+        """Test that a child running past its timeout is killed."""
+        usage = run_limited(["sleep", "10"], timeout=0.2)
+        assert usage.timed_out and usage.returncode == -9
+        assert usage.wall_time < 5
+
+class TestResourceSampler:
+    """Tests for the background resource sampler."""
+
+    def test_samples_memory_growth(self, tmp_path):
+        """Test that RSS growth shows up in the time series and trips a threshold once."""
+        crossed = []
+        with ResourceSampler(interval=0.01, capacity=1000) as sampler:
+            base = sampler.column("rss_kb")[0]
+            sampler.on_threshold("rss_kb", base + 32 * 1024, lambda s, col, v: crossed.append(v))
+            blob = bytearray(64 << 20)
+            blob[::4096] = b"x" * len(blob[::4096])
+            time.sleep(0.1)
+            del blob
+        rss = sampler.column("rss_kb")
+        assert max(rss) > base + 48 * 1024
+        assert len(crossed) == 1
+        assert sampler.overhead < 0.1
+        sampler.to_csv(tmp_path / "res.csv")
+        sampler.to_json(tmp_path / "res.json")
+        assert len(json.loads((tmp_path / "res.json").read_text())["samples"]) == len(sampler)
+
+    def test_ring_buffer_wraps(self):
+        """Test that the ring keeps only the newest `capacity` samples, in order."""
+        sampler = ResourceSampler(capacity=4)
+        sampler._start = time.monotonic()
+        for _ in range(10):
+            sampler.sample()
+        times = sampler.column("time")
+        assert len(sampler) == 4 and times == sorted(times)
+
+    def test_children(self):
+        """Test that a child process is found and sampled."""
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(1)"])
+        try:
+            sampler = ResourceSampler()
+            sampler._start = time.monotonic()
+            row = sampler.sample()
+            assert row["children"] >= 1 and row["children_rss_kb"] > 0
+        finally:
+            sampler.stop()
+            child.kill()
+            child.wait()
+
+class TestDeepStack:
+    """Tests for running deep recursion on a big-stack thread."""
+
+    def _nest(self, n: int) -> int:
+        return 0 if n == 0 else 1 + max(map(self._nest, [n - 1]))
+
+    def test_run_with_deep_stack(self):
+        """Test deep recursion runs, and the recursion limit and stack size are restored."""
+        before = sys.getrecursionlimit()
+        assert run_with_deep_stack(self._nest, 20_000, stack_bytes=256 << 20, recursion_limit=50_000) == 20_000
+        assert sys.getrecursionlimit() == before
+        assert threading.stack_size() == 0
+
+    def test_exception_propagates(self):
+        """Test that exceptions from the function are re-raised in the caller."""
+        with pytest.raises(ZeroDivisionError):
+            run_with_deep_stack(lambda: 1 / 0)
+
+    def test_executor(self):
+        """Test the executor variant holds the recursion limit until shutdown."""
+        before = sys.getrecursionlimit()
+        with DeepStackExecutor(max_workers=2, stack_bytes=256 << 20, recursion_limit=50_000) as pool:
+            assert sys.getrecursionlimit() == 50_000
+            assert list(pool.map(self._nest, [10_000, 20_000])) == [10_000, 20_000]
+        assert sys.getrecursionlimit() == before
+
+class TestTopology:
+    """Tests for the CPU/NUMA topology reader and pinning plans."""
+
+    def _fake_sysfs(self, root):
+        # 2 sockets/nodes x 2 cores x 2 SMT threads; siblings are cpu N and N+4
+        for cpu in range(8):
+            topo = root / "cpu" / f"cpu{cpu}" / "topology"
+            topo.mkdir(parents=True)
+            (topo / "core_id").write_text(f"{cpu % 2}\n")
+            (topo / "physical_package_id").write_text(f"{(cpu % 4) // 2}\n")
+        for node, cpus in ((0, "0-1,4-5"), (1, "2-3,6-7")):
+            (root / "node" / f"node{node}").mkdir(parents=True)
+            (root / "node" / f"node{node}" / "cpulist").write_text(cpus + "\n")
+        return str(root)
+
+    def test_cores_and_nodes(self, tmp_path):
+        """Test grouping into SMT siblings and NUMA nodes, restricted to allowed CPUs."""
+        topo = read_topology(range(8), sysfs=self._fake_sysfs(tmp_path))
+        assert topo.cores == ((0, 4), (1, 5), (2, 6), (3, 7))
+        assert topo.nodes == {0: (0, 1, 4, 5), 1: (2, 3, 6, 7)}
+        assert topo.siblings(5) == (1, 5)
+        limited = read_topology({0, 1, 2}, sysfs=str(tmp_path))
+        assert limited.cores == ((0,), (1,), (2,))
+
+    def test_pinning_plans(self, tmp_path):
+        """Test the per-core plan spreads over nodes and the node plan packs."""
+        topo = read_topology(range(8), sysfs=self._fake_sysfs(tmp_path))
+        assert topo.pinning_plan("core", 2) == [{0, 4}, {2, 6}]
+        assert topo.pinning_plan("node", 3) == [{0, 1, 4, 5}, {0, 1, 4, 5}, {2, 3, 6, 7}]
+        assert len(topo.pinning_plan("core")) == 4
+
+    def test_pinned_executor(self):
+        """Test that make_executor pins thread workers to their plan."""
+        topo = get_topology()
+        with make_executor("thread", max_workers=1, pin="core") as pool:
+            cpus = pool.submit(os.sched_getaffinity, 0).result()
+        assert cpus == set(topo.cores[0])